@@ -0,0 +1,276 @@
+"""Almacenamiento opcional en SQLite para archivos, programas y usuarios
+
+Se activa con SIMULADOR_STORAGE=sqlite y sustituye a los tres JSON de data/.
+Todas las consultas usan SQL constante con parámetros, así que sqlite3 las
+prepara una vez y las reutiliza desde su caché de sentencias.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+
+SCHEMA_VERSION = 2
+
+DEFAULT_DB_PATH = 'data/simulador.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size TEXT NOT NULL,
+    date TEXT NOT NULL,
+    bytes INTEGER,
+    mtime REAL,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS files_name ON files (name);
+CREATE INDEX IF NOT EXISTS files_category ON files (category, name);
+CREATE INDEX IF NOT EXISTS files_type ON files (type);
+CREATE INDEX IF NOT EXISTS files_date ON files (date);
+CREATE TABLE IF NOT EXISTS programs (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# El contenido de los archivos no se guarda aquí: está en user_files/ y se lee al abrirlos
+FILE_COLUMNS = ('name', 'category', 'type', 'size', 'date', 'bytes', 'mtime', 'hash')
+
+_SELECT_FILE = "SELECT key, name, category, type, size, date, bytes, mtime, hash FROM files"
+_UPSERT_FILE = ("INSERT OR REPLACE INTO files (key, name, category, type, size, date, bytes, mtime, hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def _file_row(key, value):
+    return (key,) + tuple(value.get(column) for column in FILE_COLUMNS)
+
+
+def _file_record(row):
+    return row[0], {column: value for column, value in zip(FILE_COLUMNS, row[1:]) if value is not None}
+
+
+class SqliteStore:
+    """Base de datos del simulador con índices por nombre, categoría, tipo y fecha
+
+    Las operaciones de varios pasos (renombrar) van en una transacción. La
+    conexión se usa desde el hilo de Tk; el candado protege el uso puntual
+    desde otros hilos.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, files_dir='user_files'):
+        self.path = path
+        self.files_dir = files_dir  # Donde vive el contenido: <files_dir>/<categoría>/<nombre>
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.lock = threading.RLock()
+        self.upgraded_from = None  # Versión del esquema anterior si se acaba de migrar
+        with self.lock, self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                              (str(SCHEMA_VERSION),))
+            version = int(self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()[0])
+            if version < SCHEMA_VERSION:
+                self._migrate(version)
+
+    def _migrate(self, version):
+        """Actualizar una base creada con un esquema anterior
+
+        Si una parte no se pudo completar, la versión no cambia y la
+        migración se reintenta en el próximo arranque (cada paso es repetible).
+        """
+        complete = True
+        if version < 2:
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(files)")}
+            for column, column_type in (('bytes', 'INTEGER'), ('mtime', 'REAL'), ('hash', 'TEXT')):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE files ADD COLUMN {column} {column_type}")
+            if 'content' in columns:
+                complete = self._externalize_legacy_content()
+        if complete:
+            self.conn.execute("UPDATE meta SET value = ? WHERE key = 'schema_version'", (str(SCHEMA_VERSION),))
+        self.upgraded_from = version
+
+    def _externalize_legacy_content(self):
+        """v1 guardaba el contenido en la tabla: pasarlo a disco y quitar la columna
+
+        Solo se escribe el contenido de archivos que aún no existen en disco.
+        Si alguno no se puede escribir, su texto se queda en la columna (que
+        entonces se conserva) y se devuelve False para reintentarlo.
+        """
+        failed = []
+        rows = self.conn.execute("SELECT key, category, name, content FROM files WHERE content != ''").fetchall()
+        for key, category, name, content in rows:
+            file_path = os.path.join(self.files_dir, category, name)
+            if os.path.exists(file_path):
+                continue
+            try:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            except OSError as e:
+                print(f"⚠️ No se pudo mover el contenido de {file_path}: {e}")
+                failed.append(key)
+        if not failed:
+            self.conn.execute("ALTER TABLE files DROP COLUMN content")
+            return True
+        placeholders = ", ".join("?" * len(failed))
+        self.conn.execute(f"UPDATE files SET content = '' WHERE key NOT IN ({placeholders})", failed)
+        print(f"⚠️ {len(failed)} archivos siguen en la base; se reintentará al próximo arranque")
+        return False
+
+    def needs_import(self):
+        """Si aún no se importaron los JSON existentes (base recién creada)"""
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone() is None
+
+    def import_data(self, users_data, files_data, programs_data):
+        """Cargar de una vez los datos existentes de los JSON (migración inicial)"""
+        with self.lock, self.conn:
+            self.conn.executemany(_UPSERT_FILE, (_file_row(key, value) for key, value in files_data.items()))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', '1')")
+        self.save_users(users_data)
+        self.save_programs(programs_data)
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ==================== ARCHIVOS ====================
+
+    def apply_file_operation(self, record):
+        """Aplicar una operación del gestor de archivos (mismo formato que el diario JSON)"""
+        operation, key = record['op'], record['key']
+        with self.lock, self.conn:
+            if operation == 'create':
+                self.conn.execute(_UPSERT_FILE, _file_row(key, record['value']))
+            elif operation == 'rename':
+                self.conn.execute("DELETE FROM files WHERE key = ?", (key,))
+                self.conn.execute(_UPSERT_FILE, _file_row(record['new_key'], record['value']))
+            elif operation == 'update':
+                fields = {column: value for column, value in record['fields'].items() if column in FILE_COLUMNS}
+                if not fields:
+                    return
+                assignments = ", ".join(f"{column} = ?" for column in sorted(fields))
+                self.conn.execute(f"UPDATE files SET {assignments} WHERE key = ?",
+                                  [fields[column] for column in sorted(fields)] + [key])
+            elif operation == 'delete':
+                self.conn.execute("DELETE FROM files WHERE key = ?", (key,))
+            else:
+                raise ValueError(f"Operación desconocida: {operation}")
+
+    def get_file(self, key):
+        """Registro de un archivo por clave o None"""
+        with self.lock:
+            row = self.conn.execute(_SELECT_FILE + " WHERE key = ?", (key,)).fetchone()
+        return _file_record(row)[1] if row else None
+
+    def find_file(self, name, category=None):
+        """(clave, registro) del primer archivo con ese nombre (en 'category' si se indica), por índice"""
+        with self.lock:
+            if category is None:
+                row = self.conn.execute(_SELECT_FILE + " WHERE name = ? ORDER BY rowid LIMIT 1", (name,)).fetchone()
+            else:
+                row = self.conn.execute(_SELECT_FILE + " WHERE category = ? AND name = ? ORDER BY rowid LIMIT 1",
+                                        (category, name)).fetchone()
+        return _file_record(row) if row else (None, None)
+
+    def iter_files(self, category=None):
+        """(clave, registro) en orden de creación, opcionalmente de una categoría"""
+        with self.lock:
+            if category is None:
+                rows = self.conn.execute(_SELECT_FILE + " ORDER BY rowid").fetchall()
+            else:
+                rows = self.conn.execute(_SELECT_FILE + " WHERE category = ? ORDER BY rowid", (category,)).fetchall()
+        return (_file_record(row) for row in rows)
+
+    def file_keys(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT key FROM files ORDER BY rowid")]
+
+    def count_files(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    # ==================== PROGRAMAS Y USUARIOS ====================
+
+    def _load_table(self, table):
+        with self.lock:
+            rows = self.conn.execute(f"SELECT name, data FROM {table} ORDER BY rowid").fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def _save_table(self, table, data):
+        """Escribir solo las filas que cambiaron y borrar las que ya no están"""
+        with self.lock, self.conn:
+            current = dict(self.conn.execute(f"SELECT name, data FROM {table}"))
+            changed = []
+            for name, value in data.items():
+                encoded = json.dumps(value, ensure_ascii=False, sort_keys=True)
+                if current.pop(name, None) != encoded:
+                    changed.append((name, encoded))
+            self.conn.executemany(f"INSERT OR REPLACE INTO {table} (name, data) VALUES (?, ?)", changed)
+            self.conn.executemany(f"DELETE FROM {table} WHERE name = ?", [(name,) for name in current])
+        return len(changed)
+
+    def load_programs(self):
+        return self._load_table('programs')
+
+    def save_programs(self, programs_data):
+        return self._save_table('programs', programs_data)
+
+    def load_users(self):
+        return self._load_table('users')
+
+    def save_users(self, users_data):
+        return self._save_table('users', users_data)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SqliteFileMap(Mapping):
+    """Vista de solo lectura tipo diccionario de la tabla de archivos (sustituye a files_data)
+
+    Los cambios se hacen con SqliteStore.apply_file_operation; cada acceso
+    consulta la base, así que los registros devueltos son copias.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, key):
+        record = self.store.get_file(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __contains__(self, key):
+        return self.store.get_file(key) is not None
+
+    def __iter__(self):
+        return iter(self.store.file_keys())
+
+    def __len__(self):
+        return self.store.count_files()
+
+    def items(self):
+        # Una sola consulta en lugar de una por clave
+        return list(self.store.iter_files())
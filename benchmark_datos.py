@@ -0,0 +1,315 @@
+"""Benchmarks de los almacenes de datos: diccionarios JSON frente a SQLite
+
+Uso: python benchmark_datos.py [número de archivos]   (por defecto 100000; 1000000 para la lista virtual a escala)
+
+Mide, sobre files_data sintéticos, la carga inicial y la latencia de buscar
+por nombre y por clave, actualizar metadatos y renombrar con cada motor, y
+el tiempo de leer files.json frente a su instantánea binaria. También
+compara recorrer files_data con los índices de FileCatalog y mide la
+lista virtual del gestor (ordenar, pedir una página y cambios incrementales)
+y, si hay pantalla, las llamadas a Tk de reconstruir un Treeview frente a
+reconciliarlo.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from almacen_sqlite import SqliteStore
+from lista_virtual import FileListModel, TreeReconciler
+from persistencia import (FileCatalog, FileJournal, apply_file_operation, binary_snapshot_path, load_json_store,
+                          write_binary_snapshot, write_json_atomic)
+
+
+DEFAULT_FILE_COUNT = 100000
+LOOKUPS = 200
+UPDATES = 200
+SNAPSHOT_SIZES = [10000, 100000]
+SNAPSHOT_RUNS = 5
+
+CATEGORIES = [('documents', 'Documento'), ('images', 'Imagen'), ('music', 'Audio'), ('videos', 'Video')]
+
+
+def synthetic_files(count):
+    """files_data con 'count' archivos repartidos entre las categorías"""
+    files = {}
+    for index in range(count):
+        category, file_type = CATEGORIES[index % len(CATEGORIES)]
+        name = f"archivo_{index:07d}.txt"
+        files[f"{category}_{name}"] = {
+            "name": name,
+            "type": file_type,
+            "size": f"{index % 900 + 1} KB",
+            "category": category,
+            "date": f"{index % 28 + 1:02d}/01/2024 10:{index % 60:02d}",
+            "bytes": index % 900 * 1024 + 1,
+            "mtime": 1704067200.0 + index,
+            "hash": f"{index:040x}"
+        }
+    return files
+
+
+def median_us(func, arguments):
+    """Mediana en microsegundos de func(argumento) sobre cada argumento"""
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        func(argument)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def scan_by_name(files, name):
+    """Búsqueda por nombre tal como la hacía el gestor de archivos"""
+    for key, info in files.items():
+        if info['name'] == name:
+            return key, info
+    return None, None
+
+
+def bench_json(directory, files, names, keys):
+    path = os.path.join(directory, 'files.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(files, f, indent=2, ensure_ascii=False)
+
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    journal = FileJournal(os.path.join(directory, 'files.journal'))
+    journal.replay(data)
+    load = time.perf_counter() - start
+
+    def update(key):
+        record = {'op': 'update', 'key': key, 'fields': {'date': '02/02/2024 12:00', 'bytes': 8, 'hash': 'e' * 40}}
+        apply_file_operation(data, record)
+        journal.append(record)
+
+    def rename(key):
+        value = dict(data[key], name='renombrado_' + data[key]['name'])
+        record = {'op': 'rename', 'key': key, 'new_key': f"{value['category']}_{value['name']}", 'value': value}
+        apply_file_operation(data, record)
+        journal.append(record)
+
+    results = {
+        'load_ms': load * 1000,
+        'find_name_us': median_us(lambda name: scan_by_name(data, name), names),
+        'get_key_us': median_us(lambda key: data.get(key), keys),
+        'update_us': median_us(update, keys[:UPDATES]),
+        'rename_us': median_us(rename, keys[UPDATES:2 * UPDATES])
+    }
+    journal.close()
+    return results
+
+
+def bench_sqlite(directory, files, names, keys):
+    path = os.path.join(directory, 'simulador.db')
+    store = SqliteStore(path)
+    store.import_data({}, files, {})
+    store.close()
+
+    start = time.perf_counter()
+    store = SqliteStore(path)
+    store.count_files()
+    load = time.perf_counter() - start
+
+    def update(key):
+        store.apply_file_operation({'op': 'update', 'key': key,
+                                    'fields': {'date': '02/02/2024 12:00', 'bytes': 8, 'hash': 'e' * 40}})
+
+    def rename(key):
+        value = dict(store.get_file(key))
+        value['name'] = 'renombrado_' + value['name']
+        store.apply_file_operation({'op': 'rename', 'key': key,
+                                    'new_key': f"{value['category']}_{value['name']}", 'value': value})
+
+    results = {
+        'load_ms': load * 1000,
+        'find_name_us': median_us(store.find_file, names),
+        'get_key_us': median_us(store.get_file, keys),
+        'update_us': median_us(update, keys[:UPDATES]),
+        'rename_us': median_us(rename, keys[UPDATES:2 * UPDATES])
+    }
+    store.close()
+    return results
+
+
+def bench_catalog(files, names):
+    """Buscar por nombre y filtrar por categoría: recorrido completo frente a índices"""
+    catalog = FileCatalog(files)
+    categories = [category for category, _ in CATEGORIES]
+    results = {
+        'find_scan_us': median_us(lambda name: scan_by_name(files, name), names),
+        'find_index_us': median_us(catalog.find, names),
+        'filter_scan_us': median_us(
+            lambda category: sum(1 for _, info in files.items() if info['category'] == category), categories),
+        'filter_index_us': median_us(lambda category: sum(1 for _ in catalog.iter_category(category)), categories)
+    }
+    print(f"🔎 Índices de FileCatalog ({len(files)} archivos): buscar por nombre "
+          f"{results['find_scan_us']:.1f} → {results['find_index_us']:.2f} µs, filtrar una categoría "
+          f"{results['filter_scan_us'] / 1000:.1f} → {results['filter_index_us'] / 1000:.1f} ms")
+    # El filtro devuelve la cuarta parte de los archivos: basta con no recorrer el resto
+    return (results['find_index_us'] * 10 < results['find_scan_us'] and
+            results['filter_index_us'] < results['filter_scan_us'])
+
+
+class CatalogSource:
+    """Lo mínimo del núcleo que usa FileListModel, sobre un FileCatalog"""
+
+    def __init__(self, files):
+        self.files_data = FileCatalog(files)
+        self.observers = []
+
+    def observe_files(self, callback):
+        self.observers.append(callback)
+
+    def iter_files(self, category="all"):
+        if category == "all":
+            return self.files_data.items()
+        return self.files_data.iter_category(category)
+
+    def record_file_change(self, record):
+        for callback in self.observers:
+            callback(record)
+        self.files_data.apply(record)
+
+
+def bench_file_list(files, keys):
+    """Lista virtual: construir cada orden, pedir una página visible y renombrar sin reordenar"""
+    source = CatalogSource(files)
+    model = FileListModel(source)
+    builds = {}
+    for column in (None, '#0', 'Tipo', 'Tamaño', 'Fecha'):
+        start = time.perf_counter()
+        model.set_view(category="all", column=column)
+        len(model)
+        builds[column or 'creación'] = (time.perf_counter() - start) * 1000
+
+    total = len(model)
+    page_us = median_us(lambda start: model.rows(start, start + 40), range(0, total, max(1, total // LOOKUPS)))
+
+    def rename(key):
+        value = dict(source.files_data[key], name='lista_' + source.files_data[key]['name'], date='02/02/2030 12:00')
+        source.record_file_change({'op': 'rename', 'key': key, 'new_key': f"{value['category']}_{value['name']}",
+                                   'value': value})
+
+    rename_us = median_us(rename, keys[2 * UPDATES:3 * UPDATES])
+    print(f"📜 Lista virtual ({total} archivos): construir orden " +
+          ", ".join(f"{column} {ms:.0f} ms" for column, ms in builds.items()) +
+          f"; página de 40 filas {page_us:.1f} µs; renombrar con la lista ordenada {rename_us:.1f} µs")
+    # Desplazarse y editar no deben costar nada parecido a reordenar
+    return page_us < 1000 and rename_us * 100 < builds['Fecha'] * 1000
+
+
+def bench_reconcile(files):
+    """Llamadas a Tk por actualización: borrar y reinsertar todo frente a TreeReconciler"""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("⏭️ Reconciliación de Treeview omitida: no hay pantalla")
+        return True
+    root.withdraw()
+    tree = ttk.Treeview(root, columns=("Tipo", "Tamaño", "Fecha"), show="tree headings")
+    reconciler = TreeReconciler(tree)
+
+    def row(key, info):
+        return key, {'text': info['name'], 'values': (info['type'], info['size'], info['date'])}
+
+    first_rows = [row(key, info) for key, info in list(files.items())[:41]]
+    window = first_rows[:40]
+    changes = {
+        'una fila cambia': window[:5] + [(window[5][0], dict(window[5][1], text='renombrado'))] + window[6:],
+        'una fila sube al principio': [window[20]] + window[:20] + window[21:],
+        'desplazar una fila': first_rows[1:]
+    }
+    ok = True
+    for label, rows in changes.items():
+        reconciler.sync(window)
+        start = time.perf_counter()
+        stats = reconciler.sync(rows)
+        reconcile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        tree.delete(*tree.get_children())
+        reconciler.reset()
+        for iid, options in rows:
+            tree.insert("", "end", iid=iid, **options)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        rebuild_calls = 2 + len(rows)
+        print(f"🌳 {label:<27} reconciliar {stats['tk_calls']:3d} llamadas a Tk ({reconcile_ms:.2f} ms), "
+              f"reconstruir {rebuild_calls:3d} ({rebuild_ms:.2f} ms)")
+        tree.delete(*tree.get_children())
+        ok = ok and stats['tk_calls'] * 5 < rebuild_calls
+    root.destroy()
+    return ok
+
+
+def bench_snapshot_formats():
+    """Arranque en frío: parsear files.json frente a leer files.bin"""
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'files.json')
+        for count in SNAPSHOT_SIZES:
+            files = synthetic_files(count)
+            write_json_atomic(path, files)
+            write_binary_snapshot(binary_snapshot_path(path), files, path)
+
+            times = {}
+            for label, binary in (('json', False), ('binary', True)):
+                samples = []
+                for _ in range(SNAPSHOT_RUNS):
+                    start = time.perf_counter()
+                    data = load_json_store(path, binary=binary)
+                    samples.append(time.perf_counter() - start)
+                assert data == files
+                times[label] = statistics.median(samples)
+
+            sizes = os.path.getsize(path), os.path.getsize(binary_snapshot_path(path))
+            print(f"⚡ Instantánea de {count} archivos: json {times['json'] * 1000:.1f} ms ({sizes[0] / 1048576:.1f} MB), "
+                  f"binaria {times['binary'] * 1000:.1f} ms ({sizes[1] / 1048576:.1f} MB), "
+                  f"{times['json'] / times['binary']:.1f}x")
+            ok = ok and times['binary'] < times['json']
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de los almacenes de datos (JSON frente a SQLite)")
+    parser.add_argument('count', nargs='?', type=int, default=DEFAULT_FILE_COUNT,
+                        help=f"número de archivos sintéticos (por defecto {DEFAULT_FILE_COUNT})")
+    count = parser.parse_args().count
+    files = synthetic_files(count)
+    rng = random.Random(17)
+    keys = rng.sample(list(files), max(LOOKUPS, 3 * UPDATES))
+    names = [files[key]['name'] for key in keys[:LOOKUPS]]
+
+    with tempfile.TemporaryDirectory() as directory:
+        engines = {
+            'json': bench_json(directory, files, names, keys),
+            'sqlite': bench_sqlite(directory, files, names, keys)
+        }
+
+    print(f"🗄️ Almacén de archivos con {count} entradas (medianas):")
+    labels = [('load_ms', 'carga inicial', 'ms'), ('find_name_us', 'buscar por nombre', 'µs'),
+              ('get_key_us', 'buscar por clave', 'µs'), ('update_us', 'actualizar metadatos', 'µs'),
+              ('rename_us', 'renombrar', 'µs')]
+    for field, label, unit in labels:
+        print(f"   • {label:<22} json {engines['json'][field]:10.1f} {unit}   "
+              f"sqlite {engines['sqlite'][field]:10.1f} {unit}")
+
+    # Objetivo: la búsqueda por nombre deja de recorrer todos los archivos
+    ok = engines['sqlite']['find_name_us'] * 10 < engines['json']['find_name_us']
+    ok = bench_catalog(files, names) and ok
+    ok = bench_file_list(files, keys) and ok
+    ok = bench_reconcile(files) and ok
+    ok = bench_snapshot_formats() and ok
+    print("✅ Benchmarks superados" if ok else "❌ Algún benchmark no cumple el objetivo")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""Benchmarks del motor de imágenes (se ejecuta sin pantalla ni Tk)
+
+Uso: python benchmark_imagenes.py
+"""
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageChops
+
+import imagenes
+from paquete_recursos import AssetBundle, BundleWriter, variant_entry_name
+
+
+# ==================== IMPLEMENTACIONES DE REFERENCIA ====================
+
+def legacy_gradient(width, height, color1, color2):
+    """Gradiente vertical original, píxel a píxel (referencia)"""
+    image = Image.new('RGB', (width, height))
+    pixels = image.load()
+
+    for y in range(height):
+        factor = y / height
+        r = int(color1[0] * (1 - factor) + color2[0] * factor)
+        g = int(color1[1] * (1 - factor) + color2[1] * factor)
+        b = int(color1[2] * (1 - factor) + color2[2] * factor)
+
+        for x in range(width):
+            pixels[x, y] = (r, g, b)
+
+    return image
+
+
+def legacy_circular_gradient(size, color1, color2):
+    """Gradiente circular original con raíz cuadrada por píxel (referencia)"""
+    width, height = size
+    image = Image.new('RGBA', size, (0, 0, 0, 0))
+    pixels = image.load()
+
+    center_x, center_y = width // 2, height // 2
+    max_distance = min(width, height) // 2
+
+    for y in range(height):
+        for x in range(width):
+            distance = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
+
+            if distance <= max_distance:
+                factor = distance / max_distance
+                r = int(color1[0] * (1 - factor) + color2[0] * factor)
+                g = int(color1[1] * (1 - factor) + color2[1] * factor)
+                b = int(color1[2] * (1 - factor) + color2[2] * factor)
+                pixels[x, y] = (r, g, b, 255)
+
+    return image
+
+
+# Tamaños de los placeholders de un arranque sin carpeta images/:
+# 2 avatares de 120px y 26 iconos/logos de 64px, estos con su variante de 20px
+COLD_START_SIZES = [(120, 120)] * 2 + [(64, 64)] * 26 + [(20, 20)] * 25
+
+# Aceleración mínima del gradiente vectorizado frente al original (medianas)
+GRADIENT_MIN_SPEEDUP = 100
+
+
+# ==================== UTILIDADES ====================
+
+def best_time(func, repeat=3):
+    """Mejor tiempo (en segundos) de varias ejecuciones"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def median_time(func, repeat=5):
+    """Mediana del tiempo (en segundos) de varias ejecuciones"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+# ==================== BENCHMARKS ====================
+
+def bench_gradient(width=1920, height=1080):
+    """Comparar el gradiente vectorizado con el original: mismos píxeles y mucho más rápido
+
+    Ambos lados se miden con las mismas repeticiones y se comparan medianas.
+    """
+    color1, color2 = (30, 58, 138), (59, 130, 246)
+
+    reference = legacy_gradient(width, height, color1, color2)
+    result = imagenes.linear_gradient(width, height, color1, color2)
+    identical = reference.tobytes() == result.tobytes()
+
+    legacy = median_time(lambda: legacy_gradient(width, height, color1, color2))
+    fast = median_time(lambda: imagenes.linear_gradient(width, height, color1, color2))
+    speedup = legacy / fast
+
+    print(f"🎨 Gradiente {width}x{height}: original {legacy * 1000:.1f} ms, "
+          f"vectorizado {fast * 1000:.2f} ms ({speedup:.0f}x, mediana de 5, mínimo {GRADIENT_MIN_SPEEDUP}x), "
+          f"píxeles idénticos: {'sí' if identical else 'NO'}")
+
+    for direction in ('horizontal', 'diagonal'):
+        elapsed = best_time(lambda: imagenes.linear_gradient(width, height, color1, color2, direction))
+        print(f"   • {direction}: {elapsed * 1000:.2f} ms")
+
+    return identical and speedup >= GRADIENT_MIN_SPEEDUP
+
+
+def bench_radial_gradient():
+    """Comparar los placeholders radiales de un arranque en frío"""
+    color1, color2 = (59, 130, 246), (147, 197, 253)
+
+    def cold_start(builder):
+        for size in COLD_START_SIZES:
+            builder(size, color1, color2)
+
+    legacy = best_time(lambda: cold_start(legacy_circular_gradient), repeat=1)
+    fast = best_time(lambda: cold_start(imagenes.radial_gradient))
+    print(f"🔵 Placeholders en frío ({len(COLD_START_SIZES)}): original {legacy * 1000:.1f} ms, "
+          f"vectorizado {fast * 1000:.2f} ms ({legacy / fast:.0f}x)")
+
+    for size in ((256, 256), (512, 384)):
+        elapsed = best_time(lambda: imagenes.radial_gradient(size, color1, color2))
+        print(f"   • {size[0]}x{size[1]}: {elapsed * 1000:.2f} ms")
+
+    return fast < legacy
+
+
+def bench_enhance(width=1920, height=1080):
+    """Comparar los presets de mejora en un wallpaper: tiempo y diferencia con 'quality'"""
+    image = synthetic_wallpaper(width, height)
+    reference = imagenes.enhance_image(image, imagenes.ENHANCE_PRESETS['quality'])
+
+    times = {}
+    for preset, params in imagenes.ENHANCE_PRESETS.items():
+        times[preset] = best_time(lambda: imagenes.enhance_image(image, params))
+
+    difference = ImageChops.difference(reference, imagenes.enhance_image(image, imagenes.ENHANCE_PRESETS['fast']))
+    max_difference = max(high for _, high in difference.getextrema())
+    print(f"✨ Mejora {width}x{height}: quality {times['quality'] * 1000:.1f} ms, "
+          f"fast {times['fast'] * 1000:.1f} ms ({times['quality'] / times['fast']:.1f}x, "
+          f"diferencia máxima {max_difference}), off {times['off'] * 1000:.3f} ms")
+    return times['fast'] < times['quality'] and max_difference <= 8
+
+
+def synthetic_png_sources(count, size=512):
+    """PNG en memoria parecidos a iconos reales (RGBA con gradiente)"""
+    sources = []
+    for i in range(count):
+        image = imagenes.radial_gradient((size, size), (i * 7 % 256, 90, 200), (250, 200, i * 13 % 256))
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG')
+        sources.append(buffer.getvalue())
+    return sources
+
+
+def process_asset(data):
+    """Trabajo por imagen de la carga: decodificar, RGBA, variante normal y pequeña"""
+    image = Image.open(io.BytesIO(data))
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    return imagenes.derive_variant(image, (64, 64)), imagenes.derive_variant(image, (20, 20))
+
+
+def bench_parallel_load(count=28, workers=4):
+    """Comparar la carga de iconos en serie y con un pool de hilos
+
+    Con un solo núcleo el pool no puede ganar: el resultado es solo
+    informativo y únicamente se exige que los píxeles coincidan.
+    """
+    sources = synthetic_png_sources(count)
+
+    def run(pool_size):
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            return list(executor.map(process_asset, sources))
+
+    identical = all(
+        a.tobytes() == b.tobytes()
+        for serial_pair, parallel_pair in zip(run(1), run(workers))
+        for a, b in zip(serial_pair, parallel_pair)
+    )
+    serial = best_time(lambda: run(1))
+    parallel = best_time(lambda: run(workers))
+    cpus = os.cpu_count() or 1
+    print(f"🧵 Carga de {count} iconos: serie {serial * 1000:.1f} ms, "
+          f"{workers} hilos {parallel * 1000:.1f} ms ({serial / parallel:.1f}x), "
+          f"píxeles idénticos: {'sí' if identical else 'NO'}")
+    if cpus <= 1:
+        print("   ℹ️ Un solo núcleo: la comparación de tiempos es solo informativa")
+        return identical
+    return identical and parallel <= serial
+
+
+def bench_bundle(count=28):
+    """Comparar variantes sueltas en disco (un archivo cada una) con el paquete mmap"""
+    sources = synthetic_png_sources(count, size=128)
+    variants = [imagenes.derive_variant(Image.open(io.BytesIO(data)), (64, 64)) for data in sources]
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        writer = BundleWriter(os.path.join(directory, 'assets.bundle'), {})
+        for i, image in enumerate(variants):
+            path = os.path.join(directory, f'icon_{i}.png')
+            image.save(path, 'PNG')
+            paths.append(path)
+            writer.add_raw(variant_entry_name(f'icon_{i}', (64, 64)), image)
+        writer.close()
+
+        def loose():
+            # Como la carga actual: comprobar, abrir y decodificar cada archivo
+            for path in paths:
+                if os.path.exists(path):
+                    Image.open(path).load()
+
+        def bundled():
+            bundle = AssetBundle(writer.path, {})
+            for i in range(count):
+                bundle.get_variant(f'icon_{i}', (64, 64)).load()
+
+        loose_time = best_time(loose)
+        bundle_time = best_time(bundled)
+
+    print(f"📦 {count} variantes: archivos sueltos {loose_time * 1000:.1f} ms "
+          f"({count * 2} stat/open), paquete mmap {bundle_time * 1000:.1f} ms "
+          f"(1 open + 1 mmap, {loose_time / bundle_time:.1f}x)")
+    return bundle_time < loose_time
+
+
+def synthetic_wallpaper(width, height):
+    """Foto sintética grande: gradiente con ruido para que no comprima trivialmente"""
+    base = imagenes.linear_gradient(width, height, (30, 58, 138), (250, 200, 90), 'horizontal')
+    noise = Image.effect_noise((width, height), 40).convert('RGB')
+    return Image.blend(base, noise, 0.3)
+
+
+def peak_rss_kb():
+    """Pico de memoria residente de este proceso en KB
+
+    En Linux se lee VmHWM, que empieza de cero con el exec; ru_maxrss
+    arrastra el pico del proceso padre.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def wallpaper_case(mode, path, width, height):
+    """Proceso hijo: decodificar y ajustar un wallpaper midiendo tiempo y pico de RSS"""
+    rss_before = peak_rss_kb()
+    start = time.perf_counter()
+    if mode == 'full':
+        image = Image.open(path).convert('RGB')
+    else:
+        image = imagenes.open_reduced(path, (width, height))[0]
+    imagenes.fit_wallpaper(image, width, height)
+    elapsed = time.perf_counter() - start
+    rss_after = peak_rss_kb()
+    print(json.dumps({'seconds': elapsed, 'peak_rss_kb': rss_after - rss_before}))
+
+
+def bench_large_wallpaper(target=(1920, 1080)):
+    """Comparar la decodificación completa con la reducida en wallpapers 8K (JPEG) y 4K (PNG)
+
+    Cada caso corre en un proceso aparte para que el pico de RSS sea solo suyo.
+    """
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        sources = [('JPEG 7680x4320', os.path.join(directory, 'wallpaper.jpg')),
+                   ('PNG 3840x2160', os.path.join(directory, 'wallpaper.png'))]
+        photo = synthetic_wallpaper(7680, 4320)
+        photo.save(sources[0][1], quality=90)
+        photo.resize((3840, 2160)).save(sources[1][1], compress_level=1)
+        del photo
+
+        for label, path in sources:
+            results = {}
+            for mode in ('full', 'reduced'):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--wallpaper-case', mode, path, str(target[0]), str(target[1])],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                results[mode] = json.loads(output)
+
+            full, reduced = results['full'], results['reduced']
+            print(f"🌄 Wallpaper {label} -> {target[0]}x{target[1]}: "
+                  f"completa {full['seconds'] * 1000:.0f} ms / {full['peak_rss_kb'] / 1024:.0f} MB, "
+                  f"reducida {reduced['seconds'] * 1000:.0f} ms / {reduced['peak_rss_kb'] / 1024:.0f} MB")
+            ok = ok and reduced['seconds'] < full['seconds'] and reduced['peak_rss_kb'] <= full['peak_rss_kb']
+    return ok
+
+
+def main():
+    ok = bench_gradient()
+    ok = bench_radial_gradient() and ok
+    ok = bench_enhance() and ok
+    ok = bench_parallel_load() and ok
+    ok = bench_bundle() and ok
+    ok = bench_large_wallpaper() and ok
+    print("✅ Benchmarks superados" if ok else "❌ Algún benchmark no cumple el objetivo")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 6 and sys.argv[1] == '--wallpaper-case':
+        wallpaper_case(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]))
+        sys.exit(0)
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Cachés de imágenes derivadas del simulador"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from recursos import pil_image_bytes
+
+
+# Se incrementa cuando cambia el algoritmo de derivación (no sus parámetros)
+CACHE_FORMAT_VERSION = 2
+
+
+class IconDiskCache:
+    """Variantes procesadas de iconos guardadas como PNG en disco
+
+    Cada variante se identifica por la huella del archivo de origen (hash de
+    su contenido, validado con mtime y tamaño), el tamaño destino y los
+    parámetros de mejora. Si el origen cambia, sus variantes viejas se borran;
+    si cambian los parámetros de derivación ('params', p. ej. los presets de
+    mejora por clase), se borran al cargar el índice.
+    """
+
+    def __init__(self, directory='data/cache/icons', params=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / 'index.json'
+        self.params_fingerprint = hashlib.sha1(
+            json.dumps([CACHE_FORMAT_VERSION, params], sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        self.dirty = False
+        self.index = self._load_index()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()  # Se usa desde el hilo de Tk y desde el de carga
+
+    def _load_index(self):
+        """Cargar el índice origen -> huella y variantes, podando las de otros parámetros"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        for source_path, entry in list(index.items()):
+            if entry.get('params') != self.params_fingerprint:
+                self._remove_variants(entry.get('variants', []))
+                del index[source_path]
+                self.dirty = True
+        return index
+
+    def fingerprint(self, source_path):
+        """Hash del contenido del origen; solo se recalcula si cambian mtime o tamaño"""
+        with self.lock:
+            stat = os.stat(source_path)
+            entry = self.index.get(source_path)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                return entry['sha1']
+
+            with open(source_path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+
+            variants = []
+            if entry:
+                if entry['sha1'] == digest:
+                    variants = entry['variants']
+                else:
+                    self._remove_variants(entry['variants'])
+
+            self.index[source_path] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha1': digest,
+                'params': self.params_fingerprint,
+                'variants': variants
+            }
+            self.dirty = True
+            return digest
+
+    def _remove_variants(self, names):
+        """Borrar del disco variantes que ya no corresponden a su origen"""
+        for name in names:
+            try:
+                os.remove(self.directory / name)
+            except FileNotFoundError:
+                pass
+
+    def variant_name(self, source_path, target_size, params):
+        """Nombre de archivo de una variante (hash de todos los parámetros de la clave)"""
+        key = "|".join([
+            str(CACHE_FORMAT_VERSION),
+            source_path,
+            self.fingerprint(source_path),
+            f"{target_size[0]}x{target_size[1]}",
+            json.dumps(params, sort_keys=True)
+        ])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png'
+
+    def get(self, source_path, target_size, params):
+        """Devolver la variante cacheada o None si no existe o está dañada"""
+        name = self.variant_name(source_path, target_size, params)
+        try:
+            image = Image.open(self.directory / name)
+            image.load()
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return image
+
+    def put(self, source_path, target_size, params, image):
+        """Guardar una variante recién calculada (temporal y reemplazo atómico)
+
+        Un lector nunca ve un PNG a medias; el temporal lleva el id del hilo
+        porque dos hilos pueden guardar la misma variante a la vez.
+        """
+        name = self.variant_name(source_path, target_size, params)
+        path = self.directory / name
+        tmp_path = self.directory / f"{name}.{threading.get_ident()}.tmp"
+        try:
+            image.save(tmp_path, 'PNG')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar en caché {source_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self.lock:
+            variants = self.index[source_path]['variants']
+            if name not in variants:
+                variants.append(name)
+                self.dirty = True
+
+    def save(self):
+        """Escribir el índice si hubo cambios (reemplazo atómico)"""
+        with self.lock:
+            if not self.dirty:
+                return
+
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+
+
+class WallpaperCache:
+    """Wallpapers ya renderizados (PIL) por (nombre, ancho, alto) con expulsión LRU
+
+    'renderer(nombre, ancho, alto)' produce la imagen cuando falta; no debe
+    tocar Tk para poder usarse desde el hilo de pre-renderizado.
+    """
+
+    def __init__(self, renderer, max_entries=12, budget=None):
+        self.renderer = renderer
+        self.max_entries = max_entries
+        self.budget = budget  # MemoryBudget compartido (opcional)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.pending = OrderedDict()  # Combinaciones por pre-renderizar, en orden de llegada
+        self.prerender_thread = None
+
+    def get(self, name, width, height):
+        """Devolver el render cacheado (y marcarlo como reciente) o None"""
+        key = (name, width, height)
+        with self.lock:
+            image = self.entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        if self.budget:
+            self.budget.touch('wallpaper', key)
+        return image
+
+    def put(self, name, width, height, image):
+        """Guardar un render expulsando los menos usados si se supera el límite"""
+        key = (name, width, height)
+        with self.lock:
+            self.entries[key] = image
+            self.entries.move_to_end(key)
+            dropped = []
+            while len(self.entries) > self.max_entries:
+                dropped.append(self.entries.popitem(last=False)[0])
+
+        if self.budget:
+            for old_key in dropped:
+                self.budget.remove('wallpaper', old_key)
+            self.budget.add('wallpaper', key, pil_image_bytes(image), on_evict=lambda: self.discard(key))
+            self.budget.enforce()
+
+    def discard(self, key):
+        """Quitar un render (lo pide el presupuesto de memoria)"""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get_or_render(self, name, width, height):
+        """Render cacheado o uno nuevo calculado en el hilo actual"""
+        image = self.get(name, width, height)
+        if image is None:
+            image = self.renderer(name, width, height)
+            self.put(name, width, height, image)
+        return image
+
+    def prerender(self, names, sizes):
+        """Renderizar en un hilo de fondo las combinaciones que aún no estén en caché
+
+        Si el hilo ya está trabajando, las nuevas combinaciones se encolan y
+        las renderiza el mismo hilo al terminar las anteriores.
+        """
+        with self.lock:
+            for name in names:
+                for width, height in sizes:
+                    self.pending[(name, width, height)] = None
+            if self.prerender_thread is not None:
+                return
+            self.prerender_thread = threading.Thread(target=self._drain_pending, name="wallpaper-prerender", daemon=True)
+            thread = self.prerender_thread
+        thread.start()
+
+    def _drain_pending(self):
+        """Hilo de pre-renderizado: vaciar la cola y terminar"""
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.prerender_thread = None
+                    return
+                key = self.pending.popitem(last=False)[0]
+            if key in self:
+                continue
+            try:
+                self.put(*key, self.renderer(*key))
+            except Exception as e:
+                print(f"⚠️ No se pudo pre-renderizar el wallpaper {key[0]}: {e}")
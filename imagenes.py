@@ -0,0 +1,361 @@
+"""Motor de imágenes del simulador: operaciones en bloque sobre Pillow, sin Tk"""
+from functools import lru_cache
+
+from PIL import Image, ImageEnhance, ImageFilter
+
+
+GRADIENT_DIRECTIONS = ('vertical', 'horizontal', 'diagonal')
+
+# Presets de mejora: cada uno es una lista de pasos [operación, valor].
+# 'quality' aplica nitidez, contraste y SMOOTH_MORE en pasadas separadas;
+# 'fast' hace lo mismo en una convolución 5x5 y una tabla (ver _fused_enhance).
+# Forman parte de la clave de la caché en disco, así que cualquier cambio
+# invalida las variantes
+ENHANCE_PRESETS = {
+    'off': [],
+    'fast': [['fused', {'sharpness': 1.1, 'contrast': 1.05, 'smooth': 'SMOOTH_MORE'}]],
+    'quality': [['sharpness', 1.1], ['contrast', 1.05], ['filter', 'SMOOTH_MORE']]
+}
+ENHANCE_PARAMS = ENHANCE_PRESETS['quality']
+
+# Niveles de la pirámide de iconos, de mayor a menor
+ICON_PYRAMID_SIZES = (128, 64, 48, 32, 24, 20, 16)
+
+# Image.radial_gradient('L') vale d * sqrt(2): el borde del círculo inscrito
+# (d = 128) queda en este nivel
+_RADIAL_EDGE = 128 * 2 ** 0.5
+_RADIAL_FACTORS = [min(level / _RADIAL_EDGE, 1.0) for level in range(256)]
+
+
+def _gradient_strip(length, color1, color2):
+    """Calcular una tira RGB de 'length' píxeles entre dos colores"""
+    strip = bytearray(length * 3)
+    for i in range(length):
+        factor = i / length
+        strip[i * 3] = int(color1[0] * (1 - factor) + color2[0] * factor)
+        strip[i * 3 + 1] = int(color1[1] * (1 - factor) + color2[1] * factor)
+        strip[i * 3 + 2] = int(color1[2] * (1 - factor) + color2[2] * factor)
+    return bytes(strip)
+
+
+def linear_gradient(width, height, color1, color2, direction='vertical'):
+    """Crear un gradiente lineal RGB construyendo la imagen en bloque
+
+    Solo se calcula en Python una tira de una dimensión; Pillow la estira
+    (o la copia fila a fila en diagonal) sin recorrer píxel a píxel.
+    """
+    if direction == 'vertical':
+        strip = Image.frombytes('RGB', (1, height), _gradient_strip(height, color1, color2))
+        return strip.resize((width, height), Image.Resampling.NEAREST)
+
+    if direction == 'horizontal':
+        strip = Image.frombytes('RGB', (width, 1), _gradient_strip(width, color1, color2))
+        return strip.resize((width, height), Image.Resampling.NEAREST)
+
+    if direction == 'diagonal':
+        # El color depende de x + y: cada fila es un recorte desplazado de la tira
+        length = width + height
+        strip = Image.frombytes('RGB', (length, 1), _gradient_strip(length, color1, color2))
+        image = Image.new('RGB', (width, height))
+        for y in range(height):
+            image.paste(strip.crop((y, 0, y + width, 1)), (0, y))
+        return image
+
+    raise ValueError(f"Dirección de gradiente no válida: {direction}")
+
+
+@lru_cache(maxsize=64)
+def _radial_color_luts(color1, color2):
+    """Tabla RGB (3 x 256) que traduce nivel de distancia a color"""
+    lut = []
+    for c1, c2 in zip(color1[:3], color2[:3]):
+        lut.extend(int(c1 * (1 - factor) + c2 * factor) for factor in _RADIAL_FACTORS)
+    return tuple(lut)
+
+
+@lru_cache(maxsize=64)
+def _radial_alpha_lut(radius, antialias):
+    """Tabla de alfa para un radio dado, con el borde suavizado un píxel"""
+    if not antialias:
+        return tuple(255 if level <= _RADIAL_EDGE else 0 for level in range(256))
+
+    # Un píxel de la imagen final equivale a este número de niveles del mapa
+    pixel_levels = _RADIAL_EDGE / radius
+    return tuple(int(255 * min(max((_RADIAL_EDGE - level) / pixel_levels + 0.5, 0.0), 1.0))
+                 for level in range(256))
+
+
+@lru_cache(maxsize=64)
+def _radial_distance_map(size):
+    """Mapa de distancias (modo L) con el círculo inscrito centrado en 'size'"""
+    width, height = size
+    diameter = max(1, min(width, height) // 2 * 2)
+
+    distance = Image.radial_gradient('L').resize((diameter, diameter), Image.Resampling.BILINEAR)
+    if (diameter, diameter) != (width, height):
+        canvas = Image.new('L', (width, height), 255)
+        canvas.paste(distance, ((width - diameter) // 2, (height - diameter) // 2))
+        distance = canvas
+    return distance
+
+
+def radial_gradient(size, color1, color2, antialias=True):
+    """Crear un círculo RGBA con gradiente radial del centro (color1) al borde (color2)
+
+    El mapa de distancias sale de Image.radial_gradient escalado al radio y
+    los colores y el alfa se aplican con tablas (point), sin bucles por
+    píxel. Con 'antialias' el borde se suaviza a lo largo de un píxel.
+    """
+    size = tuple(size)
+    distance = _radial_distance_map(size)
+    radius = max(1, min(size) // 2)
+
+    rgb = Image.merge('RGB', (distance, distance, distance)).point(
+        list(_radial_color_luts(tuple(color1), tuple(color2))))
+    alpha = distance.point(list(_radial_alpha_lut(radius, antialias)))
+
+    image = rgb.convert('RGBA')
+    image.putalpha(alpha)
+    return image
+
+
+def progressive_resize(image, target_size):
+    """Redimensionamiento progresivo para mejor calidad"""
+    current_size = image.size
+    target_width, target_height = target_size
+
+    if current_size[0] > target_width * 2 or current_size[1] > target_height * 2:
+        intermediate_size = (target_width * 2, target_height * 2)
+        image = image.resize(intermediate_size, Image.Resampling.LANCZOS)
+
+    return image.resize(target_size, Image.Resampling.LANCZOS)
+
+
+# Núcleo de ImageFilter.SMOOTH, con el que ImageEnhance.Sharpness calcula su versión degradada
+_SMOOTH_KERNEL = (1, 1, 1, 1, 5, 1, 1, 1, 1)
+
+
+def _convolve(outer, inner, outer_size, inner_size):
+    """Convolución de dos núcleos cuadrados, recortada al tamaño de 'outer'"""
+    result = [0.0] * (outer_size * outer_size)
+    radius = inner_size // 2
+    for y in range(outer_size):
+        for x in range(outer_size):
+            total = 0.0
+            for j in range(inner_size):
+                for i in range(inner_size):
+                    oy, ox = y + j - radius, x + i - radius
+                    if 0 <= oy < outer_size and 0 <= ox < outer_size:
+                        total += outer[oy * outer_size + ox] * inner[j * inner_size + i]
+            result[y * outer_size + x] = total
+    return result
+
+
+@lru_cache(maxsize=16)
+def _fused_kernel(sharpness, smooth):
+    """Núcleo 5x5 equivalente a Sharpness(sharpness) seguido del filtro 'smooth'
+
+    La nitidez es una mezcla lineal entre la imagen y su versión SMOOTH, es
+    decir, otra convolución 3x3; se combina con el núcleo del filtro y se
+    recorta a 5x5 (el anillo exterior del 7x7 pesa menos de 0,0001).
+    """
+    smooth_total = sum(_SMOOTH_KERNEL)
+    sharpen = [(1 - sharpness) * weight / smooth_total for weight in _SMOOTH_KERNEL]
+    sharpen[4] += sharpness
+
+    if smooth:
+        kernel_filter = getattr(ImageFilter, smooth)
+        size = kernel_filter.filterargs[0][0]
+        weights = [weight / kernel_filter.filterargs[1] for weight in kernel_filter.filterargs[3]]
+        combined = _convolve(weights, sharpen, size, 3) if size >= 3 else sharpen
+    else:
+        size, combined = 3, sharpen
+
+    if size not in (3, 5):
+        raise ValueError(f"Filtro no combinable: {smooth}")
+    total = sum(combined)
+    return ImageFilter.Kernel((size, size), [weight / total for weight in combined], scale=1)
+
+
+def _contrast_lut(image, contrast):
+    """Tabla de ImageEnhance.Contrast: la media de gris sale del histograma, sin convertir la imagen"""
+    histogram = image.histogram()
+    bands = image.getbands()
+    pixels = image.size[0] * image.size[1] or 1
+    band_means = [sum(level * count for level, count in enumerate(histogram[i * 256:(i + 1) * 256])) / pixels
+                  for i in range(len(bands))]
+    if len(bands) >= 3:
+        mean = 0.299 * band_means[0] + 0.587 * band_means[1] + 0.114 * band_means[2]
+    else:
+        mean = band_means[0]
+    mean = int(mean + 0.5)
+
+    curve = [min(255, max(0, int(mean + contrast * (level - mean) + 0.5))) for level in range(256)]
+    identity = list(range(256))
+    return [value for band in bands for value in (identity if band == 'A' else curve)]
+
+
+def _fused_enhance(image, params):
+    """Nitidez, contraste y suavizado en una convolución y una pasada de tabla
+
+    El contraste es una operación lineal por píxel que conmuta con un núcleo
+    normalizado, así que puede aplicarse al final con point().
+    """
+    kernel = _fused_kernel(params['sharpness'], params.get('smooth'))
+    lut = _contrast_lut(image, params['contrast'])
+    return image.filter(kernel).point(lut)
+
+
+def enhance_image(image, params=ENHANCE_PARAMS):
+    """Mejorar la calidad de la imagen aplicando los pasos de un preset
+
+    Con params=None o una lista vacía se devuelve la imagen sin tocar.
+    """
+    try:
+        for operation, value in params or ():
+            if operation == 'fused':
+                image = _fused_enhance(image, value)
+            elif operation == 'sharpness':
+                image = ImageEnhance.Sharpness(image).enhance(value)
+            elif operation == 'contrast':
+                image = ImageEnhance.Contrast(image).enhance(value)
+            elif operation == 'filter':
+                image = image.filter(getattr(ImageFilter, value))
+            else:
+                raise ValueError(f"Paso de mejora desconocido: {operation}")
+    except Exception as e:
+        print(f"⚠️ Error mejorando calidad: {e}")
+
+    return image
+
+
+def derive_variant(image, target_size, params=ENHANCE_PARAMS):
+    """Variante redimensionada y mejorada de una imagen original"""
+    return enhance_image(progressive_resize(image, target_size), params)
+
+
+def build_icon_pyramid(image, sizes=ICON_PYRAMID_SIZES, params=ENHANCE_PARAMS):
+    """Generar todos los niveles de un icono en una pasada: tamaño -> imagen
+
+    Cada nivel se remuestrea desde el nivel sin mejorar inmediatamente
+    superior (el primero desde el original) y la mejora se aplica a cada
+    salida por separado, para que el enfoque no se acumule entre niveles.
+    """
+    pyramid = {}
+    level = image
+    for size in sorted(sizes, reverse=True):
+        level = progressive_resize(level, (size, size))
+        pyramid[size] = enhance_image(level, params)
+    return pyramid
+
+
+def compose_sheet(tiles, size):
+    """Componer una hoja RGBA transparente pegando cada (imagen, (x, y)) de 'tiles'"""
+    sheet = Image.new('RGBA', size, (0, 0, 0, 0))
+    for image, position in tiles:
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        sheet.paste(image, position)
+    return sheet
+
+
+def fit_wallpaper(image, target_width, target_height, params=ENHANCE_PARAMS,
+                  resample=Image.Resampling.LANCZOS):
+    """Escalar, recortar o centrar un wallpaper RGB para cubrir el tamaño destino
+
+    Con params=None (o el preset 'off') no se aplica la mejora final y con un 'resample' distinto
+    de LANCZOS se escala en un solo paso (vista previa rápida).
+    """
+    # Obtener dimensiones originales
+    orig_width, orig_height = image.size
+
+    # Calcular escala para cubrir completamente la pantalla
+    scale = max(target_width / orig_width, target_height / orig_height)
+
+    # Nuevas dimensiones
+    new_width = int(orig_width * scale)
+    new_height = int(orig_height * scale)
+
+    # Redimensionar con alta calidad
+    if scale != 1.0:
+        if scale < 0.5 and resample == Image.Resampling.LANCZOS:
+            # Si se reduce mucho, hacer en pasos
+            intermediate_width = int(orig_width * scale * 2)
+            intermediate_height = int(orig_height * scale * 2)
+            image = image.resize((intermediate_width, intermediate_height), Image.Resampling.LANCZOS)
+
+        image = image.resize((new_width, new_height), resample)
+
+    # Recortar si es necesario para ajustar exactamente
+    if new_width > target_width or new_height > target_height:
+        left = (new_width - target_width) // 2
+        top = (new_height - target_height) // 2
+        image = image.crop((left, top, left + target_width, top + target_height))
+
+    # Si la imagen es más pequeña, centrarla en un fondo
+    elif new_width < target_width or new_height < target_height:
+        background = Image.new('RGB', (target_width, target_height), (30, 58, 138))
+        background.paste(image, ((target_width - new_width) // 2, (target_height - new_height) // 2))
+        image = background
+
+    # Mejorar calidad final
+    return enhance_image(image, params)
+
+
+def reduction_factor(source_size, target_size):
+    """Mayor factor entero de reducción con el que la imagen aún cubre el destino"""
+    return max(1, int(min(source_size[0] / target_size[0], source_size[1] / target_size[1])))
+
+
+def reduce_to_cover(image, target_size):
+    """Reducir con Image.reduce (media por bloques) sin dejar de cubrir el destino"""
+    factor = reduction_factor(image.size, target_size)
+    if factor < 2:
+        return image
+    return image.reduce(factor)
+
+
+def open_reduced(path, target_size=None):
+    """Decodificar en RGB a la menor resolución que aún cubre 'target_size'
+
+    Con JPEG, draft() hace que el decodificador entregue directamente 1/2,
+    1/4 u 1/8 de la imagen; el resto de formatos se decodifican enteros y se
+    reducen después con reduce(). Devuelve (imagen, tamaño original, factor
+    máximo pedido); sin 'target_size' se decodifica a resolución completa.
+    """
+    image = Image.open(path)
+    source_size = image.size
+    factor = 1 if target_size is None else reduction_factor(source_size, target_size)
+
+    if factor > 1 and image.format == 'JPEG':
+        image.draft('RGB', (-(-source_size[0] // factor), -(-source_size[1] // factor)))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.load()
+
+    if factor > 1:
+        image = reduce_to_cover(image, target_size)
+    return image, source_size, factor
+
+
+def reduce_for_preview(image, max_side=960):
+    """Copia de resolución media con Image.reduce (factor entero, muy barato)"""
+    factor = max(image.size) // max_side
+    if factor < 2:
+        return image
+    return image.reduce(factor)
+
+
+def placeholder_wallpaper(width, height, wallpaper_type):
+    """Wallpaper de respaldo: gradiente con los colores del tipo de usuario"""
+    if 'admin' in wallpaper_type:
+        color1 = (30, 58, 138)
+        color2 = (59, 130, 246)
+    elif 'user' in wallpaper_type:
+        color1 = (34, 197, 94)
+        color2 = (16, 185, 129)
+    else:
+        color1 = (88, 28, 135)
+        color2 = (147, 51, 234)
+
+    return linear_gradient(width, height, color1, color2)
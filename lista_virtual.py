@@ -0,0 +1,478 @@
+"""Listas Treeview que solo tocan lo que cambia
+
+FileListModel mantiene el orden del gestor de archivos (filtrado por
+categoría y ordenado por una columna) como una lista de (clave de orden,
+clave) que se actualiza con bisect en cada operación del núcleo, sin
+reordenar todo. VirtualTreeview pinta solo las filas que caben en pantalla,
+así que la memoria de Tk no depende del número de archivos. TreeReconciler
+lleva un Treeview de un estado al siguiente con las mínimas inserciones,
+cambios, movimientos y borrados, conservando selección y desplazamiento.
+"""
+import bisect
+import functools
+import itertools
+from tkinter import ttk
+
+from nucleo import parse_file_size
+
+
+# Filas que se piden de más por encima y por debajo de la ventana visible
+BUFFER_ROWS = 20
+# Filas por vuelta de la rueda del ratón
+WHEEL_ROWS = 3
+# Medidas supuestas hasta que Tk pinta la primera fila y se pueden medir
+DEFAULT_ROW_HEIGHT = 20
+DEFAULT_HEADING_HEIGHT = 25
+
+
+@functools.lru_cache(maxsize=65536)
+def _sortable_date(date):
+    """'dd/mm/aaaa HH:MM' -> 'aaaammdd HH:MM' (muchas fechas se repiten: se memoriza)"""
+    return date[6:10] + date[3:5] + date[0:2] + date[10:]
+
+
+# Columna del Treeview -> clave de orden de un registro ('#0' es la columna del nombre)
+SORT_KEYS = {
+    '#0': lambda info: info['name'].casefold(),
+    'Tipo': lambda info: info['type'],
+    'Tamaño': lambda info: info.get('bytes') or parse_file_size(info.get('size')),
+    'Fecha': lambda info: _sortable_date(info['date'])
+}
+
+
+class FileListModel:
+    """Archivos de una categoría en el orden de una columna, mantenidos incrementalmente
+
+    Sin columna de orden se conserva el orden de creación (el de files_data).
+    El orden se construye la primera vez que se consulta; después cada
+    operación del núcleo lo corrige con bisect (O(log n) para localizar más
+    el desplazamiento de la lista) en lugar de reordenar. Invertir el orden
+    no reordena: solo cambia cómo se indexa.
+    """
+
+    def __init__(self, core):
+        self.core = core
+        self.category = "all"
+        self.column = None
+        self.reverse = False
+        self.order = None  # [(clave de orden, clave)] ascendente; None = por construir
+        self.creation = {}  # clave -> secuencia, solo en orden de creación (no se deduce del registro)
+        self.sequence = itertools.count()
+        self.version = 0  # Cambia con cada modificación del contenido o del orden
+        core.observe_files(self.apply)
+
+    def set_view(self, category=None, column=None, reverse=False):
+        """Cambiar el filtro y el orden; se reconstruye solo si cambió la categoría o la columna"""
+        category = self.category if category is None else category
+        if (category, column) != (self.category, self.column):
+            self.category, self.column = category, column
+            self.invalidate()
+        if reverse != self.reverse:
+            self.reverse = reverse
+            self.version += 1
+
+    def invalidate(self):
+        self.order = None
+        self.creation = {}
+        self.version += 1
+
+    def _ensure(self):
+        if self.order is None:
+            files = self.core.iter_files(self.category)
+            if self.column is None:
+                self.order = [(next(self.sequence), key) for key, _ in files]
+                self.creation = {key: position for position, key in self.order}
+            else:
+                sort_key = SORT_KEYS[self.column]
+                self.order = sorted((sort_key(info), key) for key, info in files)
+        return self.order
+
+    def _sort_key(self, key, info):
+        """Clave de orden de un archivo de la vista, o None si no pertenece a ella"""
+        if info is None or (self.category != "all" and info['category'] != self.category):
+            return None
+        if self.column is None:
+            return self.creation.get(key)
+        return SORT_KEYS[self.column](info)
+
+    def __len__(self):
+        return len(self._ensure())
+
+    def __contains__(self, key):
+        return self.index_of(key) is not None
+
+    def rows(self, start, stop):
+        """(clave, registro) de las filas [start, stop) en el orden visible"""
+        order = self._ensure()
+        total = len(order)
+        start, stop = max(0, start), min(stop, total)
+        if start >= stop:
+            return []
+        if self.reverse:
+            entries = order[total - stop:total - start][::-1]
+        else:
+            entries = order[start:stop]
+        files_data = self.core.files_data
+        return [(key, files_data[key]) for _, key in entries]
+
+    def _position(self, key, info):
+        sort_key = self._sort_key(key, info)
+        if sort_key is None:
+            return None
+        index = bisect.bisect_left(self.order, (sort_key, key))
+        if index < len(self.order) and self.order[index][1] == key:
+            return index
+        return None
+
+    def index_of(self, key):
+        """Posición visible de un archivo o None"""
+        self._ensure()
+        index = self._position(key, self.core.files_data.get(key))
+        if index is None:
+            return None
+        return len(self.order) - 1 - index if self.reverse else index
+
+    def _insert(self, key, info):
+        if self.category != "all" and info['category'] != self.category:
+            return
+        if self.column is None:
+            self.creation[key] = next(self.sequence)
+        bisect.insort(self.order, (self._sort_key(key, info), key))
+
+    def _discard(self, key):
+        """Quitar un archivo según su registro actual (antes de que cambie)"""
+        index = self._position(key, self.core.files_data.get(key))
+        if index is not None:
+            del self.order[index]
+            self.creation.pop(key, None)
+
+    def apply(self, record):
+        """Incorporar una operación del núcleo; se llama antes de aplicarla a files_data"""
+        if self.order is None:
+            return
+        operation, key = record['op'], record['key']
+        if operation == 'create':
+            self._discard(key)
+            self._insert(key, record['value'])
+        elif operation == 'rename':
+            self._discard(key)
+            self._discard(record['new_key'])
+            self._insert(record['new_key'], record['value'])
+        elif operation == 'update':
+            # Sin columna de orden la posición no cambia; con ella puede moverse (fecha, tamaño)
+            if self.column is not None:
+                info = self.core.files_data.get(key)
+                if self._position(key, info) is not None:
+                    self._discard(key)
+                    self._insert(key, dict(info, **record['fields']))
+        elif operation == 'delete':
+            self._discard(key)
+        self.version += 1
+
+
+def _longest_increasing_run(positions):
+    """Índices de una subsecuencia creciente más larga de 'positions' (O(n log n))"""
+    tails = []  # tails[k]: índice donde acaba la mejor subsecuencia de longitud k+1
+    tail_positions = []  # positions[tails[k]], para buscar con bisect
+    previous = [None] * len(positions)
+    for index, position in enumerate(positions):
+        k = bisect.bisect_left(tail_positions, position)
+        if k:
+            previous[index] = tails[k - 1]
+        if k == len(tails):
+            tails.append(index)
+            tail_positions.append(position)
+        else:
+            tails[k] = index
+            tail_positions[k] = position
+    run = []
+    index = tails[-1] if tails else None
+    while index is not None:
+        run.append(index)
+        index = previous[index]
+    return set(run)
+
+
+class TreeReconciler:
+    """Sincroniza las filas de primer nivel de un Treeview con una lista de (id, opciones)
+
+    Las filas se identifican por su id (la clave del archivo o el nombre del
+    programa). sync() borra las que sobran, inserta las nuevas, reconfigura
+    solo las que cambiaron y mueve las mínimas para el nuevo orden (las que
+    quedan fuera de la subsecuencia más larga que ya estaba en orden). Supone
+    que nadie más añade o quita filas del árbol.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.order = []  # ids en el orden en que están en el árbol
+        self.options = {}  # id -> opciones con las que se pintó
+        self.last = {'inserts': 0, 'updates': 0, 'moves': 0, 'deletes': 0, 'tk_calls': 0}
+        self.total_tk_calls = 0
+
+    def sync(self, rows):
+        """Llevar el árbol a 'rows' ([(id, opciones de item)]); devuelve el recuento de cambios"""
+        stats = {'inserts': 0, 'updates': 0, 'moves': 0, 'deletes': 0, 'tk_calls': 0}
+        new_ids = [iid for iid, _ in rows]
+        wanted = set(new_ids)
+
+        removed = [iid for iid in self.order if iid not in wanted]
+        if removed:
+            self.tree.delete(*removed)
+            stats['tk_calls'] += 1
+            stats['deletes'] = len(removed)
+            for iid in removed:
+                del self.options[iid]
+        kept = [iid for iid in self.order if iid in wanted]
+
+        # Las filas que ya seguían el nuevo orden se quedan; el resto se desengancha y se recoloca
+        old_positions = {iid: position for position, iid in enumerate(kept)}
+        existing = [index for index, iid in enumerate(new_ids) if iid in old_positions]
+        anchored = _longest_increasing_run([old_positions[new_ids[index]] for index in existing])
+        anchored = {new_ids[existing[index]] for index in anchored}
+        displaced = [iid for iid in kept if iid not in anchored]
+        selection = ()
+        if displaced:
+            selection = self.tree.selection()
+            self.tree.detach(*displaced)
+            stats['tk_calls'] += 2
+
+        for index, (iid, options) in enumerate(rows):
+            if iid not in self.options:
+                self.tree.insert("", index, iid=iid, **options)
+                stats['inserts'] += 1
+                stats['tk_calls'] += 1
+            else:
+                if iid not in anchored:
+                    self.tree.move(iid, "", index)
+                    stats['moves'] += 1
+                    stats['tk_calls'] += 1
+                if self.options[iid] != options:
+                    changed = {name: value for name, value in options.items() if self.options[iid].get(name) != value}
+                    self.tree.item(iid, **changed)
+                    stats['updates'] += 1
+                    stats['tk_calls'] += 1
+            self.options[iid] = options
+        self.order = new_ids
+
+        # Desenganchar puede quitar filas de la selección: devolverles la que tenían
+        kept_selection = tuple(iid for iid in selection if iid in wanted)
+        if kept_selection:
+            stats['tk_calls'] += 1
+            if tuple(self.tree.selection()) != kept_selection:
+                self.tree.selection_set(kept_selection)
+                stats['tk_calls'] += 1
+
+        self.last = stats
+        self.total_tk_calls += stats['tk_calls']
+        return stats
+
+    def reset(self):
+        """Olvidar el estado (el árbol se vació o se recreó)"""
+        self.order = []
+        self.options = {}
+
+
+class VirtualTreeview:
+    """Treeview con barra de desplazamiento propia que solo pinta la parte visible
+
+    'columns' es una lista de (id, título, ancho) empezando por '#0';
+    'render_row(clave, registro)' devuelve (texto, valores) de una fila. Las
+    filas pintadas son items con la clave del archivo como id, reconciliados
+    con TreeReconciler: desplazar una fila cuesta un borrado y una inserción.
+    La selección se guarda por clave para que sobreviva al desplazamiento.
+    """
+
+    def __init__(self, parent, model, columns, render_row, buffer_rows=BUFFER_ROWS):
+        self.model = model
+        self.columns = columns
+        self.render_row = render_row
+        self.buffer_rows = buffer_rows
+        self.tree = ttk.Treeview(parent, columns=[column for column, _, _ in columns[1:]],
+                                 show="tree headings", selectmode="browse")
+        for column, title, width in columns:
+            self.tree.heading(column, text=title, command=lambda column=column: self.sort_by(column))
+            self.tree.column(column, width=width)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+
+        self.top = 0
+        self.visible_rows = 1
+        self.row_height = None
+        self.heading_height = DEFAULT_HEADING_HEIGHT
+        self.reconciler = TreeReconciler(self.tree)
+        self.page = None  # (versión, inicio, filas) pedidas al modelo, con margen
+        self.selected_key = None
+        self.rendered_selection = ()
+        self.render_pending = False
+
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", self.on_wheel)
+        self.tree.bind("<Button-5>", self.on_wheel)
+        for keysym in ("Up", "Down", "Prior", "Next", "Home", "End"):
+            self.tree.bind(f"<{keysym}>", self.on_key)
+
+    def pack(self):
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def bind(self, sequence, callback):
+        self.tree.bind(sequence, callback, add="+")
+
+    # ==================== DATOS ====================
+
+    def refresh(self):
+        """Volver a pintar la ventana visible (los datos del modelo cambiaron)"""
+        self.schedule_render()
+
+    def set_category(self, category):
+        self.model.set_view(category=category, column=self.model.column, reverse=self.model.reverse)
+        self.build_order()
+        self.top = 0
+        self.schedule_render()
+
+    def sort_by(self, column):
+        """Ordenar por una columna; la segunda vez invierte el orden"""
+        reverse = not self.model.reverse if column == self.model.column else False
+        self.model.set_view(column=column, reverse=reverse)
+        self.build_order()
+        for other, title, _ in self.columns:
+            arrow = (" ▼" if reverse else " ▲") if other == column else ""
+            self.tree.heading(other, text=title + arrow)
+        # Mantener a la vista el archivo seleccionado, si lo hay
+        index = self.model.index_of(self.selected_key) if self.selected_key else None
+        self.top = 0 if index is None else max(0, index - self.visible_rows // 2)
+        self.schedule_render()
+
+    def build_order(self):
+        """Construir ya el orden del modelo, con cursor de espera (ordenar 1M de filas tarda)"""
+        self.tree.configure(cursor="watch")
+        self.tree.update_idletasks()
+        try:
+            len(self.model)
+        finally:
+            self.tree.configure(cursor="")
+
+    def selected(self):
+        """Clave del archivo seleccionado (aunque no esté a la vista) o None"""
+        if self.selected_key is not None and self.selected_key in self.model:
+            return self.selected_key
+        return None
+
+    def _rows(self, start, stop, total):
+        """Filas de la ventana visible, servidas desde la página con margen si la cubre"""
+        stop = min(stop, total)
+        if self.page is not None:
+            page_version, page_start, rows = self.page
+            if (page_version == self.model.version and page_start <= start
+                    and stop <= page_start + len(rows)):
+                return rows[start - page_start:stop - page_start]
+        page_start = max(0, start - self.buffer_rows)
+        rows = self.model.rows(page_start, stop + self.buffer_rows)
+        self.page = (self.model.version, page_start, rows)
+        return rows[start - page_start:stop - page_start]
+
+    # ==================== PINTADO ====================
+
+    def schedule_render(self):
+        # Varios eventos de desplazamiento en el mismo ciclo se pintan una sola vez
+        if not self.render_pending:
+            self.render_pending = True
+            self.tree.after_idle(self.render)
+
+    def render(self):
+        self.render_pending = False
+        if not self.tree.winfo_exists():
+            return
+        total = len(self.model)
+        self.top = max(0, min(self.top, total - self.visible_rows))
+        rows = self._rows(self.top, self.top + self.visible_rows, total)
+
+        visible = []
+        for key, info in rows:
+            text, values = self.render_row(key, info)
+            visible.append((key, {'text': text, 'values': tuple(values)}))
+        self.reconciler.sync(visible)
+
+        selected = (self.selected_key,) if any(key == self.selected_key for key, _ in rows) else ()
+        self.rendered_selection = selected
+        if tuple(self.tree.selection()) != selected:
+            self.tree.selection_set(selected)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+        if self.row_height is None and self.reconciler.order:
+            self.measure_rows()
+
+    def measure_rows(self):
+        """Alto real de fila y de cabecera, medidos sobre la primera fila"""
+        bbox = self.tree.bbox(self.reconciler.order[0])
+        if bbox:
+            self.heading_height, self.row_height = bbox[1], bbox[3]
+            self.update_visible_rows(self.tree.winfo_height())
+
+    def update_visible_rows(self, height):
+        row_height = self.row_height or DEFAULT_ROW_HEIGHT
+        visible_rows = max(1, (height - self.heading_height) // row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.schedule_render()
+
+    # ==================== EVENTOS ====================
+
+    def on_configure(self, event):
+        self.update_visible_rows(event.height)
+
+    def yview(self, *args):
+        """Comando de la barra: 'moveto fracción' o 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.model))
+        elif args[0] == 'scroll':
+            step = self.visible_rows if args[2] == 'pages' else 1
+            self.top += int(args[1]) * step
+        self.schedule_render()
+
+    def on_wheel(self, event):
+        if event.num == 4:
+            direction = -1
+        elif event.num == 5:
+            direction = 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self.top += direction * WHEEL_ROWS
+        self.schedule_render()
+        return "break"
+
+    def on_select(self, event):
+        keys = tuple(self.tree.selection())
+        if keys == self.rendered_selection:
+            return  # La cambió render(), no el usuario
+        self.rendered_selection = keys
+        self.selected_key = keys[0] if keys else None
+
+    def on_key(self, event):
+        """Mover la selección por toda la lista, no solo por las filas pintadas"""
+        total = len(self.model)
+        if not total:
+            return "break"
+        current = self.model.index_of(self.selected_key) if self.selected_key else None
+        if current is None:
+            current = self.top - 1 if event.keysym != "Up" else self.top + 1
+        moves = {"Up": -1, "Down": 1, "Prior": -self.visible_rows, "Next": self.visible_rows}
+        if event.keysym == "Home":
+            index = 0
+        elif event.keysym == "End":
+            index = total - 1
+        else:
+            index = max(0, min(total - 1, current + moves[event.keysym]))
+        self.selected_key = self.model.rows(index, index + 1)[0][0]
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.visible_rows:
+            self.top = index - self.visible_rows + 1
+        self.schedule_render()
+        return "break"
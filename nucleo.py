@@ -0,0 +1,802 @@
+"""Núcleo del simulador sin interfaz: usuarios, archivos, programas, chat, música e instalaciones
+
+SimuladorSO (Tk) es una vista sobre este núcleo; simulador_headless.py lo
+usa directamente para benchmarks y pruebas de carga sin pantalla. Los
+temporizadores (guardado diferido, respuestas del chat) se piden a un
+'scheduler' con after/after_cancel: la ventana Tk o un HeadlessScheduler.
+"""
+import datetime
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from almacen_sqlite import SqliteFileMap, SqliteStore
+from perfil_arranque import StartupProfiler
+from persistencia import (FileCatalog, FileJournal, WriteBehindStore, content_fingerprint, load_json_store,
+                          snapshot)
+
+
+# Motor de almacenamiento de usuarios, archivos y programas: 'json' (data/*/*.json) o 'sqlite' (data/simulador.db)
+STORAGE_ENGINE = os.environ.get('SIMULADOR_STORAGE', 'json')
+
+# Catálogo de programas incluido. PROGRAM_CATALOG_VERSION se incrementa con cualquier cambio
+# en las entradas y PROGRAM_SCHEMA_VERSION con cambios en el formato guardado
+PROGRAM_SCHEMA_VERSION = 1
+PROGRAM_CATALOG_VERSION = 1
+
+# Campos con el estado de cada instalación: el catálogo solo los fija en programas nuevos
+PROGRAM_USER_FIELDS = ('installed', 'version')
+
+PROGRAM_CATALOG = {
+    # Aplicaciones principales instaladas (con funcionalidad completa)
+    "WhatsApp": {"version": "2.23.1", "installed": True, "size": "150 MB", "icon": "whatsapp", "uninstallable": True},
+    "Spotify": {"version": "1.2.13", "installed": True, "size": "280 MB", "icon": "spotify", "uninstallable": True},
+    "Chrome": {"version": "120.0", "installed": True, "size": "200 MB", "icon": "chrome", "uninstallable": True},
+
+    # Utilerías del sistema (NO desinstalables, siempre funcionales)
+    "Calculadora": {"version": "1.0", "installed": True, "size": "5 MB", "icon": "calculator", "uninstallable": False},
+    "Calendario": {"version": "1.0", "installed": True, "size": "8 MB", "icon": "calendar", "uninstallable": False},
+    "Bloc de Notas": {"version": "1.0", "installed": True, "size": "2 MB", "icon": "notepad", "uninstallable": False},
+    "Explorador de Archivos": {"version": "1.0", "installed": True, "size": "25 MB", "icon": "files", "uninstallable": False},
+    "Gestor de Programas": {"version": "1.0", "installed": True, "size": "12 MB", "icon": "programs", "uninstallable": False},
+    "Monitor Sistema": {"version": "1.0", "installed": True, "size": "8 MB", "icon": "utilities", "uninstallable": False},
+
+    # TODOS los programas adicionales (NO INSTALADOS inicialmente)
+    "Word": {"version": "16.0", "installed": False, "size": "1.2 GB", "icon": "word", "uninstallable": True},
+    "Excel": {"version": "16.0", "installed": False, "size": "1.1 GB", "icon": "excel", "uninstallable": True},
+    "PowerPoint": {"version": "16.0", "installed": False, "size": "1.0 GB", "icon": "powerpoint", "uninstallable": True},
+    "Photoshop": {"version": "24.0", "installed": False, "size": "2.8 GB", "icon": "photoshop", "uninstallable": True},
+    "Discord": {"version": "1.0.9", "installed": False, "size": "120 MB", "icon": "discord", "uninstallable": True},
+    "Steam": {"version": "3.4.1", "installed": False, "size": "1.5 GB", "icon": "steam", "uninstallable": True},
+    "Zoom": {"version": "5.16.2", "installed": False, "size": "180 MB", "icon": "zoom", "uninstallable": True},
+    "VLC Media Player": {"version": "3.0.18", "installed": False, "size": "95 MB", "icon": "vlc", "uninstallable": True},
+    "Telegram": {"version": "4.9.3", "installed": False, "size": "85 MB", "icon": "telegram", "uninstallable": True},
+    "Netflix": {"version": "6.98.1", "installed": False, "size": "150 MB", "icon": "netflix", "uninstallable": True},
+    "Visual Studio Code": {"version": "1.84.2", "installed": False, "size": "350 MB", "icon": "vscode", "uninstallable": True},
+    "Skype": {"version": "8.98.0", "installed": False, "size": "75 MB", "icon": "skype", "uninstallable": True},
+    "Adobe Illustrator": {"version": "28.0", "installed": False, "size": "2.2 GB", "icon": "adobe", "uninstallable": True},
+    "Outlook": {"version": "16.0", "installed": False, "size": "800 MB", "icon": "outlook", "uninstallable": True}
+}
+
+# Utilerías críticas que no se pueden desinstalar
+SYSTEM_UTILITIES = ["Calculadora", "Calendario", "Bloc de Notas", "Explorador de Archivos", "Gestor de Programas", "Monitor Sistema"]
+
+# Pasos (progreso, estado) de cada tipo de trabajo sobre un programa
+JOB_STEPS = {
+    'install': [
+        (10, "Verificando requisitos del sistema..."),
+        (25, "Descargando archivos principales..."),
+        (40, "Descargando dependencias..."),
+        (55, "Verificando integridad de archivos..."),
+        (70, "Extrayendo archivos..."),
+        (85, "Configurando programa..."),
+        (95, "Registrando en el sistema..."),
+        (100, "¡Instalación completada exitosamente!")
+    ],
+    'update': [
+        (20, "Descargando actualización..."),
+        (50, "Aplicando parches..."),
+        (80, "Configurando nueva versión..."),
+        (100, "Actualización completada")
+    ],
+    'uninstall': [
+        (25, "Cerrando procesos del programa..."),
+        (50, "Eliminando archivos..."),
+        (75, "Limpiando registro del sistema..."),
+        (100, "Desinstalación completada")
+    ]
+}
+
+INITIAL_FILES = [
+    {"name": "Bienvenida.txt", "type": "Documento", "size": "2 KB", "category": "documents", "content": "¡Bienvenido al sistema operativo simulado!\n\nEste es un archivo de ejemplo que puedes editar."},
+    {"name": "Notas.txt", "type": "Documento", "size": "1 KB", "category": "documents", "content": "Mis notas importantes:\n- Recordar actualizar el sistema\n- Revisar correos"},
+    {"name": "Imagen1.jpg", "type": "Imagen", "size": "1.2 MB", "category": "images", "content": ""},
+    {"name": "Cancion.mp3", "type": "Audio", "size": "3.5 MB", "category": "music", "content": ""},
+    {"name": "Video.mp4", "type": "Video", "size": "15 MB", "category": "videos", "content": ""}
+]
+
+INITIAL_MESSAGES = [
+    {"sender": "Contacto", "message": "¡Hola! ¿Cómo estás?", "time": "10:30"},
+    {"sender": "Tú", "message": "¡Hola! Todo bien, gracias", "time": "10:31"},
+    {"sender": "Contacto", "message": "¿Qué tal el trabajo?", "time": "10:32"},
+    {"sender": "Tú", "message": "Muy bien, trabajando", "time": "10:33"}
+]
+
+CONTACT_RESPONSES = [
+    "¡Interesante! 🤔",
+    "Entiendo perfectamente 👍",
+    "¿En serio? ¡Qué genial! 😄",
+    "Tienes razón 💯",
+    "Cuéntame más sobre eso 🤗",
+    "¡Excelente punto! ✨",
+    "Me parece muy bien 👌"
+]
+
+# Espera antes de la respuesta automática del contacto
+CHAT_REPLY_DELAY_MS = 2000
+
+INITIAL_SONGS = [
+    {"title": "Bohemian Rhapsody", "artist": "Queen", "duration": "5:55", "playing": False},
+    {"title": "Imagine", "artist": "John Lennon", "duration": "3:07", "playing": False},
+    {"title": "Hotel California", "artist": "Eagles", "duration": "6:30", "playing": False},
+    {"title": "Stairway to Heaven", "artist": "Led Zeppelin", "duration": "8:02", "playing": False},
+    {"title": "Sweet Child O' Mine", "artist": "Guns N' Roses", "duration": "5:03", "playing": False}
+]
+
+
+class CoreError(Exception):
+    """Operación rechazada por el núcleo; el mensaje se puede mostrar tal cual"""
+
+
+def merge_program_catalog(programs, catalog=PROGRAM_CATALOG):
+    """Incorporar al estado guardado las entradas nuevas o cambiadas del catálogo
+
+    Conserva los campos de instalación (PROGRAM_USER_FIELDS), quita los
+    programas que ya no están en el catálogo y deja su orden. Devuelve
+    (nuevos, actualizados, retirados).
+    """
+    added = changed = 0
+    for name, definition in catalog.items():
+        current = programs.get(name)
+        if current is None:
+            programs[name] = dict(definition)
+            added += 1
+            continue
+        catalog_fields = {field: value for field, value in definition.items() if field not in PROGRAM_USER_FIELDS}
+        if any(current.get(field) != value for field, value in catalog_fields.items()):
+            current.update(catalog_fields)
+            changed += 1
+
+    removed = [name for name in programs if name not in catalog]
+    ordered = {name: programs[name] for name in catalog}
+    programs.clear()
+    programs.update(ordered)
+    return added, changed, len(removed)
+
+
+def format_file_size(size_bytes):
+    """Tamaño legible como los del gestor de archivos ('2 KB', '1.2 MB')"""
+    if size_bytes < 1024 * 1024:
+        return f"{max(1, round(size_bytes / 1024))} KB"
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def parse_file_size(size_text):
+    """Bytes aproximados de un tamaño legible ('2 KB', '1.2 MB'); 0 si no se entiende"""
+    units = {'B': 1, 'KB': 1024, 'MB': 1024 * 1024, 'GB': 1024 * 1024 * 1024}
+    try:
+        number, unit = size_text.split()
+        return int(float(number) * units[unit.upper()])
+    except (ValueError, KeyError, AttributeError):
+        return 0
+
+
+def next_version(version):
+    """Versión con la parte menor incrementada ('1.2.13' -> '1.2.14')"""
+    version_parts = version.split('.')
+    if len(version_parts) >= 2:
+        try:
+            version_parts[-1] = str(int(version_parts[-1]) + 1)
+            return '.'.join(version_parts)
+        except ValueError:
+            pass
+    return version + ".1"
+
+
+def now_stamp():
+    return datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
+
+
+class HeadlessScheduler:
+    """Sustituto de root.after/after_cancel sin Tk: los callbacks se ejecutan con run_due()"""
+
+    def __init__(self):
+        self.queue = []
+        self.cancelled = set()
+        self.ids = itertools.count(1)
+
+    def after(self, delay_ms, callback, *args):
+        timer_id = next(self.ids)
+        heapq.heappush(self.queue, (time.monotonic() + delay_ms / 1000, timer_id, callback, args))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.cancelled.add(timer_id)
+
+    def run_due(self, now=None):
+        """Ejecutar los callbacks vencidos; devuelve cuántos se ejecutaron"""
+        now = time.monotonic() if now is None else now
+        ran = 0
+        while self.queue and self.queue[0][0] <= now:
+            _, timer_id, callback, args = heapq.heappop(self.queue)
+            if timer_id in self.cancelled:
+                self.cancelled.discard(timer_id)
+                continue
+            callback(*args)
+            ran += 1
+        return ran
+
+    def run_all(self):
+        """Ejecutar ya todo lo programado (también lo que se programe mientras tanto)"""
+        ran = 0
+        while self.queue:
+            ran += self.run_due(float('inf'))
+        return ran
+
+
+class ProgramJob:
+    """Instalación, actualización o desinstalación de un programa, paso a paso
+
+    La vista recorre 'steps' con su animación y llama a complete() al final;
+    sin interfaz, run() lo hace todo seguido.
+    """
+
+    def __init__(self, core, kind, program_name):
+        self.core = core
+        self.kind = kind
+        self.program_name = program_name
+        self.steps = JOB_STEPS[kind]
+        self.step_index = 0
+        self.result = None
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def advance(self):
+        """Pasar al siguiente paso; devuelve (progreso, estado) o None si no quedan"""
+        if self.step_index >= len(self.steps):
+            return None
+        step = self.steps[self.step_index]
+        self.step_index += 1
+        return step
+
+    def complete(self):
+        """Aplicar el cambio del trabajo al estado de los programas"""
+        if self.kind == 'install':
+            self.result = self.core.install_program(self.program_name)
+        elif self.kind == 'update':
+            self.result = self.core.update_program(self.program_name)
+        else:
+            self.result = self.core.uninstall_program(self.program_name)
+        return self.result
+
+    def run(self):
+        while self.advance():
+            pass
+        return self.complete()
+
+
+class SimulatorCore:
+    """Estado y reglas del simulador, sin dependencias de la interfaz
+
+    Los cambios se notifican a los suscriptores con un tema ('files',
+    'programs', 'chat', 'playlist', 'session') para que la vista se refresque.
+    """
+
+    def __init__(self, scheduler, storage=STORAGE_ENGINE, profiler=None):
+        self.scheduler = scheduler
+        self.profiler = profiler or StartupProfiler()  # Desactivado salvo que se pida
+        self.listeners = []
+        self.file_observers = []  # Reciben cada operación sobre los archivos (vistas incrementales)
+
+        self.current_user = None
+        self.user_type = None
+        self.users_data = {}
+        self.files_data = FileCatalog()
+        self.programs_data = {}
+
+        self.chat_messages = [dict(message) for message in INITIAL_MESSAGES]
+        self.songs = [dict(song) for song in INITIAL_SONGS]
+        self.current_song = None
+        self.is_playing = False
+
+        with self.profiler.phase('setup_directories'):
+            self.setup_directories()
+
+        # Los cambios en los datos se guardan agrupados y en segundo plano
+        self.persistence = WriteBehindStore(scheduler)
+        self.persistence.register('users', 'data/users/users.json', lambda: self.users_data, binary=True)
+        # Los archivos se guardan como diario de operaciones; files.json es su instantánea compactada
+        self.file_journal = FileJournal('data/files/files.journal')
+        self.persistence.register(
+            'files', 'data/files/files.json', lambda: self.files_data,
+            on_snapshot=self.file_journal.rotate,
+            on_written=self.file_journal.discard_rotated,
+            binary=True  # files.bin: la misma instantánea en binario, para arrancar sin parsear JSON
+        )
+        self.persistence.register('programs', 'data/programs/programs.json', self.programs_document)
+        # Con SIMULADOR_STORAGE=sqlite los tres almacenes viven en una base SQLite indexada
+        self.store = None
+        if storage == 'sqlite':
+            self.store = SqliteStore('data/simulador.db')
+
+        # Estado de los programas (migrando solo lo que cambió en el catálogo)
+        with self.profiler.phase('load_programs_data'):
+            self.load_programs_data()
+        with self.profiler.phase('load_data'):
+            self.load_data()
+
+    def setup_directories(self):
+        """Crear directorios necesarios para el sistema"""
+        directories = ['data', 'data/cache', 'data/cache/icons', 'data/files', 'data/programs', 'data/users', 'images', 'user_files', 'user_files/documents', 'user_files/images', 'user_files/music', 'user_files/videos']
+        for directory in directories:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+
+    def subscribe(self, callback):
+        """Registrar callback(tema) para los cambios del estado"""
+        self.listeners.append(callback)
+
+    def notify(self, topic):
+        for callback in self.listeners:
+            callback(topic)
+
+    def observe_files(self, callback):
+        """Registrar callback(operación) para cada cambio en los archivos, justo antes de aplicarlo"""
+        self.file_observers.append(callback)
+
+    # ==================== DATOS ====================
+
+    def load_programs_data(self):
+        """Cargar el estado de los programas e incorporar solo lo que cambió en el catálogo
+
+        Si lo guardado ya corresponde a la versión actual del catálogo no se
+        escribe nada.
+        """
+        importing = self.store is not None and self.store.needs_import()
+        if self.store is not None and not importing:
+            programs = self.store.load_programs()
+            schema = int(self.store.get_meta('programs_schema', 0))
+            catalog_version = int(self.store.get_meta('programs_catalog', 0))
+        else:
+            try:
+                with open('data/programs/programs.json', 'r', encoding='utf-8') as f:
+                    document = json.load(f)
+            except (FileNotFoundError, ValueError):
+                document = {}
+            if 'schema' in document:
+                schema, catalog_version, programs = document['schema'], document['catalog_version'], document['programs']
+            else:
+                schema, catalog_version, programs = 0, 0, document  # Formato antiguo: diccionario plano
+
+        self.programs_data = programs
+        up_to_date = schema == PROGRAM_SCHEMA_VERSION and catalog_version == PROGRAM_CATALOG_VERSION
+        if up_to_date:
+            print(f"✅ Catálogo de programas v{PROGRAM_CATALOG_VERSION} al día ({len(programs)} programas)")
+        else:
+            added, changed, removed = merge_program_catalog(self.programs_data)
+            print(f"🔄 Catálogo de programas v{catalog_version} → v{PROGRAM_CATALOG_VERSION}: "
+                  f"{added} nuevos, {changed} actualizados, {removed} retirados")
+
+        if not up_to_date or importing:
+            self.save_programs_data()
+            if self.store is not None:
+                self.store.set_meta('programs_schema', PROGRAM_SCHEMA_VERSION)
+                self.store.set_meta('programs_catalog', PROGRAM_CATALOG_VERSION)
+
+    def programs_document(self):
+        """Contenido de programs.json: versiones del catálogo y estado de cada programa"""
+        return {
+            'schema': PROGRAM_SCHEMA_VERSION,
+            'catalog_version': PROGRAM_CATALOG_VERSION,
+            'programs': snapshot(self.programs_data)
+        }
+
+    def load_data(self):
+        """Cargar datos del sistema"""
+        if self.store is not None:
+            self.load_data_sqlite()
+            return
+
+        try:
+            self.users_data = load_json_store('data/users/users.json')
+        except FileNotFoundError:
+            self.users_data = self.default_users_data()
+            self.save_users_data()
+
+        try:
+            files_data = load_json_store('data/files/files.json')
+        except FileNotFoundError:
+            files_data = {}
+
+        replayed = self.file_journal.replay(files_data)
+        if replayed:
+            print(f"📒 {replayed} operaciones de archivos recuperadas del diario")
+        moved = self.externalize_file_contents(files_data)
+        # Los índices por nombre y categoría se construyen una vez y luego se mantienen en cada cambio
+        self.files_data = FileCatalog(files_data)
+        if moved:
+            print(f"📤 Contenido de {moved} archivos sacado de files.json (queda en user_files/)")
+            self.save_files_data()
+
+        # Los datos de programas ya se cargaron en load_programs_data()
+        print(f"✅ Datos cargados: {len(self.programs_data)} programas disponibles")
+
+    def default_users_data(self):
+        """Usuarios iniciales del sistema"""
+        return {
+            "admin": {
+                "password": "admin123",
+                "type": "Administrador",
+                "permissions": ["read", "write", "delete", "install", "update"],
+                "wallpaper": "admin"
+            },
+            "usuario": {
+                "password": "user123",
+                "type": "Usuario",
+                "permissions": ["read", "write"],
+                "wallpaper": "user"
+            }
+        }
+
+    def load_data_sqlite(self):
+        """Cargar datos desde la base SQLite (importando los JSON la primera vez)"""
+        if self.store.needs_import():
+            try:
+                users_data = load_json_store('data/users/users.json')
+            except FileNotFoundError:
+                users_data = self.default_users_data()
+            try:
+                files_data = load_json_store('data/files/files.json')
+            except FileNotFoundError:
+                files_data = {}
+            self.file_journal.replay(files_data)
+            self.file_journal.close()
+            self.externalize_file_contents(files_data)
+            self.store.import_data(users_data, files_data, self.programs_data)
+            print(f"🗄️ Datos JSON importados a {self.store.path}: {len(files_data)} archivos, {len(users_data)} usuarios")
+
+        self.users_data = self.store.load_users()
+        self.files_data = SqliteFileMap(self.store)
+        if self.store.upgraded_from == 1:
+            # Las bases v1 no tenían metadatos de contenido: se calculan una vez desde user_files/
+            # (la migración ya escribió ahí el contenido que solo estaba en la tabla)
+            for key, info in self.store.iter_files():
+                path = self.file_path(info)
+                if os.path.exists(path):
+                    self.record_file_change('update', key, fields=self.content_metadata(path))
+        print(f"✅ Datos cargados de {self.store.path}: {len(self.files_data)} archivos, "
+              f"{len(self.programs_data)} programas disponibles")
+
+    def save_users_data(self):
+        """Guardar datos de usuarios (escritura diferida)"""
+        if self.store is not None:
+            self.store.save_users(self.users_data)
+            return
+        self.persistence.mark_dirty('users')
+
+    def save_files_data(self):
+        """Escribir una instantánea completa de archivos, que compacta el diario (diferida)"""
+        if self.store is not None:
+            return  # SQLite guarda cada operación en su propia transacción
+        self.persistence.mark_dirty('files')
+
+    def save_programs_data(self):
+        """Guardar datos de programas (escritura diferida)"""
+        if self.store is not None:
+            self.store.save_programs(self.programs_data)
+            return
+        self.persistence.mark_dirty('programs')
+
+    def record_file_change(self, operation, key, **fields):
+        """Aplicar un cambio a files_data y anotarlo en el diario
+
+        Operaciones: 'create' (value), 'rename' (new_key, value), 'update'
+        (fields con los campos nuevos) y 'delete'.
+        """
+        record = dict(fields, op=operation, key=key)
+        # Los observadores la ven antes de aplicarla, con el registro anterior aún en files_data
+        for callback in self.file_observers:
+            callback(record)
+        if self.store is not None:
+            self.store.apply_file_operation(record)
+        else:
+            self.files_data.apply(record)
+            self.file_journal.append(record)
+            if self.file_journal.needs_compaction():
+                self.save_files_data()
+
+    def flush_data(self):
+        """Escribir en disco todos los cambios pendientes antes de cerrar sesión o salir"""
+        if self.file_journal.records:
+            self.save_files_data()  # Compactar para que el próximo arranque no tenga que reaplicar
+        self.persistence.flush()
+        stats = self.persistence.stats()
+        if stats['mutations']:
+            print(f"💾 {stats['mutations']} cambios guardados con {stats['writes']} escrituras "
+                  f"({stats['write_time'] * 1000:.0f} ms fuera del hilo de la interfaz)")
+
+    # ==================== USUARIOS ====================
+
+    def login(self, username, password):
+        """Iniciar sesión; devuelve False si el usuario o la contraseña no son válidos"""
+        user = self.users_data.get(username)
+        if user is None or user["password"] != password:
+            return False
+        self.current_user = username
+        self.user_type = user["type"]
+        self.notify('session')
+        return True
+
+    def logout(self):
+        """Cerrar la sesión y guardar lo pendiente"""
+        self.flush_data()
+        self.current_user = None
+        self.user_type = None
+        self.notify('session')
+
+    @property
+    def is_admin(self):
+        return self.user_type == "Administrador"
+
+    def user_wallpaper(self):
+        return self.users_data[self.current_user].get("wallpaper", "admin")
+
+    # ==================== ARCHIVOS ====================
+
+    def file_path(self, file_info, file_name=None):
+        """Ruta en disco del contenido de un archivo"""
+        return f"user_files/{file_info['category']}/{file_name or file_info['name']}"
+
+    def content_metadata(self, file_path):
+        """Metadatos del contenido en disco: tamaño (legible y en bytes), mtime y hash"""
+        metadata = content_fingerprint(file_path)
+        metadata['size'] = format_file_size(metadata['bytes'])
+        return metadata
+
+    def read_file_content(self, file_info, file_name=None):
+        """Contenido de un archivo, leído de disco solo cuando se abre"""
+        file_path = self.file_path(file_info, file_name)
+        if not os.path.exists(file_path):
+            return ''
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def externalize_file_contents(self, files_data):
+        """Quitar 'content' de registros antiguos, dejándolo en user_files/ y guardando sus metadatos"""
+        moved = 0
+        for info in files_data.values():
+            if 'content' not in info:
+                continue
+            content = info.pop('content')
+            file_path = self.file_path(info)
+            try:
+                if content and not os.path.exists(file_path):
+                    Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                if os.path.exists(file_path):
+                    info.update(self.content_metadata(file_path))
+            except OSError as e:
+                print(f"⚠️ No se pudo mover el contenido de {file_path}: {e}")
+                info['content'] = content
+                continue
+            moved += 1
+        return moved
+
+    def find_file(self, file_name, category=None):
+        """(clave, datos) del archivo con ese nombre, o (None, None)
+
+        El mismo nombre puede existir en varias categorías: sin 'category'
+        se devuelve el más antiguo.
+        """
+        if self.store is not None:
+            return self.store.find_file(file_name, category)  # Consulta por el índice de nombre
+        return self.files_data.find(file_name, category)
+
+    def iter_files(self, category="all"):
+        """(clave, datos) de los archivos de una categoría ('all' para todos)"""
+        if self.store is not None:
+            return self.store.iter_files(None if category == "all" else category)
+        if category == "all":
+            return self.files_data.items()
+        return self.files_data.iter_category(category)
+
+    def load_initial_files(self):
+        """Cargar archivos iniciales del sistema"""
+        # Crear archivos físicos si no existen
+        for file_info in INITIAL_FILES:
+            if file_info["type"] == "Documento":
+                file_path = f"user_files/documents/{file_info['name']}"
+                if not os.path.exists(file_path):
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        f.write(file_info['content'])
+
+        # Actualizar datos (solo metadatos; el contenido queda en disco)
+        for file_info in INITIAL_FILES:
+            file_key = f"{file_info['category']}_{file_info['name']}"
+            value = {
+                "name": file_info['name'],
+                "type": file_info['type'],
+                "size": file_info['size'],
+                "category": file_info['category'],
+                "date": now_stamp()
+            }
+            file_path = self.file_path(value)
+            if os.path.exists(file_path):
+                value.update(self.content_metadata(file_path))
+            self.record_file_change('create', file_key, value=value)
+        self.notify('files')
+
+    def create_file(self, file_name, category, content="Nuevo archivo creado\n"):
+        """Crear un documento de texto; devuelve su nombre final (con .txt)"""
+        if not file_name.endswith('.txt'):
+            file_name += '.txt'
+        if category == "all":
+            category = "documents"
+
+        file_key = f"{category}_{file_name}"
+        if file_key in self.files_data:
+            raise CoreError("El archivo ya existe")
+
+        file_path = f"user_files/{category}/{file_name}"
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.record_file_change('create', file_key, value={
+            "name": file_name,
+            "type": "Documento",
+            "category": category,
+            "date": now_stamp(),
+            **self.content_metadata(file_path)
+        })
+        self.notify('files')
+        return file_name
+
+    def rename_file(self, old_file_name, new_file_name, category=None):
+        """Renombrar un archivo (en disco y en los datos); devuelve el nombre final"""
+        file_key, file_info = self.find_file(old_file_name, category)
+        if not file_info:
+            raise CoreError("Archivo no encontrado")
+
+        # Agregar extensión si es necesario
+        if file_info['type'] == "Documento" and not new_file_name.endswith('.txt'):
+            new_file_name += '.txt'
+
+        # Verificar que no exista otro archivo con ese nombre
+        new_file_key = f"{file_info['category']}_{new_file_name}"
+        if new_file_key in self.files_data:
+            raise CoreError(f"Ya existe un archivo llamado '{new_file_name}'")
+
+        old_file_path = self.file_path(file_info)
+        if os.path.exists(old_file_path):
+            os.rename(old_file_path, self.file_path(file_info, new_file_name))
+
+        # Nueva entrada con el nuevo nombre en lugar de la antigua
+        # (los metadatos del contenido no cambian al renombrar)
+        self.record_file_change('rename', file_key, new_key=new_file_key, value=dict(
+            file_info,
+            name=new_file_name,
+            date=now_stamp()
+        ))
+        self.notify('files')
+        return new_file_name
+
+    def delete_file(self, file_name, category=None):
+        """Eliminar un archivo - SOLO ADMINISTRADORES"""
+        if not self.is_admin:
+            raise CoreError("Solo el administrador puede eliminar archivos.")
+        file_key, file_info = self.find_file(file_name, category)
+        if not file_key:
+            raise CoreError("Archivo no encontrado")
+
+        file_path = self.file_path(file_info)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        self.record_file_change('delete', file_key)
+        self.notify('files')
+
+    def save_file(self, file_name, file_info, content):
+        """Escribir el contenido de un archivo y actualizar sus metadatos"""
+        file_path = self.file_path(file_info, file_name)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        key = self.find_file(file_name, file_info['category'])[0]
+        if key is not None:
+            self.record_file_change('update', key, fields={
+                'date': now_stamp(),
+                **self.content_metadata(file_path)
+            })
+            self.notify('files')
+
+    # ==================== PROGRAMAS ====================
+
+    def program(self, program_name):
+        program_info = self.programs_data.get(program_name)
+        if program_info is None:
+            raise CoreError(f"Programa {program_name} no encontrado")
+        return program_info
+
+    def start_job(self, kind, program_name):
+        """Trabajo de 'install', 'update' o 'uninstall' ya validado"""
+        if not self.is_admin:
+            verbs = {'install': "instalar", 'update': "actualizar", 'uninstall': "desinstalar"}
+            raise CoreError(f"Solo el administrador puede {verbs[kind]} programas")
+        program_info = self.program(program_name)
+        if kind == 'install' and program_info['installed']:
+            raise CoreError(f"{program_name} ya está instalado")
+        if kind != 'install' and not program_info['installed']:
+            raise CoreError(f"{program_name} no está instalado")
+        if kind == 'uninstall' and program_name in SYSTEM_UTILITIES:
+            raise CoreError(f"{program_name} es una utilería crítica del sistema operativo.")
+        return ProgramJob(self, kind, program_name)
+
+    def install_program(self, program_name):
+        self.program(program_name)['installed'] = True
+        self.save_programs_data()
+        self.notify('programs')
+        return True
+
+    def update_program(self, program_name):
+        """Subir la versión menor; devuelve (versión anterior, nueva)"""
+        program_info = self.program(program_name)
+        current_version = program_info['version']
+        program_info['version'] = next_version(current_version)
+        self.save_programs_data()
+        self.notify('programs')
+        return current_version, program_info['version']
+
+    def uninstall_program(self, program_name):
+        self.program(program_name)['installed'] = False
+        self.save_programs_data()
+        self.notify('programs')
+        return True
+
+    def installed_count(self):
+        return sum(1 for program_info in self.programs_data.values() if program_info['installed'])
+
+    # ==================== CHAT ====================
+
+    def send_message(self, message, reply_delay_ms=CHAT_REPLY_DELAY_MS):
+        """Añadir un mensaje propio y programar la respuesta del contacto"""
+        message = message.strip()
+        if not message:
+            return False
+        self.chat_messages.append({
+            "sender": "Tú",
+            "message": message,
+            "time": datetime.datetime.now().strftime("%H:%M")
+        })
+        self.notify('chat')
+        self.scheduler.after(reply_delay_ms, lambda: self.contact_reply(message))
+        return True
+
+    def contact_reply(self, user_message):
+        """Respuesta automática del contacto"""
+        self.chat_messages.append({
+            "sender": "Contacto",
+            "message": random.choice(CONTACT_RESPONSES),
+            "time": datetime.datetime.now().strftime("%H:%M")
+        })
+        self.notify('chat')
+
+    # ==================== MÚSICA ====================
+
+    def play_song(self, song):
+        """Reproducir una canción (detiene la anterior)"""
+        for other in self.songs:
+            other['playing'] = False
+        song['playing'] = True
+        self.current_song = song
+        self.is_playing = True
+        self.notify('playlist')
+
+    def toggle_play_pause(self):
+        if self.current_song:
+            self.is_playing = not self.is_playing
+            self.current_song['playing'] = self.is_playing
+            self.notify('playlist')
+
+    def next_song(self):
+        if self.current_song:
+            current_index = self.songs.index(self.current_song)
+            self.play_song(self.songs[(current_index + 1) % len(self.songs)])
+
+    def previous_song(self):
+        if self.current_song:
+            current_index = self.songs.index(self.current_song)
+            self.play_song(self.songs[(current_index - 1) % len(self.songs)])
@@ -0,0 +1,225 @@
+"""Paquete único de recursos (iconos, avatares, wallpapers) con acceso por mmap
+
+Construir el paquete a partir de images/:
+    python paquete_recursos.py [ruta_salida]
+
+Formato: cabecera fija, datos de cada entrada uno detrás de otro y un índice
+JSON al final. Las variantes ya procesadas se guardan como píxeles crudos
+(se abren con Image.frombuffer sin copiar) y los originales y wallpapers
+codificados, PNG o JPEG (se decodifican leyendo directamente del mapa de memoria).
+"""
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+import imagenes
+from cache_imagenes import CACHE_FORMAT_VERSION
+
+
+BUNDLE_MAGIC = b'SOBUNDLE'
+BUNDLE_VERSION = 2
+# magia, versión, desplazamiento y longitud del índice
+_HEADER = struct.Struct('<8sIQQ')
+
+DEFAULT_BUNDLE_PATH = 'data/assets.bundle'
+
+
+def variant_entry_name(key, size):
+    """Nombre de la entrada de una variante procesada"""
+    return f"{key}@{size[0]}x{size[1]}"
+
+
+def bundle_params(enhance_by_class):
+    """Parámetros de derivación con los que se generaron las variantes"""
+    return {
+        'cache_format': CACHE_FORMAT_VERSION,
+        'enhance': {asset_class: imagenes.ENHANCE_PRESETS[preset] for asset_class, preset in enhance_by_class.items()}
+    }
+
+
+class BundleWriter:
+    """Escritor secuencial del paquete"""
+
+    def __init__(self, path, enhance_by_class):
+        self.path = Path(path)
+        self.params = bundle_params(enhance_by_class)
+        self.tmp_path = self.path.with_suffix('.tmp')
+        self.file = open(self.tmp_path, 'wb')
+        self.file.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, 0))
+        self.index = {}
+
+    def _add(self, name, data, meta):
+        offset = self.file.tell()
+        self.file.write(data)
+        self.index[name] = dict(meta, offset=offset, length=len(data))
+
+    def add_raw(self, name, image):
+        """Guardar una imagen como píxeles crudos"""
+        self._add(name, image.tobytes(), {'format': 'raw', 'mode': image.mode, 'size': list(image.size)})
+
+    def add_png(self, name, image=None, data=None):
+        """Guardar una imagen como PNG (o los bytes ya codificados de un PNG o JPEG)"""
+        if data is None:
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG')
+            data = buffer.getvalue()
+        self._add(name, data, {'format': 'encoded'})
+
+    def close(self):
+        """Escribir el índice, completar la cabecera y publicar el archivo"""
+        index_data = json.dumps({'params': self.params, 'entries': self.index}).encode('utf-8')
+        index_offset = self.file.tell()
+        self.file.write(index_data)
+        self.file.seek(0)
+        self.file.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, index_offset, len(index_data)))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class _MappedSlice(io.RawIOBase):
+    """Archivo de solo lectura sobre un trozo del mapa (sin copiar los bytes)"""
+
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.view[self.position:self.position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = len(self.view) + offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class AssetBundle:
+    """Lector del paquete: un open + mmap y acceso aleatorio a cada entrada"""
+
+    def __init__(self, path, enhance_by_class):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, version, index_offset, index_length = _HEADER.unpack_from(self.map, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            raise ValueError(f"Paquete no válido: {path}")
+
+        index = json.loads(bytes(self.view[index_offset:index_offset + index_length]))
+        self.entries = index['entries']
+        # Variantes generadas con otros parámetros no sirven: solo se usan los originales
+        self.variants_valid = index['params'] == json.loads(json.dumps(bundle_params(enhance_by_class)))
+        self.hits = 0
+        self.decode_time = 0.0
+
+    @classmethod
+    def open_if_present(cls, enhance_by_class, path=DEFAULT_BUNDLE_PATH):
+        """Abrir el paquete si existe; None para trabajar con archivos sueltos"""
+        if os.environ.get('SIMULADOR_BUNDLE', '1') == '0' or not os.path.exists(path):
+            return None
+        try:
+            return cls(path, enhance_by_class)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Paquete de recursos ignorado ({path}): {e}")
+            return None
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def get_image(self, name):
+        """Imagen de una entrada o None si no está en el paquete"""
+        entry = self.entries.get(name)
+        if entry is None or ('@' in name and not self.variants_valid):
+            return None
+
+        start = time.perf_counter()
+        data = self.view[entry['offset']:entry['offset'] + entry['length']]
+        if entry['format'] == 'raw':
+            image = Image.frombuffer(entry['mode'], tuple(entry['size']), data, 'raw', entry['mode'], 0, 1)
+        else:
+            image = Image.open(_MappedSlice(data))
+            image.load()
+
+        self.hits += 1
+        self.decode_time += time.perf_counter() - start
+        return image
+
+    def get_variant(self, key, size):
+        """Variante procesada de una clave a un tamaño"""
+        return self.get_image(variant_entry_name(key, size))
+
+
+def build_bundle(output_path=DEFAULT_BUNDLE_PATH, images_dir='images'):
+    """Empaquetar originales, variantes procesadas y wallpapers pre-renderizados"""
+    from simulador_so import (COMMON_SCREEN_SIZES, ENHANCE_BY_CLASS, IMAGE_FILES, WALLPAPER_EXTENSIONS,
+                              asset_class_for, enhance_params, target_size_for)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    writer = BundleWriter(output_path, ENHANCE_BY_CLASS)
+
+    for key, path in IMAGE_FILES.items():
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            writer.add_png(key, data=f.read())
+
+        original = Image.open(path)
+        if original.mode != 'RGBA':
+            original = original.convert('RGBA')
+
+        params = enhance_params(asset_class_for(key))
+        if key.startswith('icon_'):
+            for size, level in imagenes.build_icon_pyramid(original, params=params).items():
+                writer.add_raw(variant_entry_name(key, (size, size)), level)
+        target_size = target_size_for(key)
+        if variant_entry_name(key, target_size) not in writer.index:
+            writer.add_raw(variant_entry_name(key, target_size), imagenes.derive_variant(original, target_size, params))
+
+    for path in sorted(Path(images_dir).glob('wallpaper_*')):
+        key = path.stem
+        if path.suffix not in WALLPAPER_EXTENSIONS or key in writer.index:
+            continue
+        writer.add_png(key, data=path.read_bytes())
+        for width, height in COMMON_SCREEN_SIZES:
+            source = imagenes.open_reduced(path, (width, height))[0]
+            writer.add_png(variant_entry_name(key, (width, height)),
+                           imagenes.fit_wallpaper(source, width, height, enhance_params('wallpaper')))
+
+    writer.close()
+    return len(writer.index)
+
+
+def main():
+    output_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BUNDLE_PATH
+    start = time.perf_counter()
+    count = build_bundle(output_path)
+    size = os.path.getsize(output_path)
+    print(f"📦 Paquete {output_path}: {count} entradas, {size / 1048576:.1f} MB "
+          f"en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Perfil del arranque: tiempo de reloj, CPU y memoria de cada fase y tiempo hasta el login
+
+Se activa con 'python simulador_so.py --profile-startup[=ruta.json]' o con
+SIMULADOR_PROFILE_STARTUP=ruta.json (o 1 para la ruta por defecto). Con
+--cprofile=ruta.prof o SIMULADOR_CPROFILE=ruta.prof el arranque completo se
+ejecuta además bajo cProfile y se guardan sus estadísticas (pstats).
+
+El informe se escribe cuando se pinta el primer frame del login, o al
+cerrar si no llegó a pintarse.
+"""
+import contextlib
+import cProfile
+import os
+import sys
+import time
+import tracemalloc
+
+from persistencia import write_json_atomic
+
+
+DEFAULT_REPORT_PATH = 'data/startup_profile.json'
+
+
+class StartupProfiler:
+    """Mide fases con nombre del arranque; desactivado, phase() no hace nada
+
+    Por fase guarda tiempo de reloj y de CPU del proceso (incluye los hilos
+    de carga de imágenes), memoria neta y pico según tracemalloc y bloques
+    asignados por el intérprete. Las fases pueden anidarse.
+    """
+
+    def __init__(self, report_path=None, cprofile_path=None):
+        self.report_path = report_path
+        self.cprofile_path = cprofile_path
+        self.enabled = report_path is not None or cprofile_path is not None
+        self.phases = []
+        self.stack = []  # Fases abiertas: [índice, pico máximo visto dentro]
+        self.first_frame_ms = None
+        self.finished = False
+        self.profile = None
+        if not self.enabled:
+            return
+
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        if self.report_path is not None:
+            tracemalloc.start()
+        if self.cprofile_path is not None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    @classmethod
+    def from_args(cls, argv=None, environ=None):
+        """Perfilador según la línea de comandos o el entorno (desactivado si no se pide)"""
+        argv = sys.argv[1:] if argv is None else argv
+        environ = os.environ if environ is None else environ
+        report_path = environ.get('SIMULADOR_PROFILE_STARTUP') or None
+        if report_path in ('0', 'false'):
+            report_path = None
+        elif report_path in ('1', 'true'):
+            report_path = DEFAULT_REPORT_PATH
+        cprofile_path = environ.get('SIMULADOR_CPROFILE') or None
+        # La línea de comandos manda sobre el entorno
+        for argument in argv:
+            if argument == '--profile-startup':
+                report_path = DEFAULT_REPORT_PATH
+            elif argument.startswith('--profile-startup='):
+                report_path = argument.split('=', 1)[1] or DEFAULT_REPORT_PATH
+            elif argument.startswith('--cprofile='):
+                cprofile_path = argument.split('=', 1)[1] or None
+        return cls(report_path, cprofile_path)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Medir el bloque como una fase del arranque"""
+        if not self.enabled or self.finished:
+            yield
+            return
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], peak)  # El pico hasta aquí es de la fase exterior
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+        record = {'name': name, 'depth': len(self.stack)}
+        self.phases.append(record)
+        self.stack.append([len(self.phases) - 1, 0])
+        blocks = sys.getallocatedblocks()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record['wall_ms'] = (time.perf_counter() - wall) * 1000
+            record['cpu_ms'] = (time.process_time() - cpu) * 1000
+            record['blocks_allocated'] = sys.getallocatedblocks() - blocks
+            _, inner_peak = self.stack.pop()
+            if tracing:
+                after, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, inner_peak)
+                record['memory_kb'] = (after - current) / 1024
+                record['peak_kb'] = (peak - current) / 1024
+                if self.stack:
+                    self.stack[-1][1] = max(self.stack[-1][1], peak)
+
+    def mark_first_frame(self):
+        """El login ya está en pantalla: registrar el tiempo y escribir el informe"""
+        if self.enabled and self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - self.start_wall) * 1000
+            self.finish()
+
+    def report(self):
+        return {
+            'time_to_login_frame_ms': self.first_frame_ms,
+            'wall_ms': (time.perf_counter() - self.start_wall) * 1000,
+            'cpu_ms': (time.process_time() - self.start_cpu) * 1000,
+            'phases': self.phases,
+            'cprofile': self.cprofile_path,
+            'python': sys.version.split()[0],
+            'pid': os.getpid()
+        }
+
+    def finish(self):
+        """Detener las mediciones y guardar el informe y las estadísticas de cProfile"""
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        if self.profile is not None:
+            self.profile.disable()
+            try:
+                self.profile.dump_stats(self.cprofile_path)
+                print(f"🔬 Estadísticas de cProfile del arranque en {self.cprofile_path}")
+            except OSError as e:
+                print(f"⚠️ No se pudieron guardar las estadísticas de cProfile: {e}")
+
+        report = self.report()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if self.report_path is None:
+            return
+        try:
+            write_json_atomic(self.report_path, report)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el perfil de arranque: {e}")
+            return
+
+        frame = report['time_to_login_frame_ms']
+        frame_text = f"login pintado a los {frame:.0f} ms" if frame is not None else "el login no llegó a pintarse"
+        print(f"⏱️ Perfil de arranque en {self.report_path}: {frame_text}")
+        for phase in self.phases:
+            print(f"   {'  ' * phase['depth']}• {phase['name']:<24} {phase['wall_ms']:8.1f} ms reloj "
+                  f"{phase['cpu_ms']:8.1f} ms CPU" +
+                  (f" {phase['peak_kb']:9.0f} KB pico" if 'peak_kb' in phase else ""))
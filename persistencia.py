@@ -0,0 +1,459 @@
+"""Persistencia diferida de los almacenes JSON del simulador y diario de archivos"""
+import hashlib
+import json
+import marshal
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from tkinter import TclError
+
+
+# Espera tras la última modificación antes de escribir, y espera máxima desde la primera
+SAVE_DELAY_MS = 500
+MAX_SAVE_DELAY_MS = 3000
+
+# Operaciones del diario tras las que se compacta en una instantánea nueva
+JOURNAL_COMPACT_RECORDS = 200
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+
+
+# Instantánea binaria que acompaña a cada JSON (SIMULADOR_BINARY_SNAPSHOT=0 para desactivarla)
+BINARY_SNAPSHOTS = os.environ.get('SIMULADOR_BINARY_SNAPSHOT', '1') != '0'
+SNAPSHOT_MAGIC = b'SOSNAP'
+SNAPSHOT_VERSION = 1
+# magia, versión, versión de marshal, tamaño y mtime del JSON de origen, CRC32 y longitud de los datos
+_SNAPSHOT_HEADER = struct.Struct('<6sHHQqIQ')
+
+
+def snapshot(data):
+    """Copia de dos niveles (diccionario de registros) que el hilo de escritura puede serializar
+
+    Los registros se modifican en su sitio desde el hilo de Tk; copiarlos es
+    mucho más barato que serializarlos y evita que cambien a mitad del volcado.
+    """
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+
+
+def write_json_atomic(path, data):
+    """Escribir JSON en un temporal y reemplazar el archivo (nunca queda a medias)"""
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def binary_snapshot_path(path):
+    """Ruta de la instantánea binaria de un JSON ('files.json' -> 'files.bin')"""
+    return Path(path).with_suffix('.bin')
+
+
+def write_binary_snapshot(path, data, source_path):
+    """Guardar 'data' con marshal, ligado al JSON 'source_path' que se acaba de escribir"""
+    payload = marshal.dumps(data)
+    stat = os.stat(source_path)
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, marshal.version,
+                                   stat.st_size, stat.st_mtime_ns, zlib.crc32(payload), len(payload))
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_binary_snapshot(path, source_path):
+    """Datos de la instantánea binaria, o None si falta, no es válida o no corresponde al JSON actual
+
+    Sirve solo si el JSON sigue teniendo el tamaño y mtime con los que se
+    escribió; cualquier cambio por otra vía la deja obsoleta.
+    """
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+        stat = os.stat(source_path)
+    except OSError:
+        return None
+
+    if len(content) < _SNAPSHOT_HEADER.size:
+        return None
+    magic, version, marshal_version, size, mtime_ns, checksum, length = _SNAPSHOT_HEADER.unpack_from(content)
+    payload = memoryview(content)[_SNAPSHOT_HEADER.size:]
+    if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or marshal_version != marshal.version
+            or (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns)
+            or length != len(payload) or checksum != zlib.crc32(payload)):
+        return None
+    try:
+        return marshal.loads(payload)
+    except (ValueError, EOFError, TypeError):
+        return None
+
+
+def load_json_store(path, binary=BINARY_SNAPSHOTS):
+    """Datos de un almacén: de su instantánea binaria si está al día y si no, del JSON
+
+    Lanza FileNotFoundError si no existe el JSON, como json.load.
+    """
+    if binary:
+        data = read_binary_snapshot(binary_snapshot_path(path), path)
+        if data is not None:
+            return data
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class WriteBehindStore:
+    """Almacenes JSON que se marcan como sucios y se escriben agrupados en segundo plano
+
+    'mark_dirty' solo anota el cambio y programa (con root.after) una escritura
+    tras SAVE_DELAY_MS sin más cambios, o como mucho MAX_SAVE_DELAY_MS después
+    del primero. La copia se toma en el hilo de Tk y la serialización y la
+    escritura se hacen en un hilo propio; 'flush' lo escribe todo y espera,
+    para el cierre de sesión y la salida.
+    """
+
+    def __init__(self, root, delay_ms=SAVE_DELAY_MS, max_delay_ms=MAX_SAVE_DELAY_MS):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.stores = {}  # nombre -> (ruta, función que devuelve los datos, on_snapshot, on_written, binaria)
+        self.dirty = set()
+        self.first_dirty_time = None
+        self.timer = None
+
+        self.pending = {}  # nombre -> (copia, marca) aún no escrita (solo la última cuenta)
+        self.failed = {}  # nombre -> (copia, marca) cuya escritura falló; se reintenta en el próximo guardado
+        self.lock = threading.Lock()
+        self.work_ready = threading.Condition(self.lock)
+        self.writing = False
+        self.writer = None
+
+        self.mutations = 0
+        self.writes = 0
+        self.write_time = 0.0
+
+    def register(self, name, path, get_data, on_snapshot=None, on_written=None, binary=False):
+        """Declarar un almacén: 'get_data()' devuelve el diccionario actual
+
+        'on_snapshot()' se llama en el hilo de Tk al copiar los datos y lo que
+        devuelva se pasa a 'on_written(marca)' en el hilo de escritura cuando
+        la copia ya está en disco. Con 'binary' se escribe además la
+        instantánea binaria que load_json_store prueba primero.
+        """
+        self.stores[name] = (path, get_data, on_snapshot, on_written, binary and BINARY_SNAPSHOTS)
+
+    def mark_dirty(self, name):
+        """Anotar que un almacén cambió; se escribirá junto con los cambios cercanos"""
+        self.dirty.add(name)
+        self.mutations += 1
+        now = time.perf_counter()
+        if self.first_dirty_time is None:
+            self.first_dirty_time = now
+
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+        waited_ms = (now - self.first_dirty_time) * 1000
+        delay = max(0, min(self.delay_ms, self.max_delay_ms - waited_ms))
+        self.timer = self.root.after(int(delay), self._save_dirty)
+
+    def _save_dirty(self):
+        """Hilo de Tk: copiar los almacenes sucios y pasárselos al hilo de escritura"""
+        self.timer = None
+        self.first_dirty_time = None
+        with self.lock:
+            if not self.dirty and not self.failed:
+                return
+            copies, self.failed = self.failed, {}
+
+        for name in self.dirty:
+            _, get_data, on_snapshot, _, _ = self.stores[name]
+            copies[name] = (snapshot(get_data()), on_snapshot() if on_snapshot else None)
+        self.dirty.clear()
+        with self.lock:
+            self.pending.update(copies)
+            self.work_ready.notify_all()
+
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, name="json-writer", daemon=True)
+            self.writer.start()
+
+    def _write_loop(self):
+        """Hilo de escritura: volcar cada copia pendiente de forma atómica"""
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.work_ready.wait()
+                batch = self.pending
+                self.pending = {}
+                self.writing = True
+
+            for name, (data, token) in batch.items():
+                path, _, _, on_written, binary = self.stores[name]
+                start = time.perf_counter()
+                try:
+                    write_json_atomic(path, data)
+                except OSError as e:
+                    print(f"⚠️ No se pudo guardar {path}: {e}")
+                    with self.lock:
+                        self.failed.setdefault(name, (data, token))
+                    continue
+                if binary:
+                    try:
+                        write_binary_snapshot(binary_snapshot_path(path), data, path)
+                    except (OSError, ValueError) as e:
+                        # El JSON ya está guardado; sin instantánea se arranca desde él
+                        print(f"⚠️ No se pudo guardar la instantánea binaria de {path}: {e}")
+                if on_written:
+                    on_written(token)
+                with self.lock:
+                    self.writes += 1
+                    self.write_time += time.perf_counter() - start
+
+            with self.lock:
+                self.writing = False
+                self.work_ready.notify_all()
+
+    def flush(self, timeout=10):
+        """Escribir ya todo lo pendiente y esperar a que llegue al disco"""
+        if self.timer is not None:
+            try:
+                self.root.after_cancel(self.timer)
+            except TclError:
+                pass  # La ventana ya se destruyó al salir
+        self._save_dirty()
+
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while self.pending or self.writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print("⚠️ Tiempo agotado esperando a guardar los datos")
+                    return False
+                self.work_ready.wait(remaining)
+        return True
+
+    def stats(self):
+        """Modificaciones anotadas frente a escrituras reales y su tiempo total"""
+        with self.lock:
+            return {'mutations': self.mutations, 'writes': self.writes, 'write_time': self.write_time}
+
+
+def content_fingerprint(path):
+    """Metadatos del contenido de un archivo en disco: tamaño en bytes, mtime y hash SHA-1"""
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {'bytes': stat.st_size, 'mtime': stat.st_mtime, 'hash': digest}
+
+
+def apply_file_operation(data, record):
+    """Aplicar una operación del diario a files_data
+
+    Las operaciones llevan valores completos (no incrementos), así que volver
+    a aplicar un tramo ya incluido en la instantánea deja el mismo resultado.
+    """
+    operation, key = record['op'], record['key']
+    if operation == 'create':
+        data[key] = record['value']
+    elif operation == 'rename':
+        data.pop(key, None)
+        data[record['new_key']] = record['value']
+    elif operation == 'update':
+        if key in data:
+            data[key].update(record['fields'])
+    elif operation == 'delete':
+        data.pop(key, None)
+    else:
+        raise ValueError(f"Operación de diario desconocida: {operation}")
+
+
+class FileCatalog(Mapping):
+    """files_data con índices nombre -> claves y categoría -> claves
+
+    Las claves son '<categoría>_<nombre>', así que un mismo nombre puede
+    estar en varias categorías: el índice por nombre guarda todas sus claves
+    en orden de creación. Los cambios pasan por apply(), que mantiene los
+    índices al día; buscar por nombre es O(1) y filtrar por categoría
+    recorre solo los archivos de esa categoría.
+    """
+
+    def __init__(self, records=None):
+        self.records = {}
+        self.by_name = {}  # nombre -> {clave: registro}, en orden de creación
+        self.by_category = {}  # categoría -> {clave: registro}
+        for key, value in (records or {}).items():
+            self._add(key, value)
+
+    def _add(self, key, value):
+        self.records[key] = value
+        self.by_name.setdefault(value['name'], {})[key] = value
+        self.by_category.setdefault(value['category'], {})[key] = value
+
+    def _remove(self, key):
+        value = self.records.pop(key, None)
+        if value is None:
+            return
+        for index, field in ((self.by_name, 'name'), (self.by_category, 'category')):
+            keys = index[value[field]]
+            del keys[key]
+            if not keys:
+                del index[value[field]]
+
+    def apply(self, record):
+        """Aplicar una operación del diario manteniendo los índices"""
+        operation, key = record['op'], record['key']
+        if operation == 'create':
+            self._remove(key)
+            self._add(key, record['value'])
+        elif operation == 'rename':
+            self._remove(key)
+            self._remove(record['new_key'])
+            self._add(record['new_key'], record['value'])
+        elif operation == 'update':
+            value = self.records.get(key)
+            if value is None:
+                return
+            if 'name' in record['fields'] or 'category' in record['fields']:
+                self._remove(key)
+                value.update(record['fields'])
+                self._add(key, value)
+            else:
+                value.update(record['fields'])
+        elif operation == 'delete':
+            self._remove(key)
+        else:
+            raise ValueError(f"Operación de diario desconocida: {operation}")
+
+    def keys_named(self, name):
+        """Claves de los archivos con ese nombre, en orden de creación"""
+        return list(self.by_name.get(name, ()))
+
+    def find(self, name, category=None):
+        """(clave, registro) del archivo con ese nombre (en 'category' si se indica) o (None, None)"""
+        for key, value in self.by_name.get(name, {}).items():
+            if category is None or value['category'] == category:
+                return key, value
+        return None, None
+
+    def iter_category(self, category):
+        """(clave, registro) de una categoría en orden de creación (vista, sin copiar)"""
+        return self.by_category.get(category, {}).items()
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def items(self):
+        return self.records.items()
+
+
+class FileJournal:
+    """Diario de solo añadido con las operaciones sobre files_data (una línea JSON por operación)
+
+    Cada cambio cuesta lo que ocupa su registro. Al compactar, el diario se
+    aparta a '<ruta>.1' en el mismo instante en que se copia files_data y se
+    borra cuando esa instantánea ya está en disco; al arrancar se reaplican
+    '<ruta>.1' (si quedó de una compactación interrumpida) y el diario. Una
+    última línea a medias por un cierre brusco se descarta.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rotated_path = self.path.with_name(self.path.name + '.1')
+        self.lock = threading.Lock()
+        self.file = None
+        self.records = 0
+        self.bytes = 0
+        self.generation = 0
+
+    def replay(self, data):
+        """Reaplicar sobre 'data' lo pendiente de compactar y abrir el diario para añadir"""
+        applied = 0
+        for path in (self.rotated_path, self.path):
+            applied += self._replay_file(path, data)
+        self.records = applied
+        self.bytes = self.path.stat().st_size if self.path.exists() else 0
+        self.file = open(self.path, 'ab')
+        return applied
+
+    def _replay_file(self, path, data):
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return 0
+
+        applied = 0
+        valid_length = 0
+        for line in content.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break  # Escritura interrumpida: se descarta
+            try:
+                apply_file_operation(data, json.loads(line))
+                applied += 1
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"⚠️ Operación de diario ignorada en {path}: {e}")
+            valid_length += len(line)
+
+        if valid_length < len(content):
+            with open(path, 'r+b') as f:
+                f.truncate(valid_length)
+        return applied
+
+    def append(self, record):
+        """Añadir una operación al final del diario"""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.records += 1
+            self.bytes += len(line)
+
+    def needs_compaction(self):
+        """Si el diario ya es lo bastante largo como para escribir una instantánea"""
+        return self.records >= JOURNAL_COMPACT_RECORDS or self.bytes >= JOURNAL_COMPACT_BYTES
+
+    def rotate(self):
+        """Hilo de Tk, al copiar files_data: apartar el diario y empezar uno vacío"""
+        with self.lock:
+            self.file.close()
+            if self.rotated_path.exists():
+                # La compactación anterior aún no terminó: se acumula en el mismo archivo
+                with open(self.rotated_path, 'ab') as rotated, open(self.path, 'rb') as current:
+                    rotated.write(current.read())
+                os.remove(self.path)
+            elif self.path.exists():
+                os.replace(self.path, self.rotated_path)
+            self.file = open(self.path, 'ab')
+            self.records = 0
+            self.bytes = 0
+            self.generation += 1
+            return self.generation
+
+    def discard_rotated(self, generation):
+        """Hilo de escritura: la instantánea de 'generation' ya está en disco"""
+        with self.lock:
+            # Si hubo otra rotación después, el apartado también contiene sus operaciones
+            if generation == self.generation:
+                try:
+                    os.remove(self.rotated_path)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,339 @@
+"""Registro de imágenes Tk con carga diferida y precarga en segundo plano"""
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import ImageTk
+
+import imagenes
+
+
+# Prioridades de la cola de trabajo: lo que la interfaz pide ya va primero
+PRIORITY_DEMAND = 0
+PRIORITY_WARMUP = 1
+
+# Hilos del pool de carga; Pillow libera el GIL al decodificar, redimensionar y filtrar
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Bytes por banda de los modos PIL que no son de 8 bits
+_MODE_BAND_BYTES = {'I': 4, 'F': 4, 'I;16': 2}
+
+
+def pil_image_bytes(image):
+    """Memoria estimada de los píxeles de una imagen PIL"""
+    width, height = image.size
+    return width * height * len(image.getbands()) * _MODE_BAND_BYTES.get(image.mode, 1)
+
+
+def photo_image_bytes(photo):
+    """Memoria estimada de una imagen Tk (Tk guarda 4 bytes por píxel)"""
+    return photo.width() * photo.height() * 4
+
+
+class MemoryBudget:
+    """Contabilidad LRU de la memoria de píxeles compartida por varias cachés
+
+    Cada caché registra sus entradas con su tamaño estimado y una función
+    que las descarta; al superar el límite se expulsan las menos usadas
+    (saltando las que 'can_evict' diga que siguen en uso) y la caché las
+    volverá a derivar cuando se pidan. 'can_evict' puede consultar a Tk, así
+    que 'enforce' desde otro hilo salta esas entradas y las deja para la
+    siguiente llamada desde el hilo de Tk.
+    """
+
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.entries = OrderedDict()  # (espacio, clave) -> (bytes, on_evict, can_evict)
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def add(self, namespace, key, nbytes, on_evict, can_evict=None):
+        """Registrar (o reemplazar) una entrada como la más reciente"""
+        with self.lock:
+            previous = self.entries.pop((namespace, key), None)
+            if previous:
+                self.total_bytes -= previous[0]
+            self.entries[(namespace, key)] = (nbytes, on_evict, can_evict)
+            self.total_bytes += nbytes
+
+    def touch(self, namespace, key):
+        """Marcar una entrada como usada recientemente"""
+        with self.lock:
+            if (namespace, key) in self.entries:
+                self.entries.move_to_end((namespace, key))
+
+    def remove(self, namespace, key):
+        """Olvidar una entrada que la caché descartó por su cuenta"""
+        with self.lock:
+            entry = self.entries.pop((namespace, key), None)
+            if entry:
+                self.total_bytes -= entry[0]
+
+    def enforce(self):
+        """Expulsar entradas, de la menos a la más reciente, hasta caber en el límite"""
+        tk_thread = threading.current_thread() is threading.main_thread()
+        evicted = []
+        with self.lock:
+            if self.total_bytes <= self.limit_bytes:
+                return 0
+            for entry_key, (nbytes, on_evict, can_evict) in list(self.entries.items()):
+                if self.total_bytes <= self.limit_bytes:
+                    break
+                if can_evict and (not tk_thread or not can_evict()):
+                    continue
+                del self.entries[entry_key]
+                self.total_bytes -= nbytes
+                evicted.append(on_evict)
+            self.evictions += len(evicted)
+
+        # Las cachés descartan fuera del candado para no anidar bloqueos
+        for on_evict in evicted:
+            on_evict()
+        return len(evicted)
+
+    def usage(self):
+        """Uso actual: total, límite y desglose (bytes y entradas) por espacio"""
+        with self.lock:
+            namespaces = {}
+            for (namespace, _), (nbytes, _, _) in self.entries.items():
+                stats = namespaces.setdefault(namespace, {'bytes': 0, 'entries': 0})
+                stats['bytes'] += nbytes
+                stats['entries'] += 1
+            return {
+                'total_bytes': self.total_bytes,
+                'limit_bytes': self.limit_bytes,
+                'evictions': self.evictions,
+                'namespaces': namespaces
+            }
+
+
+class AssetRegistry:
+    """Imágenes Tk por (clave, tamaño) que se cargan la primera vez que se piden
+
+    La primera petición devuelve al instante un placeholder del tamaño final y
+    encola la carga real; el trabajo PIL (decodificar, redimensionar, mejorar)
+    se reparte en un pool de 'workers' hilos y el resultado se pega sobre la
+    misma PhotoImage en el hilo de Tk, así que los widgets que ya la usan se
+    actualizan solos.
+    """
+
+    def __init__(self, root, variant_loader, placeholder_factory, on_complete=None,
+                 workers=DEFAULT_WORKERS, budget=None):
+        self.root = root
+        self.variant_loader = variant_loader  # (clave, tamaño) -> PIL; se llama desde el hilo de fondo
+        self.placeholder_factory = placeholder_factory  # (clave, tamaño) -> PIL; debe ser barato
+        self.on_complete = on_complete
+        self.budget = budget
+        self.photos = {}
+        self.sheets = {}  # nombre -> piezas (clave, tamaño, (x, y)) de una hoja compuesta
+        self.requested = {}  # (clave, tamaño) -> mejor prioridad pedida
+        self.started = set()
+        self.jobs = queue.PriorityQueue()
+        self.results = queue.Queue()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.drain_scheduled = False
+        self.workers = max(1, workers)
+        self.executor = None
+        self.dispatcher = None
+        self.slots = threading.Semaphore(self.workers)
+
+        # Tiempos de la tanda actual: pared desde el primer encargo y suma del trabajo
+        self.batch_start = None
+        self.batch_jobs = 0
+        self.batch_work_time = 0.0
+        self.last_batch = None
+
+    def view(self, keys, size_for):
+        """Vista tipo diccionario (clave -> PhotoImage) para un tamaño por clave"""
+        return LazyImageView(self, keys, size_for)
+
+    def add_sheet(self, name, pieces, size):
+        """Registrar una hoja: varias variantes compuestas en una sola imagen Tk
+
+        'pieces' es una lista de (clave, tamaño, (x, y)); la hoja se pide con
+        get(name, size) como cualquier otra imagen.
+        """
+        self.sheets[name] = [(key, tuple(piece_size), tuple(position)) for key, piece_size, position in pieces]
+
+    def _compose(self, key, size, factory):
+        """Imagen PIL de una clave: variante suelta u hoja compuesta con 'factory'"""
+        pieces = self.sheets.get(key)
+        if pieces is None:
+            return factory(key, size)
+        return imagenes.compose_sheet(
+            [(factory(piece_key, piece_size), position) for piece_key, piece_size, position in pieces], size)
+
+    def get(self, key, size):
+        """PhotoImage de la variante; un placeholder hasta que termine la carga"""
+        size = tuple(size)
+        photo = self.photos.get((key, size))
+        if photo is None:
+            photo = ImageTk.PhotoImage(self._compose(key, size, self.placeholder_factory))
+            self._store_photo(key, size, photo)
+            self.request(key, size, PRIORITY_DEMAND)
+        elif self.budget:
+            self.budget.touch('photo', (key, size))
+        return photo
+
+    def _store_photo(self, key, size, photo):
+        """Guardar una PhotoImage y registrarla en el presupuesto de memoria"""
+        self.photos[(key, size)] = photo
+        if self.budget:
+            self.budget.add(
+                'photo', (key, size), photo_image_bytes(photo),
+                on_evict=lambda: self._evict_photo(key, size),
+                can_evict=lambda: not self._photo_in_use(photo)
+            )
+
+    def _photo_in_use(self, photo):
+        """Si algún widget de Tk está mostrando la imagen"""
+        try:
+            return bool(self.root.tk.getboolean(self.root.tk.call('image', 'inuse', str(photo))))
+        except Exception:
+            return True
+
+    def _evict_photo(self, key, size):
+        """Descartar una PhotoImage; el próximo 'get' la vuelve a cargar"""
+        self.photos.pop((key, size), None)
+        self.requested.pop((key, size), None)
+        with self.lock:
+            self.started.discard((key, size))
+
+    def request(self, key, size, priority=PRIORITY_WARMUP):
+        """Encolar la carga de una variante (o subirle la prioridad si ya estaba en cola)"""
+        previous = self.requested.get((key, size))
+        if previous is not None and previous <= priority:
+            return
+        self.requested[(key, size)] = priority
+
+        with self.lock:
+            if self.outstanding == 0:
+                self.batch_start = time.perf_counter()
+                self.batch_jobs = 0
+                self.batch_work_time = 0.0
+            self.outstanding += 1
+        self.jobs.put((priority, next(self.sequence), key, size))
+
+        if self.dispatcher is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asset-loader")
+            self.dispatcher = threading.Thread(target=self._dispatch, name="asset-dispatcher", daemon=True)
+            self.dispatcher.start()
+        self._schedule_drain()
+
+    def warm_up(self, items):
+        """Precargar en segundo plano una lista de (clave, tamaño)"""
+        for key, size in items:
+            self.request(key, tuple(size), PRIORITY_WARMUP)
+
+    def _dispatch(self):
+        """Hilo de fondo: pasar los encargos al pool respetando la prioridad
+
+        Solo se entregan tantos encargos como hilos libres, así lo que se pide
+        desde la interfaz adelanta a la precarga que aún no empezó.
+        """
+        while True:
+            self.slots.acquire()
+            _, _, key, size = self.jobs.get()
+            try:
+                future = self.executor.submit(self._load, key, size)
+            except RuntimeError:
+                return  # El intérprete se está cerrando: la precarga pendiente ya no hace falta
+            future.add_done_callback(lambda _: self.slots.release())
+
+    def _load(self, key, size):
+        """Hilo del pool: producir la imagen PIL de un encargo"""
+        with self.lock:
+            duplicate = (key, size) in self.started
+            self.started.add((key, size))
+        if duplicate:
+            # Encargo repetido por un cambio de prioridad: ya se cargó o se está cargando
+            self.results.put((key, size, None))
+            return
+
+        start = time.perf_counter()
+        try:
+            image = self._compose(key, size, self.variant_loader)
+        except Exception as e:
+            print(f"❌ Error cargando {key} {size[0]}x{size[1]}: {e}")
+            image = None
+
+        with self.lock:
+            self.batch_jobs += 1
+            self.batch_work_time += time.perf_counter() - start
+        self.results.put((key, size, image))
+
+    def _schedule_drain(self):
+        if not self.drain_scheduled:
+            self.drain_scheduled = True
+            self.root.after(15, self._drain)
+
+    def _drain(self):
+        """Hilo de Tk: crear o actualizar las PhotoImage con lo ya cargado"""
+        self.drain_scheduled = False
+        while True:
+            try:
+                key, size, image = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if image is not None:
+                photo = self.photos.get((key, size))
+                if photo is None:
+                    self._store_photo(key, size, ImageTk.PhotoImage(image))
+                else:
+                    photo.paste(image)
+
+            with self.lock:
+                self.outstanding -= 1
+
+        if self.budget:
+            self.budget.enforce()
+
+        if self.outstanding:
+            self._schedule_drain()
+            return
+
+        if self.batch_start is not None:
+            self.last_batch = {
+                'jobs': self.batch_jobs,
+                'workers': self.workers,
+                'wall_time': time.perf_counter() - self.batch_start,
+                'work_time': self.batch_work_time
+            }
+            self.batch_start = None
+        if self.on_complete:
+            self.on_complete()
+
+
+class LazyImageView(Mapping):
+    """Diccionario de solo lectura que carga cada PhotoImage al primer acceso"""
+
+    def __init__(self, registry, keys, size_for):
+        self.registry = registry
+        self.keys_set = frozenset(keys)
+        self.ordered_keys = list(keys)
+        self.size_for = size_for
+
+    def __getitem__(self, key):
+        if key not in self.keys_set:
+            raise KeyError(key)
+        return self.registry.get(key, self.size_for(key))
+
+    def __contains__(self, key):
+        # Comprobar pertenencia no debe disparar la carga
+        return key in self.keys_set
+
+    def __iter__(self):
+        return iter(self.ordered_keys)
+
+    def __len__(self):
+        return len(self.ordered_keys)
+
@@ -0,0 +1,211 @@
+"""Simulador sin interfaz: ejecuta operaciones sobre el núcleo a máxima velocidad
+
+Uso: python simulador_headless.py [--ops N | --duration SEGUNDOS] [--storage json|sqlite]
+                                  [--seed N] [--dir DIRECTORIO] [--json]
+
+Mezcla sesiones, archivos (crear, buscar, guardar, renombrar, eliminar),
+instalaciones, chat y música sobre un SimulatorCore con HeadlessScheduler,
+y mide operaciones por segundo, latencias p50/p99 por tipo y memoria. Sin
+--dir trabaja en un directorio temporal; con --duration sirve de prueba de
+resistencia.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from nucleo import CoreError, SYSTEM_UTILITIES, HeadlessScheduler, SimulatorCore
+
+
+DEFAULT_OPS = 20000
+
+# Peso relativo de cada operación en la mezcla
+OPERATION_WEIGHTS = {
+    'create': 12,
+    'find': 25,
+    'save': 10,
+    'rename': 8,
+    'delete': 6,
+    'job': 6,
+    'chat': 10,
+    'playlist': 15,
+    'session': 1
+}
+
+
+def memory_kb():
+    """VmRSS y VmHWM del proceso en KB (solo Linux; None si no hay /proc)"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None, None
+    return tuple(int(fields[name].split()[0]) if name in fields else None for name in ('VmRSS', 'VmHWM'))
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class LoadDriver:
+    """Genera operaciones aleatorias (reproducibles con la semilla) contra el núcleo"""
+
+    def __init__(self, core, scheduler, seed):
+        self.core = core
+        self.scheduler = scheduler
+        self.rng = random.Random(seed)
+        self.names = []  # Archivos creados por el driver y aún vivos
+        self.counter = 0
+        self.errors = 0
+        self.operations = list(OPERATION_WEIGHTS)
+        self.weights = [OPERATION_WEIGHTS[operation] for operation in self.operations]
+        self.programs = [name for name in core.programs_data if name not in SYSTEM_UTILITIES]
+
+    def op_create(self):
+        self.counter += 1
+        self.names.append(self.core.create_file(f"carga_{self.counter:07d}", "documents",
+                                                content=f"Contenido {self.counter}\n"))
+
+    def op_find(self):
+        if self.names:
+            self.core.find_file(self.rng.choice(self.names))
+
+    def op_save(self):
+        if self.names:
+            name = self.rng.choice(self.names)
+            key, info = self.core.find_file(name)
+            if key is not None:
+                self.core.save_file(name, info, f"Editado {self.rng.random()}\n")
+
+    def op_rename(self):
+        if self.names:
+            index = self.rng.randrange(len(self.names))
+            self.counter += 1
+            self.names[index] = self.core.rename_file(self.names[index], f"renombrado_{self.counter:07d}")
+
+    def op_delete(self):
+        if self.names:
+            index = self.rng.randrange(len(self.names))
+            self.names[index], self.names[-1] = self.names[-1], self.names[index]
+            self.core.delete_file(self.names.pop())
+
+    def op_job(self):
+        name = self.rng.choice(self.programs)
+        if not self.core.programs_data[name]['installed']:
+            kind = 'install'
+        else:
+            kind = self.rng.choice(['update', 'uninstall'])
+        self.core.start_job(kind, name).run()
+
+    def op_chat(self):
+        self.core.send_message(f"Mensaje {self.counter}", reply_delay_ms=0)
+
+    def op_playlist(self):
+        if self.core.current_song is None:
+            self.core.play_song(self.rng.choice(self.core.songs))
+        else:
+            self.rng.choice([self.core.next_song, self.core.previous_song, self.core.toggle_play_pause])()
+
+    def op_session(self):
+        self.core.logout()
+        self.core.login("admin", "admin123")
+
+    def run(self, ops=None, duration=None):
+        """Ejecutar operaciones hasta 'ops' o 'duration' segundos; devuelve el informe"""
+        latencies = {operation: [] for operation in self.operations}
+        self.core.login("admin", "admin123")
+        start = time.perf_counter()
+        deadline = start + duration if duration else None
+        done = 0
+        while (deadline is None and done < ops) or (deadline is not None and time.perf_counter() < deadline):
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            op_start = time.perf_counter()
+            try:
+                getattr(self, 'op_' + operation)()
+            except CoreError:
+                self.errors += 1
+            # Temporizadores vencidos (respuestas del chat, guardado diferido) como haría el bucle de Tk
+            self.scheduler.run_due()
+            latencies[operation].append(time.perf_counter() - op_start)
+            done += 1
+        elapsed = time.perf_counter() - start
+
+        flush_start = time.perf_counter()
+        self.core.flush_data()
+        flush_time = time.perf_counter() - flush_start
+
+        rss, peak = memory_kb()
+        return {
+            'operations': done,
+            'seconds': elapsed,
+            'ops_per_second': done / elapsed if elapsed else 0.0,
+            'errors': self.errors,
+            'live_files': len(self.names),
+            'chat_messages': len(self.core.chat_messages),
+            'flush_ms': flush_time * 1000,
+            'rss_kb': rss,
+            'peak_rss_kb': peak,
+            'latency_us': {
+                operation: {
+                    'count': len(samples),
+                    'p50': statistics.median(samples) * 1e6,
+                    'p99': percentile(samples, 0.99) * 1e6
+                }
+                for operation, samples in latencies.items() if samples
+            }
+        }
+
+
+def print_report(report, storage):
+    print(f"🚀 {report['operations']} operaciones ({storage}) en {report['seconds']:.2f} s: "
+          f"{report['ops_per_second']:.0f} ops/s, {report['errors']} rechazadas por las reglas")
+    for operation, stats in report['latency_us'].items():
+        print(f"   • {operation:<9} {stats['count']:7d} ops   p50 {stats['p50']:9.1f} µs   p99 {stats['p99']:9.1f} µs")
+    if report['rss_kb'] is not None:
+        print(f"🧠 Memoria: {report['rss_kb'] / 1024:.1f} MB residentes (pico {report['peak_rss_kb'] / 1024:.1f} MB); "
+              f"{report['live_files']} archivos vivos, guardado final {report['flush_ms']:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga sin interfaz sobre el núcleo del simulador")
+    parser.add_argument('--ops', type=int, default=DEFAULT_OPS, help="número de operaciones")
+    parser.add_argument('--duration', type=float, help="segundos de prueba (sustituye a --ops)")
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--seed', type=int, default=21)
+    parser.add_argument('--dir', help="directorio de trabajo (por defecto uno temporal)")
+    parser.add_argument('--json', action='store_true', help="imprimir el informe como JSON")
+    args = parser.parse_args()
+
+    # El núcleo usa rutas relativas (data/, user_files/) como la aplicación
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = args.dir or temporary
+        os.makedirs(directory, exist_ok=True)
+        previous = os.getcwd()
+        os.chdir(directory)
+        # Con --json los mensajes del núcleo van a stderr para no mezclarse con el informe
+        output = sys.stderr if args.json else sys.stdout
+        try:
+            with contextlib.redirect_stdout(output):
+                scheduler = HeadlessScheduler()
+                core = SimulatorCore(scheduler, storage=args.storage)
+                report = LoadDriver(core, scheduler, args.seed).run(args.ops, args.duration)
+                if core.store is not None:
+                    core.store.close()
+        finally:
+            os.chdir(previous)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.storage)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,334 +1,496 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-import json
 import os
 import datetime
-from pathlib import Path
-from PIL import Image, ImageTk, ImageFilter, ImageEnhance
+from PIL import Image, ImageTk
 import random
+import threading
 import time
 
+import imagenes
+from cache_imagenes import IconDiskCache, WallpaperCache
+from lista_virtual import FileListModel, TreeReconciler, VirtualTreeview
+from nucleo import CoreError, SYSTEM_UTILITIES, SimulatorCore
+from paquete_recursos import AssetBundle, bundle_params
+from perfil_arranque import StartupProfiler
+from recursos import AssetRegistry, DEFAULT_WORKERS, MemoryBudget, pil_image_bytes
+
+
+# Imágenes del sistema: clave -> archivo en images/
+IMAGE_FILES = {
+    'avatar_admin': 'images/avatar_admin.png',
+    'avatar_user': 'images/avatar_user.png',
+    'icon_whatsapp': 'images/icon_whatsapp.png',
+    'icon_spotify': 'images/icon_spotify.png',
+    'icon_word': 'images/icon_word.png',
+    'icon_chrome': 'images/icon_chrome.png',
+    'icon_calculator': 'images/icon_calculator.png',
+    'icon_calendar': 'images/icon_calendar.png',
+    'icon_files': 'images/icon_files.png',
+    'icon_programs': 'images/icon_programs.png',
+    'icon_utilities': 'images/icon_utilities.png',
+    'icon_recycle': 'images/icon_recycle.png',
+    'logo_system': 'images/logo_system.png',
+    'icon_start': 'images/icon_start.png',
+    'icon_notepad': 'images/icon_notepad.png',
+    'icon_photoshop': 'images/icon_photoshop.png',
+    'icon_discord': 'images/icon_discord.png',
+    'icon_steam': 'images/icon_steam.png',
+    'icon_zoom': 'images/icon_zoom.png',
+    'icon_vlc': 'images/icon_vlc.png',
+    'icon_excel': 'images/icon_excel.png',
+    'icon_powerpoint': 'images/icon_powerpoint.png',
+    'icon_telegram': 'images/icon_telegram.png',
+    'icon_netflix': 'images/icon_netflix.png',
+    'icon_vscode': 'images/icon_vscode.png',
+    'icon_skype': 'images/icon_skype.png',
+    'icon_adobe': 'images/icon_adobe.png',
+    'icon_outlook': 'images/icon_outlook.png'
+}
+
+# Resoluciones que se pre-renderizan tras el login (además de la pantalla completa)
+COMMON_SCREEN_SIZES = [(1200, 800), (1920, 1080), (2560, 1440)]
+
+# Hilos para decodificar y procesar imágenes (SIMULADOR_WORKERS=1 para carga en serie)
+IMAGE_WORKERS = int(os.environ.get('SIMULADOR_WORKERS', DEFAULT_WORKERS))
+
+# Presupuesto de memoria para píxeles de imágenes (originales, PhotoImage y wallpapers)
+IMAGE_MEMORY_BUDGET = int(os.environ.get('SIMULADOR_IMAGE_BUDGET_MB', 128)) * 1024 * 1024
+
+# Tiempo sin cambios de tamaño tras el cual la vista previa se sustituye por el render final
+RESIZE_SETTLE_MS = 250
+
+# Preset de mejora ('off', 'fast' o 'quality') por clase de recurso; se cambia con
+# SIMULADOR_ENHANCE=fast (todas) o SIMULADOR_ENHANCE=wallpaper=off,icon=fast
+ENHANCE_BY_CLASS = {
+    'icon': 'quality',
+    'avatar': 'quality',
+    'logo': 'quality',
+    'wallpaper': 'fast',
+    'resize_preview': 'off'  # Wallpaper durante el arrastre de la ventana
+}
+
+# Formatos de wallpaper en orden de preferencia (JPEG se decodifica reducido con draft)
+WALLPAPER_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Iconos del escritorio compuestos en una sola hoja (SIMULADOR_ICON_ATLAS=0 para desactivar)
+ICON_ATLAS = os.environ.get('SIMULADOR_ICON_ATLAS', '1') != '0'
+
+# Iconos del escritorio: (icono, texto, x, y)
+DESKTOP_ICON_LAYOUT = [
+    ("files", "Archivos", 50, 50),
+    ("programs", "Programas", 50, 150),
+    ("utilities", "Utilerías", 50, 250),
+    ("recycle", "Papelera", 50, 350),
+    ("whatsapp", "WhatsApp", 150, 50),
+    ("spotify", "Spotify", 150, 150),
+    ("calculator", "Calculadora", 150, 250),
+    ("calendar", "Calendario", 150, 350)
+]
+
+
+def target_size_for(key):
+    """Tamaño de visualización según el tipo de imagen"""
+    if 'avatar' in key:
+        return (120, 120)  # Más grande para login
+    elif 'icon_' in key:
+        return (64, 64)
+    elif 'logo' in key:
+        return (160, 160)
+    elif key == 'icon_start':
+        return (32, 32)
+    elif '_bg' in key:
+        return (400, 300)
+    else:
+        return (64, 64)
+
+
+def load_enhance_config(spec):
+    """Aplicar a ENHANCE_BY_CLASS una configuración 'preset' o 'clase=preset,...'"""
+    for part in filter(None, (piece.strip() for piece in spec.split(','))):
+        asset_class, _, preset = part.rpartition('=')
+        if preset not in imagenes.ENHANCE_PRESETS or (asset_class and asset_class not in ENHANCE_BY_CLASS):
+            print(f"⚠️ Configuración de mejora ignorada: {part}")
+            continue
+        for name in ([asset_class] if asset_class else ENHANCE_BY_CLASS):
+            ENHANCE_BY_CLASS[name] = preset
+
+
+load_enhance_config(os.environ.get('SIMULADOR_ENHANCE', ''))
+
+
+def asset_class_for(key):
+    """Clase de recurso de una clave de imagen (para elegir su preset de mejora)"""
+    if key.startswith('wallpaper_'):
+        return 'wallpaper'
+    if 'avatar' in key:
+        return 'avatar'
+    if 'logo' in key:
+        return 'logo'
+    return 'icon'
+
+
+def enhance_params(asset_class):
+    """Pasos de mejora configurados para una clase de recurso"""
+    return imagenes.ENHANCE_PRESETS[ENHANCE_BY_CLASS[asset_class]]
+
+
+def wallpaper_path(wallpaper_name):
+    """Archivo del wallpaper: PNG o, si no hay, una foto JPEG con el mismo nombre"""
+    for extension in WALLPAPER_EXTENSIONS:
+        path = f'images/wallpaper_{wallpaper_name}{extension}'
+        if os.path.exists(path):
+            return path
+    return f'images/wallpaper_{wallpaper_name}.png'
+
+
 class SimuladorSO:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("Sistema Operativo - Simulador")
-        self.root.geometry("1200x800")
-        self.root.configure(bg="#0078d4")
-        
-        # Variables del sistema
-        self.current_user = None
-        self.user_type = None
-        self.files_data = {}
-        self.programs_data = {}
+    def __init__(self, profiler=None):
+        # Mediciones del arranque (--profile-startup / SIMULADOR_PROFILE_STARTUP)
+        self.profiler = profiler or StartupProfiler()
+        with self.profiler.phase('tk_root'):
+            self.root = tk.Tk()
+            self.root.title("Sistema Operativo - Simulador")
+            self.root.geometry("1200x800")
+            self.root.configure(bg="#0078d4")
+        
+        # Estado y reglas del sistema (sin Tk); esta clase es solo su vista
+        with self.profiler.phase('core'):
+            self.core = SimulatorCore(self.root, profiler=self.profiler)
+        self.core.subscribe(self.on_core_change)
+        self.file_list_model = FileListModel(self.core)  # Orden del gestor de archivos, al día con cada cambio
         self.open_windows = []
         self.taskbar_buttons = []
         self.start_menu_open = False
         self.utilities_panel_open = False
         
-        # Cache de imágenes mejorado
-        self.image_cache = {}
+        # Cache de imágenes mejorado: cada imagen se carga la primera vez que se usa
+        self.memory_budget = MemoryBudget(IMAGE_MEMORY_BUDGET)  # LRU común a todas las cachés
+        self.bundle = AssetBundle.open_if_present(ENHANCE_BY_CLASS)  # Paquete mmap; None = archivos sueltos
         self.original_images = {}
-        self.program_icons_small = {}  # Para iconos pequeños del gestor
-        
-        # Variables para aplicaciones mejoradas
-        self.whatsapp_messages = [
-            {"sender": "Contacto", "message": "¡Hola! ¿Cómo estás?", "time": "10:30"},
-            {"sender": "Tú", "message": "¡Hola! Todo bien, gracias", "time": "10:31"},
-            {"sender": "Contacto", "message": "¿Qué tal el trabajo?", "time": "10:32"},
-            {"sender": "Tú", "message": "Muy bien, trabajando", "time": "10:33"}
-        ]
-        
-        self.spotify_songs = [
-            {"title": "Bohemian Rhapsody", "artist": "Queen", "duration": "5:55", "playing": False},
-            {"title": "Imagine", "artist": "John Lennon", "duration": "3:07", "playing": False},
-            {"title": "Hotel California", "artist": "Eagles", "duration": "6:30", "playing": False},
-            {"title": "Stairway to Heaven", "artist": "Led Zeppelin", "duration": "8:02", "playing": False},
-            {"title": "Sweet Child O' Mine", "artist": "Guns N' Roses", "duration": "5:03", "playing": False}
-        ]
-        self.current_song = None
-        self.is_playing = False
-        
-        # Crear directorios necesarios
-        self.setup_directories()
-        
-        # FORZAR recreación de datos de programas
-        self.force_recreate_programs_data()
-        
-        # Cargar datos
-        self.load_data()
+        self.pyramid_locks = {}  # Un candado por icono para generar su pirámide una sola vez
+        self.pyramid_locks_guard = threading.Lock()
+        self.icon_cache = IconDiskCache('data/cache/icons', bundle_params(ENHANCE_BY_CLASS))  # Variantes ya procesadas en disco
+        self.assets = AssetRegistry(
+            self.root,
+            self.load_asset_variant,
+            self.create_high_quality_placeholder,
+            on_complete=self.on_assets_loaded,
+            workers=IMAGE_WORKERS,
+            budget=self.memory_budget
+        )
+        self.image_cache = self.assets.view(IMAGE_FILES, self.get_target_size)
+        self.program_icons_small = self.assets.view(  # Para iconos pequeños del gestor
+            [key for key in IMAGE_FILES if key.startswith('icon_')],
+            lambda key: (20, 20)
+        )
+        self.desktop_sheet = None  # (origen, tamaño) de la hoja de iconos del escritorio
+        if ICON_ATLAS:
+            self.register_desktop_sheet()
+        self.wallpaper_cache = WallpaperCache(  # Renders por resolución
+            self.render_wallpaper_image,
+            budget=self.memory_budget
+        )
+        self.wallpaper_sources = {}  # Wallpapers decodificados: nombre -> (mtime, tamaño original, factor, imagen)
+        self.wallpaper_previews = {}  # Copias de resolución media para redimensionar en vivo
+        self.maximized_size = None  # Área de cliente real al maximizar (se mide en el primer <Configure>)
+        self.desktop_bg_size = None
+        self.resize_frame_times = []  # Duración (s) de cada frame de vista previa del arrastre actual
         
         # Cargar imágenes desde archivos
-        self.load_images()
+        with self.profiler.phase('load_images'):
+            self.load_images()
         
         # Mostrar pantalla de login
-        self.show_login()
-        
-    def setup_directories(self):
-        """Crear directorios necesarios para el sistema"""
-        directories = ['data', 'data/files', 'data/programs', 'data/users', 'images', 'user_files', 'user_files/documents', 'user_files/images', 'user_files/music', 'user_files/videos']
-        for directory in directories:
-            Path(directory).mkdir(parents=True, exist_ok=True)
-    
-    def force_recreate_programs_data(self):
-        """FORZAR la recreación completa de datos de programas - HASTA OUTLOOK"""
-        print("🔄 FORZANDO recreación de datos de programas...")
-        
-        # Eliminar archivo existente si existe
-        programs_file = 'data/programs/programs.json'
-        if os.path.exists(programs_file):
-            os.remove(programs_file)
-            print("🗑️ Archivo anterior eliminado")
-        
-        # Crear datos completos desde cero 
-        self.programs_data = {
-            # Aplicaciones principales instaladas (con funcionalidad completa)
-            "WhatsApp": {"version": "2.23.1", "installed": True, "size": "150 MB", "icon": "whatsapp", "uninstallable": True},
-            "Spotify": {"version": "1.2.13", "installed": True, "size": "280 MB", "icon": "spotify", "uninstallable": True},
-            "Chrome": {"version": "120.0", "installed": True, "size": "200 MB", "icon": "chrome", "uninstallable": True},
-            
-            # Utilerías del sistema (NO desinstalables, siempre funcionales)
-            "Calculadora": {"version": "1.0", "installed": True, "size": "5 MB", "icon": "calculator", "uninstallable": False},
-            "Calendario": {"version": "1.0", "installed": True, "size": "8 MB", "icon": "calendar", "uninstallable": False},
-            "Bloc de Notas": {"version": "1.0", "installed": True, "size": "2 MB", "icon": "notepad", "uninstallable": False},
-            "Explorador de Archivos": {"version": "1.0", "installed": True, "size": "25 MB", "icon": "files", "uninstallable": False},
-            "Gestor de Programas": {"version": "1.0", "installed": True, "size": "12 MB", "icon": "programs", "uninstallable": False},
-            "Monitor Sistema": {"version": "1.0", "installed": True, "size": "8 MB", "icon": "utilities", "uninstallable": False},
-            
-            # TODOS los programas adicionales (NO INSTALADOS inicialmente) 
-            "Word": {"version": "16.0", "installed": False, "size": "1.2 GB", "icon": "word", "uninstallable": True},
-            "Excel": {"version": "16.0", "installed": False, "size": "1.1 GB", "icon": "excel", "uninstallable": True},
-            "PowerPoint": {"version": "16.0", "installed": False, "size": "1.0 GB", "icon": "powerpoint", "uninstallable": True},
-            "Photoshop": {"version": "24.0", "installed": False, "size": "2.8 GB", "icon": "photoshop", "uninstallable": True},
-            "Discord": {"version": "1.0.9", "installed": False, "size": "120 MB", "icon": "discord", "uninstallable": True},
-            "Steam": {"version": "3.4.1", "installed": False, "size": "1.5 GB", "icon": "steam", "uninstallable": True},
-            "Zoom": {"version": "5.16.2", "installed": False, "size": "180 MB", "icon": "zoom", "uninstallable": True},
-            "VLC Media Player": {"version": "3.0.18", "installed": False, "size": "95 MB", "icon": "vlc", "uninstallable": True},
-            "Telegram": {"version": "4.9.3", "installed": False, "size": "85 MB", "icon": "telegram", "uninstallable": True},
-            "Netflix": {"version": "6.98.1", "installed": False, "size": "150 MB", "icon": "netflix", "uninstallable": True},
-            "Visual Studio Code": {"version": "1.84.2", "installed": False, "size": "350 MB", "icon": "vscode", "uninstallable": True},
-            "Skype": {"version": "8.98.0", "installed": False, "size": "75 MB", "icon": "skype", "uninstallable": True},
-            "Adobe Illustrator": {"version": "28.0", "installed": False, "size": "2.2 GB", "icon": "adobe", "uninstallable": True},
-            "Outlook": {"version": "16.0", "installed": False, "size": "800 MB", "icon": "outlook", "uninstallable": True}
-        }
-        
-        # Guardar inmediatamente
-        self.save_programs_data()
-        
-        print(f"✅ Datos recreados con {len(self.programs_data)} programas")
-        print("📋 Programas disponibles:")
-        for name, info in self.programs_data.items():
-            status = "✅ Instalado" if info['installed'] else "❌ No instalado"
-            print(f"   • {name}: {status}")
-            
-    def load_images(self):
-        """Cargar todas las imágenes desde archivos con alta calidad"""
-        image_files = {
-            'avatar_admin': 'images/avatar_admin.png',
-            'avatar_user': 'images/avatar_user.png',
-            'icon_whatsapp': 'images/icon_whatsapp.png',
-            'icon_spotify': 'images/icon_spotify.png',
-            'icon_word': 'images/icon_word.png',
-            'icon_chrome': 'images/icon_chrome.png',
-            'icon_calculator': 'images/icon_calculator.png',
-            'icon_calendar': 'images/icon_calendar.png',
-            'icon_files': 'images/icon_files.png',
-            'icon_programs': 'images/icon_programs.png',
-            'icon_utilities': 'images/icon_utilities.png',
-            'icon_recycle': 'images/icon_recycle.png',
-            'logo_system': 'images/logo_system.png',
-            'icon_start': 'images/icon_start.png',
-            'icon_notepad': 'images/icon_notepad.png',
-            'icon_photoshop': 'images/icon_photoshop.png',
-            'icon_discord': 'images/icon_discord.png',
-            'icon_steam': 'images/icon_steam.png',
-            'icon_zoom': 'images/icon_zoom.png',
-            'icon_vlc': 'images/icon_vlc.png',
-            'icon_excel': 'images/icon_excel.png',
-            'icon_powerpoint': 'images/icon_powerpoint.png',
-            'icon_telegram': 'images/icon_telegram.png',
-            'icon_netflix': 'images/icon_netflix.png',
-            'icon_vscode': 'images/icon_vscode.png',
-            'icon_skype': 'images/icon_skype.png',
-            'icon_adobe': 'images/icon_adobe.png',
-            'icon_outlook': 'images/icon_outlook.png'
-        }
+        with self.profiler.phase('show_login'):
+            self.show_login()
         
-        for key, path in image_files.items():
-            try:
-                if os.path.exists(path):
-                    original_image = Image.open(path)
-                    if original_image.mode != 'RGBA':
-                        original_image = original_image.convert('RGBA')
-                    
-                    self.original_images[key] = original_image
-                    optimized_image = self.optimize_image(original_image, key)
-                    self.image_cache[key] = ImageTk.PhotoImage(optimized_image)
-                    
-                    # Crear versión pequeña para el gestor de programas
-                    if key.startswith('icon_'):
-                        small_image = self.progressive_resize(original_image, (20, 20))
-                        small_image = self.enhance_image_quality(small_image)
-                        self.program_icons_small[key] = ImageTk.PhotoImage(small_image)
-                else:
-                    placeholder = self.create_high_quality_placeholder(key)
-                    self.original_images[key] = placeholder
-                    self.image_cache[key] = ImageTk.PhotoImage(placeholder)
-                    
-                    # Crear versión pequeña del placeholder
-                    if key.startswith('icon_'):
-                        small_placeholder = self.progressive_resize(placeholder, (20, 20))
-                        self.program_icons_small[key] = ImageTk.PhotoImage(small_placeholder)
-            except Exception as e:
-                print(f"❌ Error cargando {path}: {e}")
-                placeholder = self.create_high_quality_placeholder(key)
-                self.original_images[key] = placeholder
-                self.image_cache[key] = ImageTk.PhotoImage(placeholder)
-                
-                # Crear versión pequeña del placeholder
-                if key.startswith('icon_'):
-                    small_placeholder = self.progressive_resize(placeholder, (20, 20))
-                    self.program_icons_small[key] = ImageTk.PhotoImage(small_placeholder)
+    # Estado del núcleo que consulta la vista
+    users_data = property(lambda self: self.core.users_data)
+    files_data = property(lambda self: self.core.files_data)
+    programs_data = property(lambda self: self.core.programs_data)
+    current_user = property(lambda self: self.core.current_user)
+    user_type = property(lambda self: self.core.user_type)
+    whatsapp_messages = property(lambda self: self.core.chat_messages)
+    spotify_songs = property(lambda self: self.core.songs)
+    current_song = property(lambda self: self.core.current_song)
+    is_playing = property(lambda self: self.core.is_playing)
+
+    def on_core_change(self, topic):
+        """Refrescar las partes abiertas de la interfaz que muestran lo que cambió"""
+        try:
+            if topic == 'files' and hasattr(self, 'file_list'):
+                self.file_list.refresh()
+            elif topic == 'programs' and hasattr(self, 'programs_tree'):
+                self.refresh_programs_list()
+            elif topic == 'chat' and hasattr(self, 'chat_content'):
+                self.display_whatsapp_messages()
+            elif topic == 'playlist' and hasattr(self, 'songs_content'):
+                self.update_now_playing()
+                self.display_spotify_songs()
+        except tk.TclError:
+            pass  # La ventana de esa aplicación ya se cerró
 
-    def optimize_image(self, image, key):
-        """Optimizar imagen según su tipo con alta calidad"""
-        if 'avatar' in key:
-            target_size = (120, 120)  # Más grande para login
-        elif 'icon_' in key:
-            target_size = (64, 64)
-        elif 'logo' in key:
-            target_size = (160, 160)
-        elif key == 'icon_start':
-            target_size = (32, 32)
-        elif '_bg' in key:
-            target_size = (400, 300)
+    def load_images(self):
+        """Registrar las imágenes del sistema y precargarlas en segundo plano
+
+        Nada se decodifica aquí: lo que la interfaz pide antes de terminar la
+        precarga recibe un placeholder que se sustituye al cargarse.
+        """
+        if ICON_ATLAS:
+            # Los iconos del escritorio llegan a Tk dentro de su hoja, no uno por uno
+            warm_up = [(key, self.get_target_size(key)) for key in IMAGE_FILES
+                       if not key.startswith('icon_') or key == 'icon_start']
+            warm_up.append(('desktop_icons', self.desktop_sheet[1]))
         else:
-            target_size = (64, 64)
-        
-        optimized = self.progressive_resize(image, target_size)
-        optimized = self.enhance_image_quality(optimized)
-        return optimized
+            warm_up = [(key, self.get_target_size(key)) for key in IMAGE_FILES]
+        # Las filas de Treeview no pueden recortar una hoja: cada icono pequeño es su imagen Tk
+        warm_up += [(key, (20, 20)) for key in self.program_icons_small]
+        self.assets.warm_up(warm_up)
+
+    def register_desktop_sheet(self):
+        """Registrar la hoja con los iconos del escritorio ya colocados en su sitio"""
+        origin_x = min(x for _, _, x, _ in DESKTOP_ICON_LAYOUT)
+        origin_y = min(y for _, _, _, y in DESKTOP_ICON_LAYOUT)
+        size = (
+            max(x for _, _, x, _ in DESKTOP_ICON_LAYOUT) - origin_x + 64,
+            max(y for _, _, _, y in DESKTOP_ICON_LAYOUT) - origin_y + 64
+        )
+        self.assets.add_sheet('desktop_icons', [
+            (f'icon_{icon_name}', (64, 64), (x - origin_x, y - origin_y))
+            for icon_name, _, x, y in DESKTOP_ICON_LAYOUT
+        ], size)
+        self.desktop_sheet = ((origin_x, origin_y), size)
+
+    def get_tk_image_stats(self):
+        """Imágenes vivas en Tk y memoria estimada de sus píxeles (4 bytes por píxel)"""
+        names = self.root.image_names()
+        total_bytes = 0
+        for name in names:
+            width = int(self.root.tk.call('image', 'width', name))
+            height = int(self.root.tk.call('image', 'height', name))
+            total_bytes += width * height * 4
+        return len(names), total_bytes
+
+    def report_tk_images(self, context):
+        """Mostrar cuántas imágenes tiene Tk tras construir una parte de la interfaz"""
+        count, total_bytes = self.get_tk_image_stats()
+        print(f"🧩 Imágenes Tk tras {context}: {count} ({total_bytes / 1024:.0f} KB, "
+              f"atlas {'activado' if ICON_ATLAS else 'desactivado'})")
+
+    def load_asset_variant(self, key, target_size):
+        """Imagen final de una clave a un tamaño (se llama desde el hilo de carga)"""
+        if self.bundle:
+            image = self.bundle.get_variant(key, target_size)
+            if image is not None:
+                return image
+        
+        path = IMAGE_FILES.get(key)
+        if path and os.path.exists(path):
+            return self.load_derived_image(key, target_size)
+        return self.create_high_quality_placeholder(key, target_size)
+
+    def on_assets_loaded(self):
+        """Guardar el índice de la caché cuando la cola de carga queda vacía"""
+        self.icon_cache.save()
+        batch = self.assets.last_batch
+        if batch and batch['jobs']:
+            print(f"🗂️ {batch['jobs']} imágenes cargadas con {batch['workers']} hilos: "
+                  f"{batch['wall_time'] * 1000:.0f} ms de reloj frente a {batch['work_time'] * 1000:.0f} ms "
+                  f"de trabajo en serie (caché: {self.icon_cache.hits} aciertos, {self.icon_cache.misses} fallos)")
+        if self.bundle and self.bundle.hits:
+            # Cada imagen del paquete ahorra al menos stat + open + read del archivo suelto
+            print(f"📦 {self.bundle.hits} imágenes desde el paquete en {self.bundle.decode_time * 1000:.0f} ms "
+                  f"(~{self.bundle.hits * 3} llamadas al sistema evitadas)")
+
+    def get_original_image(self, key):
+        """Imagen original en RGBA (se decodifica de nuevo si el presupuesto la expulsó)"""
+        original_image = self.original_images.get(key)
+        if original_image is not None:
+            self.memory_budget.touch('original', key)
+            return original_image
+        
+        path = IMAGE_FILES.get(key)
+        original_image = self.bundle.get_image(key) if self.bundle else None
+        if original_image is None and path and os.path.exists(path):
+            original_image = Image.open(path)
+        
+        if original_image is None:
+            original_image = self.create_high_quality_placeholder(key)
+        elif original_image.mode != 'RGBA':
+            original_image = original_image.convert('RGBA')
+        
+        self.original_images[key] = original_image
+        self.memory_budget.add(
+            'original', key, pil_image_bytes(original_image),
+            on_evict=lambda: self.original_images.pop(key, None)
+        )
+        self.memory_budget.enforce()
+        return original_image
+
+    def get_memory_usage(self):
+        """Memoria estimada de las imágenes en caché (total, límite y desglose)"""
+        return self.memory_budget.usage()
+
+    def load_derived_image(self, key, target_size):
+        """Obtener una variante redimensionada y mejorada, usando la caché en disco
+
+        Los iconos a tamaños de la pirámide se generan todos juntos la primera
+        vez que falta alguno; el resto de tamaños se derivan sueltos.
+        """
+        path = IMAGE_FILES.get(key)
+        params = enhance_params(asset_class_for(key))
+        
+        if not path or not os.path.exists(path):
+            return imagenes.derive_variant(self.get_original_image(key), target_size, params)
+        
+        image = self.icon_cache.get(path, target_size, params)
+        if image is not None:
+            return image
+        
+        if key.startswith('icon_') and self.is_pyramid_size(target_size):
+            with self.get_pyramid_lock(key):
+                # Otro hilo pudo generar la pirámide mientras se esperaba el candado
+                image = self.icon_cache.get(path, target_size, params)
+                if image is None:
+                    pyramid = imagenes.build_icon_pyramid(self.get_original_image(key), params=params)
+                    for size, level in pyramid.items():
+                        self.icon_cache.put(path, (size, size), params, level)
+                    image = pyramid[target_size[0]]
+            return image
+        
+        image = imagenes.derive_variant(self.get_original_image(key), target_size, params)
+        self.icon_cache.put(path, target_size, params, image)
+        return image
 
-    def progressive_resize(self, image, target_size):
-        """Redimensionamiento progresivo para mejor calidad"""
-        current_size = image.size
-        target_width, target_height = target_size
-        
-        if current_size[0] > target_width * 2 or current_size[1] > target_height * 2:
-            intermediate_size = (target_width * 2, target_height * 2)
-            image = image.resize(intermediate_size, Image.Resampling.LANCZOS)
-        
-        final_image = image.resize(target_size, Image.Resampling.LANCZOS)
-        return final_image
+    def is_pyramid_size(self, size):
+        """Si un tamaño (ancho, alto) es uno de los niveles de la pirámide de iconos"""
+        return size[0] == size[1] and size[0] in imagenes.ICON_PYRAMID_SIZES
 
-    def enhance_image_quality(self, image):
-        """Mejorar la calidad de la imagen"""
-        try:
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.1)
-            
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.05)
-            
-            image = image.filter(ImageFilter.SMOOTH_MORE)
-        except Exception as e:
-            print(f"⚠️ Error mejorando calidad: {e}")
-        
-        return image
+    def get_pyramid_lock(self, key):
+        """Candado para generar la pirámide de un icono"""
+        with self.pyramid_locks_guard:
+            return self.pyramid_locks.setdefault(key, threading.Lock())
+
+    def get_icon(self, name, size):
+        """PhotoImage de un icono ('files' o 'icon_files') a un tamaño de la pirámide"""
+        key = name if name.startswith('icon_') else f'icon_{name}'
+        if key not in IMAGE_FILES:
+            raise KeyError(f"Icono desconocido: {name}")
+        if size not in imagenes.ICON_PYRAMID_SIZES:
+            raise ValueError(f"Tamaño de icono no disponible: {size} (válidos: {imagenes.ICON_PYRAMID_SIZES})")
+        return self.assets.get(key, (size, size))
+
+    def get_target_size(self, key):
+        """Tamaño de visualización según el tipo de imagen"""
+        return target_size_for(key)
+
+    def optimize_image(self, image, key):
+        """Optimizar imagen según su tipo con alta calidad"""
+        return imagenes.derive_variant(image, self.get_target_size(key), enhance_params(asset_class_for(key)))
 
     def load_wallpaper(self, wallpaper_name, target_width, target_height):
-        """Cargar wallpaper ajustado al tamaño específico con alta calidad"""
-        path = f'images/wallpaper_{wallpaper_name}.png'
+        """Cargar wallpaper ajustado al tamaño específico (reutiliza renders cacheados)"""
+        image = self.wallpaper_cache.get_or_render(wallpaper_name, target_width, target_height)
+        return ImageTk.PhotoImage(image)
+
+    def render_wallpaper_image(self, wallpaper_name, target_width, target_height):
+        """Renderizar un wallpaper con alta calidad (sin Tk, apto para hilos de fondo)"""
+        path = wallpaper_path(wallpaper_name)
         
         try:
+            if self.bundle:
+                image = self.bundle.get_variant(f'wallpaper_{wallpaper_name}', (target_width, target_height))
+                if image is not None:
+                    return image
+                image = self.bundle.get_image(f'wallpaper_{wallpaper_name}')
+                if image is not None:
+                    image = imagenes.reduce_to_cover(image.convert('RGB'), (target_width, target_height))
+                    return imagenes.fit_wallpaper(image, target_width, target_height, enhance_params('wallpaper'))
+            
             if os.path.exists(path):
-                image = Image.open(path)
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                
-                # Obtener dimensiones originales
-                orig_width, orig_height = image.size
-                
-                # Calcular escala para cubrir completamente la pantalla
-                scale_x = target_width / orig_width
-                scale_y = target_height / orig_height
-                scale = max(scale_x, scale_y)  # Usar el mayor para cubrir toda la pantalla
-                
-                # Nuevas dimensiones
-                new_width = int(orig_width * scale)
-                new_height = int(orig_height * scale)
-                
-                # Redimensionar con alta calidad
-                if scale != 1.0:
-                    # Usar redimensionamiento progresivo para mejor calidad
-                    if scale < 0.5:
-                        # Si se reduce mucho, hacer en pasos
-                        intermediate_scale = scale * 2
-                        intermediate_width = int(orig_width * intermediate_scale)
-                        intermediate_height = int(orig_height * intermediate_scale)
-                        image = image.resize((intermediate_width, intermediate_height), Image.Resampling.LANCZOS)
-                    
-                    image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Recortar si es necesario para ajustar exactamente
-                if new_width > target_width or new_height > target_height:
-                    left = (new_width - target_width) // 2
-                    top = (new_height - target_height) // 2
-                    right = left + target_width
-                    bottom = top + target_height
-                    image = image.crop((left, top, right, bottom))
-                
-                # Si la imagen es más pequeña, centrarla en un fondo
-                elif new_width < target_width or new_height < target_height:
-                    background = Image.new('RGB', (target_width, target_height), (30, 58, 138))  # Color de fondo
-                    paste_x = (target_width - new_width) // 2
-                    paste_y = (target_height - new_height) // 2
-                    background.paste(image, (paste_x, paste_y))
-                    image = background
-                
-                # Mejorar calidad final
-                image = self.enhance_image_quality(image)
-                return ImageTk.PhotoImage(image)
-                
+                image = self.get_wallpaper_source(wallpaper_name, path, (target_width, target_height))
+                return imagenes.fit_wallpaper(image, target_width, target_height, enhance_params('wallpaper'))
             else:
-                return self.create_placeholder_wallpaper(target_width, target_height, wallpaper_name)
+                return imagenes.placeholder_wallpaper(target_width, target_height, wallpaper_name)
                 
         except Exception as e:
             print(f"❌ Error cargando wallpaper {path}: {e}")
-            return self.create_placeholder_wallpaper(target_width, target_height, wallpaper_name)
+            return imagenes.placeholder_wallpaper(target_width, target_height, wallpaper_name)
+
+    def get_wallpaper_source(self, wallpaper_name, path, target_size=None):
+        """Wallpaper decodificado en RGB con resolución suficiente para cubrir 'target_size'
+
+        Se decodifica reducido (draft de JPEG o reduce) y se reutiliza mientras
+        no cambie en disco y cubra el tamaño pedido; una petición mayor vuelve
+        a decodificarlo con menos reducción.
+        """
+        mtime = os.path.getmtime(path)
+        cached = self.wallpaper_sources.get(wallpaper_name)
+        if cached and cached[0] == mtime:
+            _, source_size, factor, image = cached
+            if target_size is None:
+                if factor == 1:
+                    return image
+            elif factor <= imagenes.reduction_factor(source_size, target_size):
+                return image
+        
+        image, source_size, factor = imagenes.open_reduced(path, target_size)
+        self.wallpaper_sources[wallpaper_name] = (mtime, source_size, factor, image)
+        return image
+
+    def get_wallpaper_preview_source(self, wallpaper_name):
+        """Copia de resolución media del wallpaper para previsualizar redimensionamientos"""
+        if wallpaper_name not in self.wallpaper_previews:
+            path = wallpaper_path(wallpaper_name)
+            try:
+                if os.path.exists(path):
+                    source = imagenes.reduce_for_preview(self.get_wallpaper_source(wallpaper_name, path, (960, 640)))
+                else:
+                    source = imagenes.placeholder_wallpaper(960, 640, wallpaper_name)
+            except Exception as e:
+                print(f"❌ Error cargando vista previa {path}: {e}")
+                source = imagenes.placeholder_wallpaper(960, 640, wallpaper_name)
+            self.wallpaper_previews[wallpaper_name] = source
+        return self.wallpaper_previews[wallpaper_name]
+
+    def prerender_wallpapers(self, wallpaper_names):
+        """Pre-renderizar en segundo plano los wallpapers para resoluciones habituales"""
+        sizes = COMMON_SCREEN_SIZES + [self.get_maximized_size()]
+        # De mayor a menor: la fuente decodificada para la primera cubre las siguientes
+        sizes = sorted(set(sizes), key=lambda size: size[0] * size[1], reverse=True)
+        self.wallpaper_cache.prerender(wallpaper_names, sizes)
+
+    def get_maximized_size(self):
+        """Área de cliente de la ventana maximizada
+
+        Es menor que la pantalla (bordes, barra de tareas). Hasta que la
+        ventana se maximiza por primera vez se usa wm_maxsize(), que ya
+        descuenta los bordes en la mayoría de gestores de ventanas.
+        """
+        if self.maximized_size is not None:
+            return self.maximized_size
+        width, height = self.root.wm_maxsize()
+        return (min(width, self.root.winfo_screenwidth()), min(height, self.root.winfo_screenheight()))
+
+    def is_maximized(self):
+        """Si la ventana principal está maximizada ('zoomed'; en X11 es un atributo)"""
+        try:
+            return self.root.state() == 'zoomed' or bool(self.root.attributes('-zoomed'))
+        except tk.TclError:
+            return False
 
     def create_placeholder_wallpaper(self, width, height, wallpaper_type):
         """Crear wallpaper placeholder de alta calidad"""
-        if 'admin' in wallpaper_type:
-            color1 = (30, 58, 138)
-            color2 = (59, 130, 246)
-        elif 'user' in wallpaper_type:
-            color1 = (34, 197, 94)
-            color2 = (16, 185, 129)
-        else:
-            color1 = (88, 28, 135)
-            color2 = (147, 51, 234)
-        
-        image = self.create_gradient(width, height, color1, color2)
+        image = imagenes.placeholder_wallpaper(width, height, wallpaper_type)
         return ImageTk.PhotoImage(image)
 
-    def create_gradient(self, width, height, color1, color2):
-        """Crear un gradiente suave entre dos colores"""
-        image = Image.new('RGB', (width, height))
-        pixels = image.load()
-        
-        for y in range(height):
-            factor = y / height
-            r = int(color1[0] * (1 - factor) + color2[0] * factor)
-            g = int(color1[1] * (1 - factor) + color2[1] * factor)
-            b = int(color1[2] * (1 - factor) + color2[2] * factor)
-            
-            for x in range(width):
-                pixels[x, y] = (r, g, b)
-        
-        return image
+    def create_gradient(self, width, height, color1, color2, direction='vertical'):
+        """Crear un gradiente suave entre dos colores (vertical, horizontal o diagonal)"""
+        return imagenes.linear_gradient(width, height, color1, color2, direction)
 
-    def create_high_quality_placeholder(self, key):
-        """Crear imagen placeholder de alta calidad"""
+    def create_high_quality_placeholder(self, key, target_size=None):
+        """Crear imagen placeholder de alta calidad (opcionalmente a un tamaño dado)"""
         if 'avatar' in key:
             size = (120, 120)  # Más grande para login
             if 'admin' in key:
@@ -354,77 +516,13 @@ class SimuladorSO:
             color1 = (128, 128, 128)
             color2 = (156, 163, 175)
         
-        image = self.create_circular_gradient(size, color1, color2)
+        image = self.create_circular_gradient(target_size or size, color1, color2)
         return image
 
-    def create_circular_gradient(self, size, color1, color2):
-        """Crear un gradiente circular para placeholders"""
-        width, height = size
-        image = Image.new('RGBA', size, (0, 0, 0, 0))
-        pixels = image.load()
+    def create_circular_gradient(self, size, color1, color2, antialias=True):
+        """Crear un gradiente circular para placeholders (borde suavizado)"""
+        return imagenes.radial_gradient(size, color1, color2, antialias)
         
-        center_x, center_y = width // 2, height // 2
-        max_distance = min(width, height) // 2
-        
-        for y in range(height):
-            for x in range(width):
-                distance = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
-                
-                if distance <= max_distance:
-                    factor = distance / max_distance
-                    r = int(color1[0] * (1 - factor) + color2[0] * factor)
-                    g = int(color1[1] * (1 - factor) + color2[1] * factor)
-                    b = int(color1[2] * (1 - factor) + color2[2] * factor)
-                    pixels[x, y] = (r, g, b, 255)
-        
-        return image
-        
-    def load_data(self):
-        """Cargar datos del sistema"""
-        try:
-            with open('data/users/users.json', 'r', encoding='utf-8') as f:
-                self.users_data = json.load(f)
-        except FileNotFoundError:
-            self.users_data = {
-                "admin": {
-                    "password": "admin123",
-                    "type": "Administrador",
-                    "permissions": ["read", "write", "delete", "install", "update"],
-                    "wallpaper": "admin"
-                },
-                "usuario": {
-                    "password": "user123", 
-                    "type": "Usuario",
-                    "permissions": ["read", "write"],
-                    "wallpaper": "user"
-                }
-            }
-            self.save_users_data()
-            
-        try:
-            with open('data/files/files.json', 'r', encoding='utf-8') as f:
-                self.files_data = json.load(f)
-        except FileNotFoundError:
-            self.files_data = {}
-            
-        # Los datos de programas ya se cargaron en force_recreate_programs_data()
-        print(f"✅ Datos cargados: {len(self.programs_data)} programas disponibles")
-            
-    def save_users_data(self):
-        """Guardar datos de usuarios"""
-        with open('data/users/users.json', 'w', encoding='utf-8') as f:
-            json.dump(self.users_data, f, indent=2, ensure_ascii=False)
-            
-    def save_files_data(self):
-        """Guardar datos de archivos"""
-        with open('data/files/files.json', 'w', encoding='utf-8') as f:
-            json.dump(self.files_data, f, indent=2, ensure_ascii=False)
-            
-    def save_programs_data(self):
-        """Guardar datos de programas"""
-        with open('data/programs/programs.json', 'w', encoding='utf-8') as f:
-            json.dump(self.programs_data, f, indent=2, ensure_ascii=False)
-
     def show_login(self):
         """Mostrar pantalla de login con wallpaper que se ajusta al maximizar - SIN GIF"""
         for widget in self.root.winfo_children():
@@ -443,6 +541,9 @@ class SimuladorSO:
             highlightthickness=0
         )
         self.login_canvas.pack(fill=tk.BOTH, expand=True)
+        if self.profiler.enabled:
+            # El primer Expose del canvas es el primer frame del login en pantalla
+            self.login_canvas.bind('<Expose>', lambda event: self.profiler.mark_first_frame(), add='+')
         
         # Cargar wallpaper inicial
         self.update_login_wallpaper()
@@ -639,9 +740,7 @@ class SimuladorSO:
         
         def authenticate():
             password = password_entry.get()
-            if username in self.users_data and self.users_data[username]["password"] == password:
-                self.current_user = username
-                self.user_type = self.users_data[username]["type"]
+            if self.core.login(username, password):
                 password_window.destroy()
                 self.setup_desktop()
             else:
@@ -680,8 +779,10 @@ class SimuladorSO:
         
         user_wallpaper = self.users_data[self.current_user].get("wallpaper", "admin")
         desktop_bg = self.load_wallpaper(user_wallpaper, window_width, window_height)
-        self.desktop_canvas.create_image(window_width//2, window_height//2, image=desktop_bg)
-        self.desktop_bg_ref = desktop_bg
+        self.place_desktop_background(desktop_bg, window_width, window_height)
+        
+        # Pre-renderizar en segundo plano otros tamaños (maximizar/restaurar, logout)
+        self.prerender_wallpapers([user_wallpaper, 'login'])
         
         # Crear taskbar mejorada
         self.setup_enhanced_taskbar()
@@ -739,31 +840,44 @@ class SimuladorSO:
 
     def create_desktop_icons_on_canvas(self):
         """Crear iconos del escritorio directamente en el canvas"""
-        icons = [
-            ("files", "Archivos", 50, 50, self.open_file_manager),
-            ("programs", "Programas", 50, 150, self.open_program_manager),
-            ("utilities", "Utilerías", 50, 250, self.open_utilities_menu),
-            ("recycle", "Papelera", 50, 350, self.open_recycle_bin),
-            ("whatsapp", "WhatsApp", 150, 50, lambda: self.execute_program_direct("WhatsApp")),
-            ("spotify", "Spotify", 150, 150, lambda: self.execute_program_direct("Spotify")),
-            ("calculator", "Calculadora", 150, 250, self.open_calculator),
-            ("calendar", "Calendario", 150, 350, self.open_calendar)
-        ]
+        commands = {
+            "files": self.open_file_manager,
+            "programs": self.open_program_manager,
+            "utilities": self.open_utilities_menu,
+            "recycle": self.open_recycle_bin,
+            "whatsapp": lambda: self.execute_program_direct("WhatsApp"),
+            "spotify": lambda: self.execute_program_direct("Spotify"),
+            "calculator": self.open_calculator,
+            "calendar": self.open_calendar
+        }
         
         self.desktop_icons = []
         
-        for icon_name, text, x, y, command in icons:
-            self.create_desktop_icon_on_canvas(icon_name, text, x, y, command)
+        if self.desktop_sheet:
+            # Una sola imagen Tk con todos los iconos; los textos y zonas de clic van encima
+            (origin_x, origin_y), size = self.desktop_sheet
+            self.desktop_canvas.create_image(
+                origin_x, origin_y, anchor="nw",
+                image=self.assets.get('desktop_icons', size)
+            )
+        
+        for icon_name, text, x, y in DESKTOP_ICON_LAYOUT:
+            self.create_desktop_icon_on_canvas(icon_name, text, x, y, commands[icon_name])
+        
+        self.report_tk_images("crear el escritorio")
 
     def create_desktop_icon_on_canvas(self, icon_name, text, x, y, command):
         """Crear un icono individual del escritorio en el canvas"""
         icon_key = f'icon_{icon_name}'
         
         if icon_key in self.image_cache:
-            icon_id = self.desktop_canvas.create_image(
-                x + 32, y + 32, 
-                image=self.image_cache[icon_key]
-            )
+            if self.desktop_sheet:
+                icon_id = None  # Dibujado en la hoja del escritorio
+            else:
+                icon_id = self.desktop_canvas.create_image(
+                    x + 32, y + 32, 
+                    image=self.image_cache[icon_key]
+                )
             
             text_id = self.desktop_canvas.create_text(
                 x + 32, y + 75,
@@ -781,13 +895,10 @@ class SimuladorSO:
             )
             
             # Eventos
-            self.desktop_canvas.tag_bind(icon_id, "<Button-1>", lambda e, cmd=command: cmd())
-            self.desktop_canvas.tag_bind(text_id, "<Button-1>", lambda e, cmd=command: cmd())
-            self.desktop_canvas.tag_bind(rect_id, "<Button-1>", lambda e, cmd=command: cmd())
-            
-            self.desktop_canvas.tag_bind(icon_id, "<Double-Button-1>", lambda e, cmd=command: cmd())
-            self.desktop_canvas.tag_bind(text_id, "<Double-Button-1>", lambda e, cmd=command: cmd())
-            self.desktop_canvas.tag_bind(rect_id, "<Double-Button-1>", lambda e, cmd=command: cmd())
+            for item_id in (icon_id, text_id, rect_id):
+                if item_id is not None:
+                    self.desktop_canvas.tag_bind(item_id, "<Button-1>", lambda e, cmd=command: cmd())
+                    self.desktop_canvas.tag_bind(item_id, "<Double-Button-1>", lambda e, cmd=command: cmd())
             
             # Efectos hover
             self.desktop_canvas.tag_bind(rect_id, "<Enter>", 
@@ -798,24 +909,79 @@ class SimuladorSO:
             self.desktop_icons.append((icon_id, text_id, rect_id))
 
     def on_window_resize(self, event):
-        """Manejar redimensionamiento de ventana"""
+        """Manejar redimensionamiento: vista previa rápida y render final al detenerse"""
         if event.widget == self.root:
             new_width = event.width
             new_height = event.height
             
-            if hasattr(self, 'current_user') and self.current_user:
-                user_wallpaper = self.users_data[self.current_user].get("wallpaper", "admin")
+            if not (hasattr(self, 'current_user') and self.current_user):
+                return
+            if (new_width, new_height) == self.desktop_bg_size:
+                return  # Solo se movió la ventana
+            
+            start = time.perf_counter()
+            user_wallpaper = self.users_data[self.current_user].get("wallpaper", "admin")
+            
+            if self.is_maximized() and (new_width, new_height) != self.maximized_size:
+                # Primer maximizado con este tamaño: recordarlo y dejar listo el del login
+                self.maximized_size = (new_width, new_height)
+                self.wallpaper_cache.prerender(['login'], [self.maximized_size])
+            
+            if hasattr(self, '_desktop_refine_timer'):
+                self.root.after_cancel(self._desktop_refine_timer)
+                del self._desktop_refine_timer
+            
+            # Si el tamaño ya está renderizado (maximizar/restaurar) se usa directamente
+            if (user_wallpaper, new_width, new_height) in self.wallpaper_cache:
                 desktop_bg = self.load_wallpaper(user_wallpaper, new_width, new_height)
-                
-                self.desktop_canvas.delete("background")
-                self.desktop_canvas.create_image(
-                    new_width//2, new_height//2, 
-                    image=desktop_bg, 
-                    tags="background"
-                )
-                
-                self.desktop_canvas.tag_lower("background")
-                self.desktop_bg_ref = desktop_bg
+                self.place_desktop_background(desktop_bg, new_width, new_height)
+                return
+            
+            # Vista previa barata: copia media escalada con BILINEAR (sin mejoras por defecto)
+            preview = imagenes.fit_wallpaper(
+                self.get_wallpaper_preview_source(user_wallpaper),
+                new_width, new_height,
+                params=enhance_params('resize_preview'),
+                resample=Image.Resampling.BILINEAR
+            )
+            self.place_desktop_background(ImageTk.PhotoImage(preview), new_width, new_height)
+            self.resize_frame_times.append(time.perf_counter() - start)
+            
+            self._desktop_refine_timer = self.root.after(RESIZE_SETTLE_MS, self.refine_desktop_background)
+
+    def refine_desktop_background(self):
+        """Sustituir la vista previa por el wallpaper de calidad completa e informar tiempos"""
+        if hasattr(self, '_desktop_refine_timer'):
+            del self._desktop_refine_timer
+        if not self.current_user or not self.desktop_bg_size or not self.desktop_canvas.winfo_exists():
+            return
+        
+        width, height = self.desktop_bg_size
+        start = time.perf_counter()
+        user_wallpaper = self.users_data[self.current_user].get("wallpaper", "admin")
+        desktop_bg = self.load_wallpaper(user_wallpaper, width, height)
+        self.place_desktop_background(desktop_bg, width, height)
+        final_time = time.perf_counter() - start
+        
+        if self.resize_frame_times:
+            frames = self.resize_frame_times
+            print(f"📐 Redimensionado a {width}x{height}: {len(frames)} frames de vista previa, "
+                  f"media {sum(frames) / len(frames) * 1000:.1f} ms, máx {max(frames) * 1000:.1f} ms; "
+                  f"render final {final_time * 1000:.1f} ms")
+            self.resize_frame_times = []
+
+    def place_desktop_background(self, desktop_bg, width, height):
+        """Colocar el wallpaper del escritorio al fondo del canvas"""
+        self.desktop_canvas.delete("background")
+        self.desktop_canvas.create_image(
+            width//2, height//2, 
+            image=desktop_bg, 
+            tags="background"
+        )
+        
+        self.desktop_canvas.tag_lower("background")
+        self.desktop_bg_ref = desktop_bg
+        self.desktop_bg_size = (width, height)
 
     def setup_enhanced_taskbar(self):
         """Crear la barra de tareas mejorada con botón Start SOLO IMAGEN"""
@@ -942,11 +1108,9 @@ class SimuladorSO:
         
         # Icono
         icon_key = f'icon_{icon_name}'
-        if icon_key in self.original_images:
+        if icon_key in IMAGE_FILES:
             try:
-                medium_image = self.progressive_resize(self.original_images[icon_key], (32, 32))
-                medium_image = self.enhance_image_quality(medium_image)
-                medium_photo = ImageTk.PhotoImage(medium_image)
+                medium_photo = self.get_icon(icon_name, 32)
                 
                 icon_label = tk.Label(content_frame, image=medium_photo, bg="#374151")
                 icon_label.image = medium_photo
@@ -1061,6 +1225,7 @@ class SimuladorSO:
                 window.destroy()
             self.open_windows.clear()
             self.taskbar_buttons.clear()
+            self.core.logout()
             self.show_login()
 
     # ==================== GESTOR DE ARCHIVOS CON PERMISOS ====================
@@ -1212,33 +1377,17 @@ class SimuladorSO:
             right_panel = tk.Frame(content_frame)
             right_panel.pack(side='right', fill='both', expand=True)
             
-            # File list
-            columns = ("Tipo", "Tamaño", "Fecha")
-            self.files_tree = ttk.Treeview(right_panel, columns=columns, show="tree headings")
-            
-            self.files_tree.heading("#0", text="Nombre")
-            self.files_tree.heading("Tipo", text="Tipo")
-            self.files_tree.heading("Tamaño", text="Tamaño")
-            self.files_tree.heading("Fecha", text="Fecha")
-            
-            # Configurar anchos
-            self.files_tree.column("#0", width=200)
-            self.files_tree.column("Tipo", width=100)
-            self.files_tree.column("Tamaño", width=100)
-            self.files_tree.column("Fecha", width=150)
-            
-            scrollbar_files = ttk.Scrollbar(right_panel, orient="vertical", command=self.files_tree.yview)
-            self.files_tree.configure(yscrollcommand=scrollbar_files.set)
-            
-            self.files_tree.pack(side="left", fill="both", expand=True)
-            scrollbar_files.pack(side="right", fill="y")
+            # File list: solo las filas visibles llegan a Tk; clic en una cabecera para ordenar
+            columns = [("#0", "Nombre", 200), ("Tipo", "Tipo", 100), ("Tamaño", "Tamaño", 100), ("Fecha", "Fecha", 150)]
+            self.file_list_model.set_view(category="all")
+            self.file_list = VirtualTreeview(right_panel, self.file_list_model, columns, self.file_row)
+            self.file_list.pack()
             
             # Doble clic para abrir archivos
-            self.files_tree.bind("<Double-1>", self.open_selected_file)
+            self.file_list.bind("<Double-1>", self.open_selected_file)
             
             # Cargar archivos iniciales
-            self.load_initial_files()
-            self.refresh_file_list()
+            self.core.load_initial_files()
         
         self.create_window("Gestor de Archivos", create_file_manager_content, 900, 600)
 
@@ -1250,27 +1399,16 @@ class SimuladorSO:
                 "Tu cuenta de usuario tiene permisos limitados por seguridad del sistema.")
             return
         
-        if not hasattr(self, 'files_tree') or not self.files_tree.selection():
+        if not hasattr(self, 'file_list') or not self.file_list.selected():
             messagebox.showwarning("Advertencia", "Selecciona un archivo para renombrar")
             return
         
-        selection = self.files_tree.selection()
-        item = self.files_tree.item(selection[0])
-        file_name_with_icon = item['text']
-        old_file_name = file_name_with_icon.split(' ', 1)[1]  # Quitar icono
-        
         # Buscar archivo en datos
-        file_info = None
-        file_key_to_rename = None
-        for key, info in self.files_data.items():
-            if info['name'] == old_file_name:
-                file_info = info
-                file_key_to_rename = key
-                break
-        
+        file_info = self.selected_file()
         if not file_info:
             messagebox.showerror("Error", "Archivo no encontrado")
             return
+        old_file_name = file_info['name']
         
         # Solicitar nuevo nombre
         new_file_name = simpledialog.askstring(
@@ -1282,151 +1420,56 @@ class SimuladorSO:
         if not new_file_name or new_file_name == old_file_name:
             return  # Cancelado o mismo nombre
         
-        # Agregar extensión si es necesario
-        if file_info['type'] == "Documento" and not new_file_name.endswith('.txt'):
-            new_file_name += '.txt'
-        
-        # Verificar que no exista otro archivo con ese nombre
-        new_file_key = f"{file_info['category']}_{new_file_name}"
-        if new_file_key in self.files_data:
-            messagebox.showerror("Error", f"Ya existe un archivo llamado '{new_file_name}'")
-            return
-        
         try:
-            # Renombrar archivo físico
-            old_file_path = f"user_files/{file_info['category']}/{old_file_name}"
-            new_file_path = f"user_files/{file_info['category']}/{new_file_name}"
-            
-            if os.path.exists(old_file_path):
-                os.rename(old_file_path, new_file_path)
-            
-            # Actualizar datos en memoria
-            # Crear nueva entrada con el nuevo nombre
-            self.files_data[new_file_key] = {
-                "name": new_file_name,
-                "type": file_info['type'],
-                "size": file_info['size'],
-                "category": file_info['category'],
-                "date": datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),
-                "content": file_info['content']
-            }
-            
-            # Eliminar entrada antigua
-            del self.files_data[file_key_to_rename]
-            
-            # Guardar cambios
-            self.save_files_data()
-            self.refresh_file_list()
-            
+            new_file_name = self.core.rename_file(old_file_name, new_file_name, file_info['category'])
             messagebox.showinfo("✅ Éxito", f"Archivo renombrado correctamente:\n\n📄 '{old_file_name}' → '{new_file_name}'")
-            
+        except CoreError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudo renombrar el archivo: {e}")
 
-    def load_initial_files(self):
-        """Cargar archivos iniciales del sistema"""
-        initial_files = [
-            {"name": "Bienvenida.txt", "type": "Documento", "size": "2 KB", "category": "documents", "content": "¡Bienvenido al sistema operativo simulado!\n\nEste es un archivo de ejemplo que puedes editar."},
-            {"name": "Notas.txt", "type": "Documento", "size": "1 KB", "category": "documents", "content": "Mis notas importantes:\n- Recordar actualizar el sistema\n- Revisar correos"},
-            {"name": "Imagen1.jpg", "type": "Imagen", "size": "1.2 MB", "category": "images", "content": ""},
-            {"name": "Cancion.mp3", "type": "Audio", "size": "3.5 MB", "category": "music", "content": ""},
-            {"name": "Video.mp4", "type": "Video", "size": "15 MB", "category": "videos", "content": ""}
-        ]
-        
-        # Crear archivos físicos si no existen
-        for file_info in initial_files:
-            if file_info["type"] == "Documento":
-                file_path = f"user_files/documents/{file_info['name']}"
-                if not os.path.exists(file_path):
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(file_info['content'])
-            elif file_info["type"] == "Carpeta":
-                folder_path = f"user_files/documents/{file_info['name']}"
-                Path(folder_path).mkdir(exist_ok=True)
-        
-        # Actualizar datos en memoria
-        for file_info in initial_files:
-            file_key = f"{file_info['category']}_{file_info['name']}"
-            self.files_data[file_key] = {
-                "name": file_info['name'],
-                "type": file_info['type'],
-                "size": file_info['size'],
-                "category": file_info['category'],
-                "date": datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),
-                "content": file_info.get('content', '')
-            }
-        
-        self.save_files_data()
-
     def refresh_file_list(self):
-        """Actualizar lista de archivos"""
-        if hasattr(self, 'files_tree'):
-            for item in self.files_tree.get_children():
-                self.files_tree.delete(item)
-            
-            category_filter = self.selected_category.get()
-            
-            for file_key, file_info in self.files_data.items():
-                if category_filter == "all" or file_info['category'] == category_filter:
-                    # Icono según tipo
-                    if file_info['type'] == "Documento":
-                        icon = "📄"
-                    elif file_info['type'] == "Imagen":
-                        icon = "🖼️"
-                    elif file_info['type'] == "Audio":
-                        icon = "🎵"
-                    elif file_info['type'] == "Video":
-                        icon = "🎬"
-                    else:
-                        icon = "📄"
-                    
-                    self.files_tree.insert("", "end",
-                                         text=f"{icon} {file_info['name']}",
-                                         values=(file_info['type'], 
-                                               file_info['size'], 
-                                               file_info['date']))
+        """Actualizar lista de archivos (releyendo todos los datos)"""
+        if hasattr(self, 'file_list'):
+            self.file_list_model.invalidate()
+            self.file_list.refresh()
+
+    def file_row(self, file_key, file_info):
+        """Texto y columnas de un archivo en la lista"""
+        # Icono según tipo
+        if file_info['type'] == "Documento":
+            icon = "📄"
+        elif file_info['type'] == "Imagen":
+            icon = "🖼️"
+        elif file_info['type'] == "Audio":
+            icon = "🎵"
+        elif file_info['type'] == "Video":
+            icon = "🎬"
+        else:
+            icon = "📄"
+        return f"{icon} {file_info['name']}", (file_info['type'], file_info['size'], file_info['date'])
+
+    def selected_file(self):
+        """Datos del archivo seleccionado en el gestor, o None"""
+        # La selección se guarda por clave: el mismo nombre puede repetirse en otra categoría
+        file_key = self.file_list.selected() if hasattr(self, 'file_list') else None
+        if file_key is None:
+            return None
+        return self.files_data.get(file_key)
 
     def filter_files_by_category(self):
         """Filtrar archivos por categoría"""
-        self.refresh_file_list()
+        self.file_list.set_category(self.selected_category.get())
 
     def create_new_file(self):
         """Crear nuevo archivo"""
         file_name = simpledialog.askstring("Nuevo Archivo", "Nombre del archivo:")
         if file_name:
-            if not file_name.endswith('.txt'):
-                file_name += '.txt'
-            
-            category = self.selected_category.get()
-            if category == "all":
-                category = "documents"
-            
-            file_key = f"{category}_{file_name}"
-            
-            if file_key in self.files_data:
-                messagebox.showerror("Error", "El archivo ya existe")
-                return
-            
-            # Crear archivo físico
-            file_path = f"user_files/{category}/{file_name}"
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write("Nuevo archivo creado\n")
-                
-                # Agregar a datos
-                self.files_data[file_key] = {
-                    "name": file_name,
-                    "type": "Documento",
-                    "size": "1 KB",
-                    "category": category,
-                    "date": datetime.datetime.now().strftime("%d/%m/%Y %H:%M"),
-                    "content": "Nuevo archivo creado\n"
-                }
-                
-                self.save_files_data()
-                self.refresh_file_list()
+                file_name = self.core.create_file(file_name, self.selected_category.get())
                 messagebox.showinfo("Éxito", f"Archivo '{file_name}' creado correctamente")
-                
+            except CoreError as e:
+                messagebox.showerror("Error", str(e))
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo crear el archivo: {e}")
 
@@ -1440,59 +1483,35 @@ class SimuladorSO:
                 "Tu cuenta de usuario tiene permisos limitados por seguridad del sistema.")
             return
         
-        if not hasattr(self, 'files_tree') or not self.files_tree.selection():
+        if not hasattr(self, 'file_list') or not self.file_list.selected():
             messagebox.showwarning("Advertencia", "Selecciona un archivo para eliminar")
             return
         
-        selection = self.files_tree.selection()
-        item = self.files_tree.item(selection[0])
-        file_name_with_icon = item['text']
-        file_name = file_name_with_icon.split(' ', 1)[1]  # Quitar icono
+        file_info = self.selected_file()
+        if not file_info:
+            messagebox.showerror("Error", "Archivo no encontrado")
+            return
+        file_name = file_info['name']
         
         if messagebox.askyesno("Confirmar", f"¿Eliminar '{file_name}'?\n\n⚠️ Esta acción no se puede deshacer."):
-            # Buscar y eliminar de datos
-            file_key_to_delete = None
-            for key, file_info in self.files_data.items():
-                if file_info['name'] == file_name:
-                    file_key_to_delete = key
-                    break
-            
-            if file_key_to_delete:
-                file_info = self.files_data[file_key_to_delete]
-                
-                # Eliminar archivo físico 
-                try:
-                    file_path = f"user_files/{file_info['category']}/{file_name}"
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    
-                    # Eliminar de datos
-                    del self.files_data[file_key_to_delete]
-                    self.save_files_data()
-                    self.refresh_file_list()
-                    messagebox.showinfo("Éxito", f"'{file_name}' eliminado correctamente")
-                    
-                except Exception as e:
-                    messagebox.showerror("Error", f"No se pudo eliminar: {e}")
+            try:
+                self.core.delete_file(file_name, file_info['category'])
+                messagebox.showinfo("Éxito", f"'{file_name}' eliminado correctamente")
+            except CoreError as e:
+                messagebox.showerror("Error", str(e))
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo eliminar: {e}")
 
     def open_selected_file(self, event):
         """Abrir archivo seleccionado"""
-        if not self.files_tree.selection():
+        if not self.file_list.selected():
             return  
         
-        selection = self.files_tree.selection()
-        item = self.files_tree.item(selection[0])
-        file_name_with_icon = item['text']
-        file_name = file_name_with_icon.split(' ', 1)[1]  # Quitar icono
-        
         # Buscar archivo en datos
-        file_info = None
-        for key, info in self.files_data.items():
-            if info['name'] == file_name:
-                file_info = info
-                break
+        file_info = self.selected_file()
         
         if file_info:
+            file_name = file_info['name']
             if file_info['type'] == "Documento":
                 self.open_text_editor(file_name, file_info)
             else:
@@ -1551,15 +1570,9 @@ class SimuladorSO:
             text_area.pack(side="left", fill="both", expand=True)
             scrollbar.pack(side="right", fill="y")
             
-            # Cargar contenido
+            # Cargar contenido (se lee de disco al abrir, no está en files_data)
             try:
-                file_path = f"user_files/{file_info['category']}/{file_name}"
-                if os.path.exists(file_path):
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        text_area.insert(1.0, content)
-                else:
-                    text_area.insert(1.0, file_info.get('content', ''))
+                text_area.insert(1.0, self.core.read_file_content(file_info, file_name))
             except Exception as e:
                 text_area.insert(1.0, f"Error cargando archivo: {e}")
         
@@ -1568,18 +1581,7 @@ class SimuladorSO:
     def save_file_content(self, file_name, file_info, content):
         """Guardar contenido del archivo"""
         try:
-            file_path = f"user_files/{file_info['category']}/{file_name}"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Actualizar datos
-            for key, info in self.files_data.items():
-                if info['name'] == file_name:
-                    self.files_data[key]['content'] = content
-                    self.files_data[key]['date'] = datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
-                    break
-            
-            self.save_files_data()
+            self.core.save_file(file_name, file_info, content)
             messagebox.showinfo("Éxito", "Archivo guardado correctamente")
             
         except Exception as e:
@@ -1588,12 +1590,9 @@ class SimuladorSO:
     def reload_file_content(self, file_name, file_info, text_area):
         """Recargar contenido del archivo"""
         try:
-            file_path = f"user_files/{file_info['category']}/{file_name}"
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    text_area.delete(1.0, tk.END)
-                    text_area.insert(1.0, content)
+            if os.path.exists(self.core.file_path(file_info, file_name)):
+                text_area.delete(1.0, tk.END)
+                text_area.insert(1.0, self.core.read_file_content(file_info, file_name))
             messagebox.showinfo("Éxito", "Archivo recargado")
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo recargar: {e}")
@@ -1736,48 +1735,9 @@ class SimuladorSO:
 
     def send_whatsapp_message(self):
         """Enviar mensaje en WhatsApp"""
-        message = self.message_entry.get().strip()
-        if message:
-            # Agregar mensaje del usuario
-            current_time = datetime.datetime.now().strftime("%H:%M")
-            self.whatsapp_messages.append({
-                "sender": "Tú",
-                "message": message,
-                "time": current_time
-            })
-            
-            # Limpiar entrada
+        # El núcleo añade el mensaje y programa la respuesta del contacto; la lista se refresca al avisar
+        if self.core.send_message(self.message_entry.get()):
             self.message_entry.delete(0, tk.END)
-            
-            # Actualizar display
-            self.display_whatsapp_messages()
-            
-            # Simular respuesta automática después de 2 segundos
-            self.root.after(2000, lambda: self.simulate_contact_response(message))
-
-    def simulate_contact_response(self, user_message):
-        """Simular respuesta del contacto"""
-        responses = [
-            "¡Interesante! 🤔",
-            "Entiendo perfectamente 👍",
-            "¿En serio? ¡Qué genial! 😄",
-            "Tienes razón 💯",
-            "Cuéntame más sobre eso 🤗",
-            "¡Excelente punto! ✨",
-            "Me parece muy bien 👌"
-        ]
-        
-        response = random.choice(responses)
-        current_time = datetime.datetime.now().strftime("%H:%M")
-        
-        self.whatsapp_messages.append({
-            "sender": "Contacto",
-            "message": response,
-            "time": current_time
-        })
-        
-        # Actualizar display
-        self.display_whatsapp_messages()
 
     # ==================== SPOTIFY MEJORADO ====================
 
@@ -1977,50 +1937,31 @@ class SimuladorSO:
 
     def play_song(self, song):
         """Reproducir canción seleccionada"""
-        # Detener todas las canciones
-        for s in self.spotify_songs:
-            s['playing'] = False
-        
-        # Reproducir la seleccionada
-        song['playing'] = True
-        self.current_song = song
-        self.is_playing = True
-        
-        # Actualizar interfaz
-        self.current_song_label.config(text=f"🎵 {song['title']} - {song['artist']}")
-        self.play_pause_btn.config(text="⏸️")
-        
-        # Actualizar lista
-        self.display_spotify_songs()
+        self.core.play_song(song)
 
     def toggle_play_pause(self):
         """Alternar reproducción/pausa"""
-        if self.current_song:
-            self.is_playing = not self.is_playing
-            self.current_song['playing'] = self.is_playing
-            
-            if self.is_playing:
-                self.play_pause_btn.config(text="⏸️")
-                self.current_song_label.config(text=f"🎵 {self.current_song['title']} - {self.current_song['artist']}")
-            else:
-                self.play_pause_btn.config(text="▶️")
-                self.current_song_label.config(text=f"⏸️ {self.current_song['title']} - {self.current_song['artist']} (Pausado)")
-            
-            self.display_spotify_songs()
+        self.core.toggle_play_pause()
 
     def next_song(self):
         """Siguiente canción"""
-        if self.current_song:
-            current_index = self.spotify_songs.index(self.current_song)
-            next_index = (current_index + 1) % len(self.spotify_songs)
-            self.play_song(self.spotify_songs[next_index])
+        self.core.next_song()
 
     def previous_song(self):
         """Canción anterior"""
-        if self.current_song:
-            current_index = self.spotify_songs.index(self.current_song)
-            prev_index = (current_index - 1) % len(self.spotify_songs)
-            self.play_song(self.spotify_songs[prev_index])
+        self.core.previous_song()
+
+    def update_now_playing(self):
+        """Mostrar la canción actual y el estado del botón de reproducción"""
+        song = self.current_song
+        if not song:
+            return
+        if self.is_playing:
+            self.play_pause_btn.config(text="⏸️")
+            self.current_song_label.config(text=f"🎵 {song['title']} - {song['artist']}")
+        else:
+            self.play_pause_btn.config(text="▶️")
+            self.current_song_label.config(text=f"⏸️ {song['title']} - {song['artist']} (Pausado)")
 
     # ==================== RESTO DE FUNCIONES ====================
 
@@ -2110,6 +2051,12 @@ class SimuladorSO:
             self.programs_tree.pack(side="left", fill="both", expand=True)
             scrollbar_prog.pack(side="right", fill="y")
             
+            # Configurar colores
+            self.programs_tree.tag_configure("installed", background="#dcfce7")
+            self.programs_tree.tag_configure("not_installed", background="#fef2f2")
+            
+            # Cada actualización toca solo las filas de los programas que cambiaron
+            self.programs_reconciler = TreeReconciler(self.programs_tree)
             self.refresh_programs_list()
         
         self.create_window("Gestor de Programas", create_program_manager_content, 800, 600)
@@ -2117,11 +2064,7 @@ class SimuladorSO:
     def refresh_programs_list(self):
         """Actualizar lista de programas con ICONOS REALES"""
         if hasattr(self, 'programs_tree'):
-            for item in self.programs_tree.get_children():
-                self.programs_tree.delete(item)
-            
-            print(f"🔄 Actualizando lista con {len(self.programs_data)} programas")
-            
+            rows = []
             for program_name, program_info in self.programs_data.items():
                 status = "✅ Instalado" if program_info['installed'] else "❌ No instalado"
                 
@@ -2135,20 +2078,20 @@ class SimuladorSO:
                 # Color según estado
                 tags = ("installed",) if program_info['installed'] else ("not_installed",)
                 
-                # Insertar con icono 
-                item_id = self.programs_tree.insert("", "end",
-                                        text=program_name,  
-                                        values=(status, 
-                                               program_info['version'], 
-                                               program_info['size']),
-                                        tags=tags,
-                                        image=program_icon if program_icon else "")
-                
-                print(f"   • {program_name}: {status} (icono: {icon_key})")
+                # Fila con icono, identificada por el nombre del programa
+                rows.append((program_name, {
+                    'text': program_name,
+                    'values': (status, program_info['version'], program_info['size']),
+                    'tags': tags,
+                    'image': program_icon if program_icon else ""
+                }))
             
-            # Configurar colores
-            self.programs_tree.tag_configure("installed", background="#dcfce7")
-            self.programs_tree.tag_configure("not_installed", background="#fef2f2")
+            stats = self.programs_reconciler.sync(rows)
+            print(f"🔄 Lista de {len(rows)} programas: {stats['inserts']} nuevos, {stats['updates']} cambiados, "
+                  f"{stats['moves']} movidos, {stats['deletes']} quitados ({stats['tk_calls']} llamadas a Tk)")
+            
+            if stats['inserts']:
+                self.report_tk_images("actualizar la lista de programas")
 
     def execute_selected_program(self):
         """Ejecutar programa seleccionado"""
@@ -2231,6 +2174,7 @@ class SimuladorSO:
 
     def simulate_installation(self, program_name):
         """Simular instalación de programa con barra de progreso REAL"""
+        job = self.core.start_job('install', program_name)
         # Crear ventana de instalación
         install_window = tk.Toplevel(self.root)
         install_window.title("Instalando Programa")
@@ -2282,17 +2226,8 @@ class SimuladorSO:
         )
         status_label.pack(pady=10)
         
-        # Simular progreso REAL
-        progress_steps = [
-            (10, "Verificando requisitos del sistema..."),
-            (25, "Descargando archivos principales..."),
-            (40, "Descargando dependencias..."),
-            (55, "Verificando integridad de archivos..."),
-            (70, "Extrayendo archivos..."),
-            (85, "Configurando programa..."),
-            (95, "Registrando en el sistema..."),
-            (100, "¡Instalación completada exitosamente!")
-        ]
+        # Simular progreso REAL con los pasos del trabajo
+        progress_steps = job.steps
         
         def update_progress(step_index=0):
             if step_index < len(progress_steps):
@@ -2317,20 +2252,16 @@ class SimuladorSO:
                 animate_progress()
             else:
                 # Instalación completada
-                install_window.after(1500, lambda: self.complete_installation(program_name, install_window))
+                install_window.after(1500, lambda: self.complete_installation(job, install_window))
         
         # Iniciar simulación
         update_progress()
 
-    def complete_installation(self, program_name, install_window):
+    def complete_installation(self, job, install_window):
         """Completar la instalación del programa"""
-        # Actualizar datos REALMENTE
-        self.programs_data[program_name]['installed'] = True
-        self.save_programs_data()
-        
-        # Actualizar lista si existe
-        if hasattr(self, 'programs_tree'):
-            self.refresh_programs_list()
+        # Actualizar datos REALMENTE (la lista se refresca con el aviso del núcleo)
+        job.complete()
+        program_name = job.program_name
         
         # Cerrar ventana de instalación
         install_window.destroy()
@@ -2364,6 +2295,7 @@ class SimuladorSO:
 
     def simulate_update(self, program_name):
         """Simular actualización de programa"""
+        job = self.core.start_job('update', program_name)
         # Crear ventana de actualización
         update_window = tk.Toplevel(self.root)
         update_window.title("Actualizando Programa")
@@ -2400,13 +2332,8 @@ class SimuladorSO:
         )
         status_label.pack(pady=10)
         
-        # Simular actualización
-        update_steps = [
-            (20, "Descargando actualización..."),
-            (50, "Aplicando parches..."),
-            (80, "Configurando nueva versión..."),
-            (100, "Actualización completada")
-        ]
+        # Simular actualización con los pasos del trabajo
+        update_steps = job.steps
         
         def update_progress(step_index=0):
             if step_index < len(update_steps):
@@ -2416,30 +2343,15 @@ class SimuladorSO:
                 update_window.after(1000, lambda: update_progress(step_index + 1))
             else:
                 # Actualización completada
-                update_window.after(1000, lambda: self.complete_update(program_name, update_window))
+                update_window.after(1000, lambda: self.complete_update(job, update_window))
         
         update_progress()
 
-    def complete_update(self, program_name, update_window):
+    def complete_update(self, job, update_window):
         """Completar la actualización del programa"""
         # Actualizar versión REALMENTE
-        current_version = self.programs_data[program_name]['version']
-        version_parts = current_version.split('.')
-        
-        # Incrementar versión menor
-        if len(version_parts) >= 2:
-            try:
-                minor_version = int(version_parts[-1])
-                version_parts[-1] = str(minor_version + 1)
-                new_version = '.'.join(version_parts)
-            except:
-                new_version = current_version + ".1"
-        else:
-            new_version = current_version + ".1"
-        
-        self.programs_data[program_name]['version'] = new_version
-        self.save_programs_data()
-        self.refresh_programs_list()
+        current_version, new_version = job.complete()
+        program_name = job.program_name
         
         # Cerrar ventana
         update_window.destroy()
@@ -2465,8 +2377,7 @@ class SimuladorSO:
         program_name = item['text']  
         
         # Verificar si es una utilería del sistema (PROTECCIÓN MEJORADA - incluye Calculadora y Calendario)
-        system_utilities = ["Calculadora", "Calendario", "Bloc de Notas", "Explorador de Archivos", "Gestor de Programas", "Monitor Sistema"]
-        if program_name in system_utilities:
+        if program_name in SYSTEM_UTILITIES:
             messagebox.showerror("🔒 Error de Sistema", 
                 f"{program_name} es una utilería crítica del sistema operativo.\n\n"
                 f"🚫 No se puede desinstalar por seguridad del sistema.\n"
@@ -2482,6 +2393,7 @@ class SimuladorSO:
 
     def simulate_uninstall(self, program_name):
         """Simular desinstalación de programa"""
+        job = self.core.start_job('uninstall', program_name)
         # Crear ventana de desinstalación
         uninstall_window = tk.Toplevel(self.root)
         uninstall_window.title("Desinstalando Programa")
@@ -2518,13 +2430,8 @@ class SimuladorSO:
         )
         status_label.pack(pady=10)
         
-        # Simular desinstalación
-        uninstall_steps = [
-            (25, "Cerrando procesos del programa..."),
-            (50, "Eliminando archivos..."),
-            (75, "Limpiando registro del sistema..."),
-            (100, "Desinstalación completada")
-        ]
+        # Simular desinstalación con los pasos del trabajo
+        uninstall_steps = job.steps
         
         def uninstall_progress(step_index=0):
             if step_index < len(uninstall_steps):
@@ -2534,16 +2441,15 @@ class SimuladorSO:
                 uninstall_window.after(1000, lambda: uninstall_progress(step_index + 1))
             else:
                 # Desinstalación completada
-                uninstall_window.after(1000, lambda: self.complete_uninstall(program_name, uninstall_window))
+                uninstall_window.after(1000, lambda: self.complete_uninstall(job, uninstall_window))
         
         uninstall_progress()
 
-    def complete_uninstall(self, program_name, uninstall_window):
+    def complete_uninstall(self, job, uninstall_window):
         """Completar la desinstalación del programa"""
         # Actualizar datos REALMENTE
-        self.programs_data[program_name]['installed'] = False
-        self.save_programs_data()
-        self.refresh_programs_list()
+        job.complete()
+        program_name = job.program_name
         
         # Cerrar ventana
         uninstall_window.destroy()
@@ -3037,6 +2943,8 @@ Puedes escribir aquí tu contenido y usar las opciones de la barra de herramient
                 fg="#1f2937"
             ).pack(pady=10)
             
+            memory = self.get_memory_usage()
+            tk_images, tk_image_bytes = self.get_tk_image_stats()
             system_info = [
                 "🖥️ Sistema Operativo: Windows Simulator v2.1",
                 "💾 Memoria RAM: 8 GB",
@@ -3044,7 +2952,10 @@ Puedes escribir aquí tu contenido y usar las opciones de la barra de herramient
                 "⚡ Procesador: Intel Core i7",
                 f"👤 Usuario actual: {self.current_user}",
                 f"🔐 Tipo de cuenta: {self.user_type}",
-                f"📦 Programas instalados: {sum(1 for p in self.programs_data.values() if p['installed'])}"
+                f"📦 Programas instalados: {sum(1 for p in self.programs_data.values() if p['installed'])}",
+                f"🖼️ Memoria de imágenes: {memory['total_bytes'] / 1048576:.1f} MB de "
+                f"{memory['limit_bytes'] / 1048576:.0f} MB ({memory['evictions']} expulsiones)",
+                f"🧩 Imágenes Tk: {tk_images} ({tk_image_bytes / 1024:.0f} KB)"
             ]
             
             for info in system_info:
@@ -3216,6 +3127,8 @@ Este es un editor de texto simple que simula las funcionalidades básicas de un
             print(f"❌ Error crítico: {e}")
             messagebox.showerror("Error Crítico", f"Error al iniciar el sistema: {e}")
         finally:
+            self.profiler.finish()  # Si el login no llegó a pintarse
+            self.core.flush_data()
             print("🔚 Sistema Operativo Simulado cerrado")
 
 def main():
@@ -3233,7 +3146,7 @@ def main():
             print("✅ PIL/Pillow instalado correctamente")
         
         # Crear y ejecutar el simulador
-        simulator = SimuladorSO()
+        simulator = SimuladorSO(StartupProfiler.from_args())
         simulator.run()
         
     except Exception as e:
@@ -0,0 +1,284 @@
+"""Suite de benchmarks del motor de imágenes con resultados comparables entre commits
+
+No usa Tk ni necesita pantalla: mide las funciones de imagenes.py que usa
+el simulador (progressive_resize, enhance_image, fit_wallpaper,
+linear_gradient y radial_gradient) sobre imágenes sintéticas.
+
+Uso:
+    python suite_imagenes.py [--json salida.json] [--compare base.json]
+                             [--iterations N] [--only caso,caso] [--threshold 0.15]
+
+Cada (caso, tamaño) corre en un proceso aparte para que su pico de memoria
+(VmHWM) sea solo suyo. Con --compare se marcan las regresiones de la
+mediana y el código de salida es 1 si hay alguna.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import PIL
+
+import imagenes
+from benchmark_imagenes import peak_rss_kb, synthetic_wallpaper
+
+
+COLOR1, COLOR2 = (30, 58, 138), (147, 197, 253)
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_THRESHOLD = 0.15
+
+
+def parse_size(label):
+    """'1920x1080' -> (1920, 1080)"""
+    width, height = label.split('x')
+    return int(width), int(height)
+
+
+def synthetic_icon(side):
+    """Icono RGBA sintético (círculo con gradiente sobre fondo transparente)"""
+    return imagenes.radial_gradient((side, side), (220, 60, 60), (60, 60, 220))
+
+
+def encoded_wallpaper(size, image_format):
+    """Bytes de un wallpaper sintético codificado en JPEG o PNG"""
+    buffer = io.BytesIO()
+    image = synthetic_wallpaper(*size)
+    if image_format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=90)
+    else:
+        image.save(buffer, 'PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+# ==================== CASOS ====================
+# Cada caso recibe la etiqueta de tamaño y devuelve (función a medir, píxeles de salida)
+
+def case_linear_gradient(label):
+    width, height = parse_size(label)
+    return lambda: imagenes.linear_gradient(width, height, COLOR1, COLOR2), width * height
+
+
+def case_radial_gradient(label):
+    size = parse_size(label)
+    return lambda: imagenes.radial_gradient(size, COLOR1, COLOR2), size[0] * size[1]
+
+
+def case_progressive_resize(label):
+    source_label, target_label = label.split('->')
+    source_size, target_size = parse_size(source_label), parse_size(target_label)
+    if source_size[0] == source_size[1]:
+        source = synthetic_icon(source_size[0])
+    else:
+        source = synthetic_wallpaper(*source_size)
+    return lambda: imagenes.progressive_resize(source, target_size), target_size[0] * target_size[1]
+
+
+def enhance_case(preset):
+    def case(label):
+        size = parse_size(label)
+        image = synthetic_icon(size[0]) if size[0] == size[1] else synthetic_wallpaper(*size)
+        params = imagenes.ENHANCE_PRESETS[preset]
+        return lambda: imagenes.enhance_image(image, params), size[0] * size[1]
+    return case
+
+
+def case_icon_pyramid(label):
+    source = synthetic_icon(parse_size(label)[0])
+    pixels = sum(side * side for side in imagenes.ICON_PYRAMID_SIZES)
+    return lambda: imagenes.build_icon_pyramid(source), pixels
+
+
+def wallpaper_case(image_format):
+    def case(label):
+        source_label, target_label = label.split('->')
+        data = encoded_wallpaper(parse_size(source_label), image_format)
+        target = parse_size(target_label)
+        params = imagenes.ENHANCE_PRESETS['fast']
+
+        def run():
+            image = imagenes.open_reduced(io.BytesIO(data), target)[0]
+            return imagenes.fit_wallpaper(image, target[0], target[1], params)
+        return run, target[0] * target[1]
+    return case
+
+
+CASES = {
+    'linear_gradient': (case_linear_gradient, ['1200x800', '1920x1080', '3840x2160']),
+    'radial_gradient': (case_radial_gradient, ['64x64', '256x256', '1024x1024']),
+    'progressive_resize': (case_progressive_resize, ['512x512->64x64', '3840x2160->1920x1080']),
+    'enhance_quality': (enhance_case('quality'), ['64x64', '256x256', '1920x1080']),
+    'enhance_fast': (enhance_case('fast'), ['64x64', '256x256', '1920x1080']),
+    'icon_pyramid': (case_icon_pyramid, ['512x512']),
+    'load_wallpaper_jpeg': (wallpaper_case('JPEG'), ['3840x2160->1920x1080']),
+    'load_wallpaper_png': (wallpaper_case('PNG'), ['3840x2160->1920x1080'])
+}
+
+
+# ==================== MEDICIÓN ====================
+
+def percentile(samples, fraction):
+    """Percentil por interpolación lineal sobre muestras ordenadas"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def current_rss_kb():
+    """Memoria residente actual (VmRSS) en KB, o None fuera de Linux"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Poner el pico de memoria (VmHWM) al nivel actual para medir solo lo que viene después
+
+    Sin esto el pico incluiría la creación de las imágenes de entrada. Si el
+    sistema no lo permite se mide desde el pico previo (puede quedarse corto).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return current_rss_kb()
+    except OSError:
+        return peak_rss_kb()
+
+
+def run_case(name, label, iterations):
+    """Proceso hijo: medir un (caso, tamaño) y devolver sus estadísticas"""
+    factory, _ = CASES[name]
+    func, pixels = factory(label)
+    rss_before = reset_peak_rss()
+
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    mean = statistics.fmean(samples)
+    return {
+        'case': name,
+        'size': label,
+        'iterations': iterations,
+        'first_s': first,
+        'min_s': min(samples),
+        'mean_s': mean,
+        'p50_s': percentile(samples, 0.50),
+        'p90_s': percentile(samples, 0.90),
+        'p99_s': percentile(samples, 0.99),
+        'ops_per_s': 1 / mean if mean else None,
+        'mpix_per_s': pixels / mean / 1e6 if mean else None,
+        'peak_rss_kb': peak_rss_kb() - rss_before
+    }
+
+
+def git_commit():
+    """Commit actual del repositorio (o None fuera de git)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names, iterations):
+    """Medir todos los casos pedidos, cada uno en un proceso nuevo"""
+    results = []
+    for name in names:
+        for label in CASES[name][1]:
+            output = subprocess.run(
+                [sys.executable, __file__, '--case', name, label, '--iterations', str(iterations)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output)
+            results.append(result)
+            print(f"⏱️ {name:<20} {label:<22} p50 {result['p50_s'] * 1000:8.2f} ms  "
+                  f"p90 {result['p90_s'] * 1000:8.2f} ms  p99 {result['p99_s'] * 1000:8.2f} ms  "
+                  f"{result['mpix_per_s']:8.1f} Mpx/s  pico {result['peak_rss_kb'] / 1024:6.1f} MB")
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'iterations': iterations
+        },
+        'results': results
+    }
+
+
+def compare(report, baseline, threshold):
+    """Comparar medianas con un informe anterior; devuelve el número de regresiones"""
+    previous = {(result['case'], result['size']): result for result in baseline['results']}
+    regressions = 0
+    print(f"📊 Comparación con {baseline['meta'].get('commit') or 'informe base'} (umbral {threshold:.0%}):")
+    for result in report['results']:
+        base = previous.get((result['case'], result['size']))
+        if base is None:
+            continue
+        ratio = result['p50_s'] / base['p50_s']
+        regressed = ratio > 1 + threshold
+        regressions += regressed
+        mark = "❌" if regressed else ("✅" if ratio < 1 - threshold else "➖")
+        print(f"   {mark} {result['case']} {result['size']}: {ratio:.2f}x la mediana anterior")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del motor de imágenes")
+    parser.add_argument('--json', help="guardar los resultados en este archivo")
+    parser.add_argument('--compare', help="informe JSON anterior con el que comparar")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--only', help="casos separados por comas (por defecto, todos)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="subida relativa de la mediana que cuenta como regresión")
+    parser.add_argument('--case', nargs=2, metavar=('CASO', 'TAMAÑO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], args.case[1], args.iterations)))
+        return 0
+
+    names = args.only.split(',') if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"casos desconocidos: {', '.join(unknown)}")
+
+    report = run_suite(names, args.iterations)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Resultados guardados en {args.json}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
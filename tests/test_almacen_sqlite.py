@@ -0,0 +1,88 @@
+"""Migración de bases SQLite v1 (contenido en la tabla) a v2 (contenido en disco)"""
+import sqlite3
+
+from almacen_sqlite import SCHEMA_VERSION, SqliteStore
+
+
+V1_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE files (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size TEXT NOT NULL,
+    date TEXT NOT NULL,
+    content TEXT NOT NULL DEFAULT ''
+);
+INSERT INTO meta (key, value) VALUES ('schema_version', '1');
+INSERT INTO meta (key, value) VALUES ('json_imported', '1');
+INSERT INTO files VALUES ('documents_nota.txt', 'nota.txt', 'documents', 'txt', '1 KB', '2024-01-01', 'texto de la nota');
+INSERT INTO files VALUES ('music_lista.txt', 'lista.txt', 'music', 'txt', '1 KB', '2024-01-02', 'canciones');
+"""
+
+
+def make_v1_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(V1_SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+def schema_state(path):
+    conn = sqlite3.connect(path)
+    version = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()[0]
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+    conn.close()
+    return int(version), columns
+
+
+def test_migration_moves_content_to_disk(tmp_path):
+    db_path, files_dir = tmp_path / 'simulador.db', tmp_path / 'user_files'
+    make_v1_database(db_path)
+    (files_dir / 'music').mkdir(parents=True)
+    (files_dir / 'music' / 'lista.txt').write_text('versión del disco', encoding='utf-8')
+
+    store = SqliteStore(str(db_path), str(files_dir))
+    store.close()
+
+    assert store.upgraded_from == 1
+    assert (files_dir / 'documents' / 'nota.txt').read_text(encoding='utf-8') == 'texto de la nota'
+    # Lo que ya estaba en disco no se pisa
+    assert (files_dir / 'music' / 'lista.txt').read_text(encoding='utf-8') == 'versión del disco'
+    version, columns = schema_state(db_path)
+    assert version == SCHEMA_VERSION
+    assert 'content' not in columns
+
+
+def test_failed_write_is_retried_on_next_start(tmp_path):
+    db_path, files_dir = tmp_path / 'simulador.db', tmp_path / 'user_files'
+    make_v1_database(db_path)
+    files_dir.mkdir()
+    (files_dir / 'documents').write_text('no es un directorio', encoding='utf-8')  # La escritura falla
+
+    store = SqliteStore(str(db_path), str(files_dir))
+    store.close()
+
+    # Primer arranque: la versión no sube y el texto que no se pudo mover sigue en la base
+    version, columns = schema_state(db_path)
+    assert version == 1
+    assert {'content', 'bytes', 'mtime', 'hash'} <= columns
+    conn = sqlite3.connect(db_path)
+    contents = dict(conn.execute("SELECT key, content FROM files"))
+    conn.close()
+    assert contents == {'documents_nota.txt': 'texto de la nota', 'music_lista.txt': ''}
+    assert (files_dir / 'music' / 'lista.txt').read_text(encoding='utf-8') == 'canciones'
+
+    # Segundo arranque con el problema resuelto: se completa la migración
+    (files_dir / 'documents').unlink()
+    store = SqliteStore(str(db_path), str(files_dir))
+    keys = {key for key, _ in store.iter_files()}
+    store.close()
+
+    assert store.upgraded_from == 1
+    assert keys == {'documents_nota.txt', 'music_lista.txt'}
+    assert (files_dir / 'documents' / 'nota.txt').read_text(encoding='utf-8') == 'texto de la nota'
+    version, columns = schema_state(db_path)
+    assert version == SCHEMA_VERSION
+    assert 'content' not in columns
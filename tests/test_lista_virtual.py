@@ -0,0 +1,232 @@
+"""Listas del gestor de archivos y programas sin Tk
+
+FileListModel se prueba con almacén JSON y SQLite; TreeReconciler con un
+Treeview falso que anota cada llamada.
+"""
+import random
+
+import pytest
+
+from lista_virtual import SORT_KEYS, FileListModel, TreeReconciler
+from nucleo import CoreError, HeadlessScheduler, SimulatorCore
+
+
+CATEGORIES = ['documents', 'images', 'music']
+VIEWS = [(category, column, reverse)
+         for category in ['all'] + CATEGORIES
+         for column, reverse in [(None, False), (None, True)] + [(column, False) for column in SORT_KEYS]
+         + [('Fecha', True), ('#0', True)]]
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def core(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    core = SimulatorCore(HeadlessScheduler(), storage=request.param)
+    core.login('admin', 'admin123')
+    yield core
+    core.file_journal.close()
+    if core.store is not None:
+        core.store.close()
+
+
+def open_view(core, category, column, reverse):
+    model = FileListModel(core)
+    model.set_view(category, column, reverse)
+    len(model)  # Construir el orden para que siga los cambios
+    return model
+
+
+def rebuilt_rows(core, model):
+    """Filas de un modelo nuevo con la misma vista (reconstrucción completa)"""
+    fresh = open_view(core, model.category, model.column, model.reverse)
+    core.file_observers.remove(fresh.apply)
+    return fresh.rows(0, len(fresh))
+
+
+def assert_model_matches(core, model):
+    rows = model.rows(0, len(model))
+    assert rows == rebuilt_rows(core, model)
+    for index, (key, _) in enumerate(rows):
+        assert model.index_of(key) == index
+    # Ventanas parciales como las que pide la lista virtual
+    assert model.rows(2, 7) == rows[2:7]
+
+
+def random_date(rng):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2020, 2025)} " \
+           f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+
+
+def random_operation(core, rng, names):
+    operation = rng.choice(['create', 'create', 'rename', 'save', 'touch', 'delete'])
+    category = rng.choice(CATEGORIES)
+    keys = [key for key, _ in core.iter_files(category)]
+    try:
+        if operation == 'create' or not keys:
+            core.create_file(rng.choice(names), category, content='x' * rng.randint(0, 3000))
+            return
+        key = rng.choice(keys)
+        info = core.files_data[key]
+        if operation == 'rename':
+            core.rename_file(info['name'], rng.choice(names), category)
+        elif operation == 'save':
+            core.save_file(info['name'], info, 'y' * rng.randint(0, 3000))
+        elif operation == 'touch':
+            # Cambios de fecha y tamaño que mueven la fila en las vistas ordenadas
+            core.record_file_change('update', key, fields={'date': random_date(rng),
+                                                           'bytes': rng.randint(0, 10 ** 6)})
+        else:
+            core.delete_file(info['name'], category)
+    except CoreError:
+        pass  # Nombre repetido en la categoría: la operación se rechaza sin cambios
+
+
+def test_views_follow_random_operations(core):
+    rng = random.Random(24)
+    names = [f'archivo_{index}' for index in range(15)]
+    for _ in range(20):
+        random_operation(core, rng, names)
+    models = [open_view(core, *view) for view in VIEWS]
+
+    for _ in range(250):
+        random_operation(core, rng, names)
+        for model in models:
+            assert_model_matches(core, model)
+
+
+def test_set_view_rebuilds_and_reverse_only_reindexes(core):
+    for index, category in enumerate(CATEGORIES * 3):
+        core.create_file(f'archivo_{index}', category)
+    model = open_view(core, 'music', 'Tamaño', False)
+    assert [key for key, _ in model.rows(0, len(model))] == \
+        [key for key, _ in rebuilt_rows(core, model)]
+    assert all(info['category'] == 'music' for _, info in model.rows(0, len(model)))
+
+    forward = model.rows(0, len(model))
+    order = model.order
+    model.set_view('music', 'Tamaño', True)
+    assert model.order is order  # Invertir no reconstruye
+    assert model.rows(0, len(model)) == forward[::-1]
+
+    model.set_view('all', None, False)
+    assert len(model) == 9
+    assert_model_matches(core, model)
+
+
+class RecordingTree:
+    """Treeview falso: filas de primer nivel, opciones, selección y llamadas recibidas"""
+
+    def __init__(self):
+        self.children = []
+        self.items = {}  # iid -> opciones (también las de filas desenganchadas)
+        self.selected = ()
+        self.calls = []
+
+    def insert(self, parent, index, iid, **options):
+        self.calls.append('insert')
+        assert parent == "" and iid not in self.items
+        self.items[iid] = dict(options)
+        self.children.insert(index, iid)
+
+    def move(self, iid, parent, index):
+        self.calls.append('move')
+        assert parent == "" and iid in self.items
+        if iid in self.children:
+            self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def detach(self, *iids):
+        self.calls.append('detach')
+        for iid in iids:
+            self.children.remove(iid)
+        self.selected = tuple(iid for iid in self.selected if iid not in iids)
+
+    def delete(self, *iids):
+        self.calls.append('delete')
+        for iid in iids:
+            self.children.remove(iid)
+            del self.items[iid]
+        self.selected = tuple(iid for iid in self.selected if iid not in iids)
+
+    def item(self, iid, **options):
+        self.calls.append('item')
+        self.items[iid].update(options)
+
+    def selection(self):
+        self.calls.append('selection')
+        return self.selected
+
+    def selection_set(self, iids):
+        self.calls.append('selection_set')
+        self.selected = tuple(iids)
+
+
+def longest_increasing_length(values):
+    """Longitud de la subsecuencia creciente más larga (O(n²), independiente de la implementación)"""
+    best = [1] * len(values)
+    for index in range(len(values)):
+        for previous in range(index):
+            if values[previous] < values[index]:
+                best[index] = max(best[index], best[previous] + 1)
+    return max(best, default=0)
+
+
+def random_rows(rng, ids):
+    chosen = rng.sample(ids, rng.randint(0, len(ids)))
+    if rng.random() < 0.5:
+        chosen.sort()  # Muchas actualizaciones reales apenas cambian el orden
+        for _ in range(rng.randint(0, 3)):
+            if len(chosen) > 1:
+                a, b = rng.randrange(len(chosen)), rng.randrange(len(chosen))
+                chosen[a], chosen[b] = chosen[b], chosen[a]
+    return [(iid, {'text': iid, 'values': (rng.choice(['✅', '❌']),)}) for iid in chosen]
+
+
+def test_reconciler_applies_minimal_operations():
+    rng = random.Random(25)
+    ids = [f'fila_{index:02d}' for index in range(30)]
+    tree = RecordingTree()
+    reconciler = TreeReconciler(tree)
+    previous = []
+
+    for _ in range(400):
+        rows = random_rows(rng, ids)
+        before = dict(previous)
+        kept = [iid for iid, _ in previous if iid in dict(rows)]
+        old_positions = {iid: position for position, iid in enumerate(kept)}
+        # Lo seleccionado que sigue en la lista debe seguir seleccionado
+        tree.selected = tuple(rng.sample(tree.children, min(len(tree.children), rng.randint(0, 2))))
+        selection = tree.selected
+        tree.calls = []
+
+        stats = reconciler.sync(rows)
+
+        assert tree.children == [iid for iid, _ in rows]
+        assert all(tree.items[iid] == options for iid, options in rows)
+        assert set(tree.items) == set(dict(rows))
+        assert tree.selected == tuple(iid for iid in selection if iid in dict(rows))
+
+        assert stats['inserts'] == len([iid for iid, _ in rows if iid not in before])
+        assert stats['deletes'] == len([iid for iid in before if iid not in dict(rows)])
+        assert stats['updates'] == len([iid for iid, options in rows if iid in before and before[iid] != options])
+        new_order = [old_positions[iid] for iid, _ in rows if iid in old_positions]
+        assert stats['moves'] == len(kept) - longest_increasing_length(new_order)
+        assert stats['tk_calls'] == len(tree.calls)
+        previous = rows
+
+
+def test_reconciler_unchanged_rows_cost_nothing():
+    tree = RecordingTree()
+    reconciler = TreeReconciler(tree)
+    rows = [(f'fila_{index}', {'text': str(index)}) for index in range(10)]
+    reconciler.sync(rows)
+
+    tree.calls = []
+    stats = reconciler.sync(rows)
+    assert tree.calls == []
+    assert stats['tk_calls'] == 0
+
+    # Un cambio en una fila es una sola llamada a Tk
+    rows[4] = ('fila_4', {'text': 'cambiado'})
+    assert reconciler.sync(rows) == {'inserts': 0, 'updates': 1, 'moves': 0, 'deletes': 0, 'tk_calls': 1}
+    assert tree.calls == ['item']
@@ -0,0 +1,156 @@
+"""Diario de operaciones de archivos (recuperación y compactación) e índices de FileCatalog"""
+import copy
+import json
+import random
+
+from nucleo import HeadlessScheduler, SimulatorCore
+from persistencia import FileCatalog, FileJournal
+
+
+def record(operation, key, **fields):
+    return dict(fields, op=operation, key=key)
+
+
+def file_value(name, category, size='1 KB'):
+    return {'name': name, 'category': category, 'type': 'txt', 'size': size, 'date': '01/01/2024 10:00'}
+
+
+def start_core():
+    scheduler = HeadlessScheduler()
+    core = SimulatorCore(scheduler, storage='json')
+    core.login('admin', 'admin123')
+    return core
+
+
+def test_replay_applies_records_and_drops_truncated_line(tmp_path):
+    path = tmp_path / 'files.journal'
+    journal = FileJournal(path)
+    journal.replay({})
+    journal.append(record('create', 'documents_a.txt', value=file_value('a.txt', 'documents')))
+    journal.append(record('create', 'music_b.txt', value=file_value('b.txt', 'music')))
+    journal.append(record('rename', 'documents_a.txt', new_key='documents_c.txt',
+                          value=file_value('c.txt', 'documents')))
+    journal.append(record('update', 'music_b.txt', fields={'size': '2 KB'}))
+    journal.append(record('delete', 'music_b.txt'))
+    journal.close()
+    complete_length = path.stat().st_size
+    with open(path, 'ab') as f:
+        f.write(json.dumps(record('delete', 'documents_c.txt')).encode('utf-8')[:20])  # Cierre a media línea
+
+    data = {}
+    journal = FileJournal(path)
+    assert journal.replay(data) == 5
+    journal.close()
+
+    assert data == {'documents_c.txt': file_value('c.txt', 'documents')}
+    # La línea a medias se quita para que lo siguiente no se pegue a ella
+    assert path.stat().st_size == complete_length
+
+
+def test_core_recovers_unsaved_changes_from_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    core = start_core()
+    core.create_file('informe', 'documents', content='uno\n')
+    core.create_file('notas', 'documents', content='dos\n')
+    core.create_file('lista', 'music', content='tres\n')
+    core.rename_file('informe.txt', 'resumen')
+    key, info = core.find_file('notas.txt')
+    core.save_file('notas.txt', info, 'dos, editado\n')
+    core.delete_file('lista.txt')
+    expected = copy.deepcopy(dict(core.files_data.items()))
+    # Cierre brusco: el guardado diferido de files.json nunca llegó a ejecutarse
+    core.file_journal.close()
+    assert not (tmp_path / 'data/files/files.json').exists()
+    with open(tmp_path / 'data/files/files.journal', 'ab') as f:
+        f.write(b'{"op": "delete", "key": "documents_res')
+
+    recovered = start_core()
+    assert dict(recovered.files_data.items()) == expected
+    assert recovered.find_file('resumen.txt')[0] is not None
+    assert recovered.find_file('lista.txt') == (None, None)
+    recovered.file_journal.close()
+
+
+def test_compaction_empties_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    core = start_core()
+    for index in range(5):
+        core.create_file(f'archivo_{index}', 'documents')
+    expected = copy.deepcopy(dict(core.files_data.items()))
+    core.flush_data()
+    core.file_journal.close()
+
+    journal_path = tmp_path / 'data/files/files.journal'
+    assert journal_path.stat().st_size == 0
+    assert not (tmp_path / 'data/files/files.journal.1').exists()
+
+    reloaded = start_core()
+    assert reloaded.file_journal.records == 0
+    assert dict(reloaded.files_data.items()) == expected
+    reloaded.file_journal.close()
+
+
+def assert_indexes_match(catalog):
+    """Los índices mantenidos deben ser los mismos que construidos desde cero"""
+    rebuilt = FileCatalog(copy.deepcopy(catalog.records))
+    assert catalog.by_name == rebuilt.by_name
+    assert catalog.by_category == rebuilt.by_category
+    for name, keys in catalog.by_name.items():
+        assert list(keys) == catalog.keys_named(name)
+        assert all(catalog[key]['name'] == name for key in keys)
+    for category, keys in catalog.by_category.items():
+        assert all(catalog[key]['category'] == category for key in keys)
+        assert dict(catalog.iter_category(category)) == {key: catalog[key] for key in keys}
+
+
+def test_catalog_indexes_follow_each_operation():
+    catalog = FileCatalog()
+    catalog.apply(record('create', 'documents_a.txt', value=file_value('a.txt', 'documents')))
+    catalog.apply(record('create', 'music_a.txt', value=file_value('a.txt', 'music')))
+    assert catalog.keys_named('a.txt') == ['documents_a.txt', 'music_a.txt']
+    assert catalog.find('a.txt', 'music') == ('music_a.txt', catalog['music_a.txt'])
+
+    catalog.apply(record('rename', 'documents_a.txt', new_key='documents_b.txt',
+                         value=file_value('b.txt', 'documents')))
+    assert catalog.keys_named('a.txt') == ['music_a.txt']
+    assert catalog.find('b.txt') == ('documents_b.txt', catalog['documents_b.txt'])
+    assert_indexes_match(catalog)
+
+    # Cambiar el tipo no toca los índices; cambiar la categoría mueve la entrada
+    catalog.apply(record('update', 'music_a.txt', fields={'type': 'md'}))
+    catalog.apply(record('update', 'documents_b.txt', fields={'category': 'videos'}))
+    assert list(dict(catalog.iter_category('videos'))) == ['documents_b.txt']
+    assert 'documents' not in catalog.by_category
+    assert_indexes_match(catalog)
+
+    catalog.apply(record('delete', 'music_a.txt'))
+    assert catalog.keys_named('a.txt') == []
+    assert catalog.find('a.txt') == (None, None)
+    assert 'music' not in catalog.by_category
+    assert_indexes_match(catalog)
+
+
+def test_catalog_indexes_survive_random_operations():
+    rng = random.Random(23)
+    categories = ['documents', 'images', 'music', 'videos']
+    names = [f'archivo_{index}.txt' for index in range(12)]
+    catalog = FileCatalog()
+    for _ in range(2000):
+        operation = rng.choice(['create', 'rename', 'update', 'delete'])
+        if operation == 'create' or not catalog.records:
+            name, category = rng.choice(names), rng.choice(categories)
+            catalog.apply(record('create', f'{category}_{name}', value=file_value(name, category)))
+            continue
+        key = rng.choice(list(catalog.records))
+        value = catalog[key]
+        if operation == 'rename':
+            name = rng.choice(names)
+            catalog.apply(record('rename', key, new_key=f"{value['category']}_{name}",
+                                 value=dict(value, name=name)))
+        elif operation == 'update':
+            fields = rng.choice([{'size': f'{rng.randint(1, 9)} KB'}, {'category': rng.choice(categories)},
+                                 {'name': rng.choice(names)}])
+            catalog.apply(record('update', key, fields=fields))
+        else:
+            catalog.apply(record('delete', key))
+        assert_indexes_match(catalog)
@@ -0,0 +1,60 @@
+"""Presupuesto de memoria compartido con la caché de wallpapers"""
+import threading
+
+from PIL import Image
+
+from cache_imagenes import WallpaperCache
+from recursos import MemoryBudget
+
+
+WALLPAPER_BYTES = 64 * 48 * 3
+
+
+def render(name, width, height):
+    return Image.new('RGB', (width, height), (10, 20, 30))
+
+
+def test_wallpaper_cache_shrinks_to_budget():
+    budget = MemoryBudget(5 * WALLPAPER_BYTES)
+    cache = WallpaperCache(render, max_entries=12, budget=budget)
+
+    for index in range(12):
+        cache.put(f'fondo_{index}', 64, 48, render(None, 64, 48))
+
+    assert budget.total_bytes <= budget.limit_bytes
+    assert len(cache.entries) == 5
+    assert budget.evictions == 7
+    # Sobreviven los más recientes
+    assert [key[0] for key in cache.entries] == [f'fondo_{index}' for index in range(7, 12)]
+
+
+def test_prerender_thread_enforces_budget():
+    budget = MemoryBudget(3 * WALLPAPER_BYTES)
+    cache = WallpaperCache(render, max_entries=12, budget=budget)
+
+    cache.prerender([f'fondo_{index}' for index in range(8)], [(64, 48)])
+    thread = cache.prerender_thread
+    if thread is not None:
+        thread.join(timeout=10)
+
+    assert budget.total_bytes <= budget.limit_bytes
+    assert len(cache.entries) == 3
+
+
+def test_background_enforce_skips_tk_entries():
+    budget = MemoryBudget(50)
+    consulted = []
+    budget.add('photo', 'icono', 80, on_evict=lambda: None, can_evict=lambda: consulted.append(True) or True)
+    budget.add('wallpaper', 'fondo', 80, on_evict=lambda: None)
+
+    worker = threading.Thread(target=budget.enforce)
+    worker.start()
+    worker.join()
+
+    # Fuera del hilo de Tk no se consulta a Tk: se expulsa lo que no depende de él
+    assert consulted == []
+    assert set(budget.entries) == {('photo', 'icono')}
+
+    budget.enforce()
+    assert consulted == [True]
+    assert budget.total_bytes == 0